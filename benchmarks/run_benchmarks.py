@@ -0,0 +1,326 @@
+"""
+Throughput of the engine and the AIs over the positions of corpus.json.
+
+    PYTHONPATH=src python benchmarks/run_benchmarks.py --output results.json
+    PYTHONPATH=src python benchmarks/run_benchmarks.py --baseline benchmarks/baseline.json
+
+With a baseline, the command fails when a benchmark is worse than its baseline value
+by more than the tolerance.
+"""
+import argparse
+import gc
+from dataclasses import asdict, dataclass
+import json
+import os
+import platform
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from connect_four.ai import (
+    MinimaxAI,
+    MonteCarloTreeSearch,
+    ReplacementPolicy,
+    SearchBudget,
+    Solver,
+    TranspositionTable,
+)
+from connect_four.ai.evaluators import WindowEvaluator
+from connect_four.ai.mcts_tree import MCTSTree
+from connect_four.ai.rollout_policies import get_rollout_policy
+from connect_four.core import ConnectFour, Disc
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "corpus.json")
+
+
+@dataclass
+class BenchmarkResult:
+    value: float
+    unit: str
+    higher_is_better: bool = True
+
+
+def load_corpus(path: str = CORPUS_PATH) -> Dict[str, List[ConnectFour]]:
+    """
+    Positions by phase (opening, midgame, endgame), stored as move strings
+    """
+    with open(path) as corpus_file:
+        corpus = json.load(corpus_file)
+    return {
+        phase: [
+            ConnectFour.from_moves(int(move) for move in moves) for moves in positions
+        ]
+        for phase, positions in corpus.items()
+    }
+
+
+def _get_all_positions(corpus: Dict[str, List[ConnectFour]]) -> List[ConnectFour]:
+    return [position for positions in corpus.values() for position in positions]
+
+
+def _measure_rate(run: Callable[[], int], repeat: int) -> float:
+    """
+    Best rate of `repeat` runs, each returning the number of operations done. Like
+    timeit, the garbage collector is disabled during the runs.
+    """
+    best_rate = 0.0
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            count = run()
+            best_rate = max(best_rate, count / (time.perf_counter() - start))
+        finally:
+            gc.enable()
+    return best_rate
+
+
+def bench_play_undo(corpus: Dict[str, List[ConnectFour]], repeat: int):
+    positions = _get_all_positions(corpus)
+
+    def run() -> int:
+        count = 0
+        for _ in range(200):
+            for connect_four in positions:
+                for col_index in connect_four.get_free_column_indexes():
+                    connect_four.play(col_index)
+                    connect_four.undo()
+                    count += 1
+        return count
+
+    return BenchmarkResult(_measure_rate(run, repeat), "moves/s")
+
+
+def bench_move_generation(corpus: Dict[str, List[ConnectFour]], repeat: int):
+    positions = _get_all_positions(corpus)
+
+    def run() -> int:
+        for _ in range(2000):
+            for connect_four in positions:
+                connect_four.get_free_column_indexes()
+        return 2000 * len(positions)
+
+    return BenchmarkResult(_measure_rate(run, repeat), "calls/s")
+
+
+def bench_win_detection(corpus: Dict[str, List[ConnectFour]], repeat: int):
+    # the win is checked by play, on the lines through the new disc
+    positions = _get_all_positions(corpus)
+
+    def run() -> int:
+        count = 0
+        for _ in range(200):
+            for connect_four in positions:
+                for col_index in connect_four.get_free_column_indexes():
+                    connect_four.play(col_index)
+                    connect_four.get_winner()
+                    connect_four.undo()
+                    count += 1
+        return count
+
+    return BenchmarkResult(_measure_rate(run, repeat), "checks/s")
+
+
+def bench_evaluation(corpus: Dict[str, List[ConnectFour]], repeat: int):
+    positions = _get_all_positions(corpus)
+    evaluator = WindowEvaluator()
+
+    def run() -> int:
+        count = 0
+        for connect_four in positions:
+            evaluator.reset(connect_four)
+            for _ in range(50):
+                for col_index in connect_four.get_free_column_indexes():
+                    evaluator.play(connect_four, col_index)
+                    evaluator.evaluate(connect_four, Disc.RED)
+                    evaluator.undo(connect_four)
+                    count += 1
+        return count
+
+    return BenchmarkResult(_measure_rate(run, repeat), "evaluations/s")
+
+
+def bench_minimax(corpus: Dict[str, List[ConnectFour]], repeat: int):
+    positions = corpus["opening"] + corpus["midgame"]
+
+    def run() -> int:
+        count = 0
+        for connect_four in positions:
+            count += MinimaxAI(max_depth=4).search(connect_four).stats.nodes
+        return count
+
+    return BenchmarkResult(_measure_rate(run, repeat), "nodes/s")
+
+
+def _bench_mcts(
+    corpus: Dict[str, List[ConnectFour]],
+    repeat: int,
+    batch_size: int,
+    rollout_policy: str = "random",
+):
+    positions = corpus["opening"] + corpus["midgame"]
+    budget = SearchBudget(time_limit=None, max_iterations=1000)
+
+    def run() -> int:
+        count = 0
+        for connect_four in positions:
+            mcts = MonteCarloTreeSearch(
+                budget=budget,
+                seed=0,
+                batch_size=batch_size,
+                rollout_policy=get_rollout_policy(rollout_policy),
+            )
+            count += mcts.search(connect_four).stats.iterations
+        return count
+
+    return BenchmarkResult(_measure_rate(run, repeat), "playouts/s")
+
+
+def bench_mcts(corpus: Dict[str, List[ConnectFour]], repeat: int):
+    return _bench_mcts(corpus, repeat, batch_size=1)
+
+
+def bench_mcts_batch(corpus: Dict[str, List[ConnectFour]], repeat: int):
+    return _bench_mcts(corpus, repeat, batch_size=64)
+
+
+def bench_mcts_heavy(corpus: Dict[str, List[ConnectFour]], repeat: int):
+    return _bench_mcts(corpus, repeat, batch_size=1, rollout_policy="heavy")
+
+
+def bench_mcts_node_memory(corpus: Dict[str, List[ConnectFour]], repeat: int):
+    capacity = 1 << 16
+    tree = MCTSTree(Disc.RED, capacity=capacity)
+    node_bytes = sum(
+        array.nbytes for array in vars(tree).values() if hasattr(array, "nbytes")
+    )
+    return BenchmarkResult(node_bytes / capacity, "bytes/node", higher_is_better=False)
+
+
+def bench_solver(corpus: Dict[str, List[ConnectFour]], repeat: int):
+    positions = corpus["endgame"]
+
+    def run() -> int:
+        # a small table, allocating the default one would take most of the run
+        solver = Solver(
+            TranspositionTable(
+                max_entries=1 << 16, replacement_policy=ReplacementPolicy.ALWAYS
+            )
+        )
+        for connect_four in positions:
+            solver.solve(connect_four)
+        return solver.node_count
+
+    return BenchmarkResult(_measure_rate(run, repeat), "nodes/s")
+
+
+BENCHMARKS: Dict[str, Callable[[Dict[str, List[ConnectFour]], int], BenchmarkResult]] = {
+    "core.play_undo": bench_play_undo,
+    "core.move_generation": bench_move_generation,
+    "core.win_detection": bench_win_detection,
+    "evaluator.window": bench_evaluation,
+    "minimax.nodes": bench_minimax,
+    "mcts.playouts": bench_mcts,
+    "mcts.batch_playouts": bench_mcts_batch,
+    "mcts.heavy_playouts": bench_mcts_heavy,
+    "mcts.node_memory": bench_mcts_node_memory,
+    "solver.nodes": bench_solver,
+}
+
+
+def run_benchmarks(
+    names: Optional[List[str]] = None, repeat: int = 5
+) -> Dict[str, BenchmarkResult]:
+    corpus = load_corpus()
+    return {
+        name: benchmark(corpus, repeat)
+        for name, benchmark in BENCHMARKS.items()
+        if names is None or name in names
+    }
+
+
+def compare(
+    results: Dict[str, BenchmarkResult],
+    baseline: Dict[str, BenchmarkResult],
+    tolerance: float,
+) -> List[Tuple[str, Optional[float], bool]]:
+    """
+    Relative change of each benchmark from its baseline, positive when better, and
+    whether it regressed by more than the tolerance. The change is None for the
+    benchmarks missing from the baseline.
+    """
+    changes = []
+    for name, result in results.items():
+        if name not in baseline:
+            changes.append((name, None, False))
+            continue
+        baseline_value = baseline[name].value
+        change = (result.value - baseline_value) / baseline_value
+        if not result.higher_is_better:
+            change = -change
+        changes.append((name, change, change < -tolerance))
+    return changes
+
+
+def _read_results(path: str) -> Dict[str, BenchmarkResult]:
+    with open(path) as results_file:
+        return {
+            name: BenchmarkResult(**result)
+            for name, result in json.load(results_file)["benchmarks"].items()
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Connect Four benchmarks")
+    parser.add_argument(
+        "names", nargs="*", help=f"benchmarks to run, among {', '.join(BENCHMARKS)}"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="runs, the best counts")
+    parser.add_argument("--output", help="JSON file to write the results to")
+    parser.add_argument("--baseline", help="JSON results to compare with")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.15,
+        help="regression, relative to the baseline, failing the comparison",
+    )
+    args = parser.parse_args()
+    unknown_names = set(args.names) - set(BENCHMARKS)
+    if unknown_names:
+        parser.error(f"unknown benchmarks {', '.join(sorted(unknown_names))}")
+
+    results = run_benchmarks(args.names or None, args.repeat)
+    for name, result in results.items():
+        print(f"{name:24} {result.value:14,.1f} {result.unit}")
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "benchmarks": {
+                        name: asdict(result) for name, result in results.items()
+                    },
+                },
+                output_file,
+                indent=2,
+            )
+
+    if args.baseline:
+        changes = compare(results, _read_results(args.baseline), args.tolerance)
+        print()
+        for name, change, is_regression in changes:
+            if change is None:
+                print(f"{name:24} no baseline")
+            else:
+                print(
+                    f"{name:24} {change:+8.1%}{'  REGRESSION' if is_regression else ''}"
+                )
+        if any(is_regression for _, _, is_regression in changes):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,8 @@
 from .minimax import MinimaxAI
 from .mcts import MonteCarloTreeSearch
+from .transposition_table import ReplacementPolicy, TranspositionTable
+from .parallel_mcts import ParallelMode, ParallelMonteCarloTreeSearch
+from .search import Clock, SearchBudget, SearchResult, SearchStats
+from .opening_book import OpeningBook
+from .solver import Solver, SolverAI
+from .tablebase import Tablebase
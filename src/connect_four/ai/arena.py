@@ -0,0 +1,419 @@
+import argparse
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+import csv
+from dataclasses import asdict, dataclass, field
+from itertools import combinations
+import json
+import math
+from random import Random
+import time
+from typing import Dict, Iterable, List, Optional, TextIO, Tuple
+
+from connect_four.core import ConnectFour, Disc
+
+from .mcts import MonteCarloTreeSearch
+from .minimax import MinimaxAI
+from .opening_book import OpeningBook
+from .rollout_policies import get_rollout_policy
+from .search import SearchBudget
+from .tablebase import Tablebase
+
+_Z_95 = 1.959964
+
+# Elo difference reported for a score rate of 0 or 1
+_MAX_ELO_DIFFERENCE = 800
+
+
+@dataclass(frozen=True)
+class EngineSpec:
+    """
+    Engine configuration written as `name[:option=value,...]`, e.g. `minimax:depth=4`,
+    `minimax:time=0.1`, `mcts:iterations=2000` or `mcts:time=0.5,rollout=heavy`.
+
+    Both engines take `book` and `tablebase` file options.
+    """
+
+    name: str
+    options: Tuple[Tuple[str, str], ...] = ()
+
+    @classmethod
+    def parse(cls, spec: str) -> "EngineSpec":
+        name, _, options = spec.partition(":")
+        if name not in ("minimax", "mcts"):
+            raise ValueError(f"unknown engine {name!r}")
+        parsed_options = []
+        for option in filter(None, options.split(",")):
+            key, separator, value = option.partition("=")
+            if not separator:
+                raise ValueError(f"invalid engine option {option!r}")
+            parsed_options.append((key, value))
+        return cls(name, tuple(parsed_options))
+
+    def __str__(self) -> str:
+        options = ",".join(f"{key}={value}" for key, value in self.options)
+        return f"{self.name}:{options}" if options else self.name
+
+    def create(self, seed: Optional[int] = None):
+        options = dict(self.options)
+        opening_book = OpeningBook(options.pop("book")) if "book" in options else None
+        tablebase = (
+            Tablebase(options.pop("tablebase")) if "tablebase" in options else None
+        )
+        time_limit = float(options.pop("time")) if "time" in options else None
+        if self.name == "minimax":
+            engine = MinimaxAI(
+                max_depth=int(options.pop("depth", 3)),
+                time_limit=time_limit,
+                opening_book=opening_book,
+                tablebase=tablebase,
+            )
+        else:
+            max_iterations = (
+                int(options.pop("iterations")) if "iterations" in options else None
+            )
+            if time_limit is None and max_iterations is None:
+                time_limit = SearchBudget.time_limit
+            engine = MonteCarloTreeSearch(
+                budget=SearchBudget(time_limit=time_limit, max_iterations=max_iterations),
+                seed=seed,
+                batch_size=int(options.pop("batch", 1)),
+                opening_book=opening_book,
+                tablebase=tablebase,
+                rollout_policy=get_rollout_policy(options.pop("rollout", "random")),
+            )
+        if options:
+            raise ValueError(f"unknown {self.name} options {sorted(options)}")
+        return engine
+
+
+@dataclass
+class GameResult:
+    """
+    `winner` is the spec of the winning engine, None for a draw
+    """
+
+    game_index: int
+    red: str
+    yellow: str
+    winner: Optional[str]
+    moves: List[int]
+    red_move_times: List[float] = field(default_factory=list)
+    yellow_move_times: List[float] = field(default_factory=list)
+
+
+def play_game(
+    game_index: int,
+    red: EngineSpec,
+    yellow: EngineSpec,
+    opening_moves: List[int],
+    seed: Optional[int] = None,
+) -> GameResult:
+    """
+    Plays a game from the position after `opening_moves`, with new engines
+    """
+    engines = {Disc.RED: red.create(seed), Disc.YELLOW: yellow.create(seed)}
+    move_times: Dict[Disc, List[float]] = {Disc.RED: [], Disc.YELLOW: []}
+    connect_four = ConnectFour.from_moves(opening_moves)
+    while not connect_four.is_game_over():
+        disc = connect_four.get_next_disc()
+        start = time.perf_counter()
+        move = engines[disc].next_move(connect_four)
+        move_times[disc].append(time.perf_counter() - start)
+        connect_four.play(move)
+
+    winner = connect_four.get_winner()
+    return GameResult(
+        game_index=game_index,
+        red=str(red),
+        yellow=str(yellow),
+        winner=None if winner is None else str(red if winner == Disc.RED else yellow),
+        moves=connect_four.get_moves(),
+        red_move_times=move_times[Disc.RED],
+        yellow_move_times=move_times[Disc.YELLOW],
+    )
+
+
+def get_random_opening(random: Random, plies: int) -> List[int]:
+    """
+    Random moves, so that deterministic engines don't replay the same game, which
+    don't end the game
+    """
+    connect_four = ConnectFour()
+    while len(connect_four.get_moves()) < plies:
+        col_index = random.choice(connect_four.get_free_column_indexes())
+        connect_four.play(col_index)
+        if connect_four.is_game_over():
+            connect_four.undo()
+    return connect_four.get_moves()
+
+
+def get_wilson_interval(
+    score: float, count: int, z: float = _Z_95
+) -> Tuple[float, float]:
+    """
+    Confidence interval of a rate measured as `score` successes out of `count` trials
+    """
+    if count == 0:
+        return 0.0, 1.0
+    rate = score / count
+    denominator = 1 + z * z / count
+    center = (rate + z * z / (2 * count)) / denominator
+    margin = z * math.sqrt(rate * (1 - rate) / count + z * z / (4 * count * count))
+    return max(0.0, center - margin / denominator), min(
+        1.0, center + margin / denominator
+    )
+
+
+def get_elo_difference(score_rate: float) -> float:
+    """
+    Elo difference expected from a score rate, draws counting for half a win
+    """
+    if score_rate <= 0:
+        return -_MAX_ELO_DIFFERENCE
+    if score_rate >= 1:
+        return _MAX_ELO_DIFFERENCE
+    return max(
+        -_MAX_ELO_DIFFERENCE,
+        min(_MAX_ELO_DIFFERENCE, -400 * math.log10(1 / score_rate - 1)),
+    )
+
+
+@dataclass
+class Latency:
+    move_count: int
+    mean: float
+    p50: float
+    p95: float
+    max: float
+
+    @classmethod
+    def from_move_times(cls, move_times: List[float]) -> "Latency":
+        if not move_times:
+            return cls(0, 0, 0, 0, 0)
+        move_times = sorted(move_times)
+
+        def get_percentile(percentile: float) -> float:
+            return move_times[min(len(move_times) - 1, int(percentile * len(move_times)))]
+
+        return cls(
+            move_count=len(move_times),
+            mean=sum(move_times) / len(move_times),
+            p50=get_percentile(0.5),
+            p95=get_percentile(0.95),
+            max=move_times[-1],
+        )
+
+
+@dataclass
+class MatchSummary:
+    """
+    Results of `engine` against `opponent`
+    """
+
+    engine: str
+    opponent: str
+    wins: int = 0
+    draws: int = 0
+    losses: int = 0
+    engine_move_times: List[float] = field(default_factory=list, repr=False)
+    opponent_move_times: List[float] = field(default_factory=list, repr=False)
+
+    @property
+    def game_count(self) -> int:
+        return self.wins + self.draws + self.losses
+
+    @property
+    def score_rate(self) -> float:
+        return (self.wins + self.draws / 2) / self.game_count if self.game_count else 0.5
+
+    def add(self, result: GameResult):
+        if result.winner is None:
+            self.draws += 1
+        elif result.winner == self.engine:
+            self.wins += 1
+        else:
+            self.losses += 1
+        if result.red == self.engine:
+            self.engine_move_times.extend(result.red_move_times)
+            self.opponent_move_times.extend(result.yellow_move_times)
+        else:
+            self.engine_move_times.extend(result.yellow_move_times)
+            self.opponent_move_times.extend(result.red_move_times)
+
+    def format(self) -> str:
+        low, high = get_wilson_interval(self.wins + self.draws / 2, self.game_count)
+        engine_latency = Latency.from_move_times(self.engine_move_times)
+        opponent_latency = Latency.from_move_times(self.opponent_move_times)
+        return "\n".join(
+            [
+                f"{self.engine} vs {self.opponent}: {self.game_count} games, "
+                f"+{self.wins} ={self.draws} -{self.losses}",
+                f"  score {self.score_rate:.1%} (95% CI {low:.1%} - {high:.1%}), "
+                f"Elo {get_elo_difference(self.score_rate):+.0f} "
+                f"({get_elo_difference(low):+.0f} to {get_elo_difference(high):+.0f})",
+                f"  {self.engine} move latency: {_format_latency(engine_latency)}",
+                f"  {self.opponent} move latency: {_format_latency(opponent_latency)}",
+            ]
+        )
+
+
+def _format_latency(latency: Latency) -> str:
+    return (
+        f"mean {latency.mean * 1000:.1f}ms, p50 {latency.p50 * 1000:.1f}ms, "
+        f"p95 {latency.p95 * 1000:.1f}ms, max {latency.max * 1000:.1f}ms"
+    )
+
+
+class ResultWriter:
+    """
+    Streams game results to JSON lines, or to CSV when the file name ends with .csv
+    """
+
+    _CSV_FIELDS = [
+        "game_index",
+        "red",
+        "yellow",
+        "winner",
+        "moves",
+        "red_mean_move_time",
+        "yellow_mean_move_time",
+    ]
+
+    def __init__(self, output: TextIO, is_csv: bool = False):
+        self.output = output
+        self._csv_writer = None
+        if is_csv:
+            self._csv_writer = csv.writer(output)
+            self._csv_writer.writerow(self._CSV_FIELDS)
+
+    def write(self, result: GameResult):
+        if self._csv_writer is None:
+            self.output.write(json.dumps(asdict(result)) + "\n")
+        else:
+            self._csv_writer.writerow(
+                [
+                    result.game_index,
+                    result.red,
+                    result.yellow,
+                    result.winner or "",
+                    "".join(str(move) for move in result.moves),
+                    Latency.from_move_times(result.red_move_times).mean,
+                    Latency.from_move_times(result.yellow_move_times).mean,
+                ]
+            )
+        self.output.flush()
+
+
+def get_pairings(
+    engines: List[EngineSpec],
+    game_count: int,
+    opening_plies: int = 2,
+    seed: Optional[int] = None,
+) -> Iterable[Tuple[int, EngineSpec, EngineSpec, List[int], int]]:
+    """
+    `game_count` games for each pair of engines. Each opening is played twice, with
+    both engines in turn playing first.
+    """
+    random = Random(seed)
+    game_index = 0
+    for engine, opponent in combinations(engines, 2):
+        for pair_game_index in range(game_count):
+            if pair_game_index % 2 == 0:
+                opening_moves = get_random_opening(random, opening_plies)
+                game_seed = random.getrandbits(32)
+                red, yellow = engine, opponent
+            else:
+                red, yellow = opponent, engine
+            yield game_index, red, yellow, opening_moves, game_seed
+            game_index += 1
+
+
+def run_arena(
+    engines: List[EngineSpec],
+    game_count: int,
+    writer: Optional[ResultWriter] = None,
+    opening_plies: int = 2,
+    seed: Optional[int] = None,
+    workers: Optional[int] = None,
+    executor: Optional[Executor] = None,
+) -> List[MatchSummary]:
+    """
+    Plays `game_count` games between each pair of engines over a process pool, or
+    the given executor, and writes the results as the games end
+    """
+    summaries = {
+        (str(engine), str(opponent)): MatchSummary(str(engine), str(opponent))
+        for engine, opponent in combinations(engines, 2)
+    }
+    own_executor = executor is None
+    if executor is None:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = [
+            executor.submit(play_game, *pairing)
+            for pairing in get_pairings(engines, game_count, opening_plies, seed)
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            if writer is not None:
+                writer.write(result)
+            summary = (
+                summaries.get((result.red, result.yellow))
+                or summaries[(result.yellow, result.red)]
+            )
+            summary.add(result)
+    finally:
+        if own_executor:
+            executor.shutdown(cancel_futures=True)
+    return list(summaries.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play Connect Four engines against each other"
+    )
+    parser.add_argument(
+        "engines",
+        nargs="+",
+        type=EngineSpec.parse,
+        help="engine configurations, e.g. minimax:depth=4 mcts:iterations=2000",
+    )
+    parser.add_argument(
+        "--games", type=int, default=100, help="games between each pair of engines"
+    )
+    parser.add_argument(
+        "--opening-plies", type=int, default=2, help="random moves opening each game"
+    )
+    parser.add_argument("--seed", type=int, help="random seed")
+    parser.add_argument("--workers", type=int, help="worker processes")
+    parser.add_argument(
+        "--output", help="results file, JSON lines or CSV when it ends with .csv"
+    )
+    args = parser.parse_args()
+    if len(args.engines) < 2:
+        parser.error("at least two engines are required")
+
+    output = open(args.output, "w", newline="") if args.output else None
+    try:
+        writer = (
+            ResultWriter(output, is_csv=args.output.endswith(".csv"))
+            if output is not None
+            else None
+        )
+        summaries = run_arena(
+            args.engines,
+            args.games,
+            writer=writer,
+            opening_plies=args.opening_plies,
+            seed=args.seed,
+            workers=args.workers,
+        )
+    finally:
+        if output is not None:
+            output.close()
+    for summary in summaries:
+        print(summary.format())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+from connect_four.core.connect_four import COLUMN_BITS, DISCS, HEIGHT, WIDTH, Disc
+
+NO_WINNER = -1
+
+_ALIGNMENT_SHIFTS = [
+    np.uint64(shift) for shift in (1, COLUMN_BITS, COLUMN_BITS - 1, COLUMN_BITS + 1)
+]
+_COLUMN_SHIFTS = np.arange(WIDTH, dtype=np.uint64) * np.uint64(COLUMN_BITS)
+_COLUMN_MASK = np.uint64((1 << HEIGHT) - 1)
+_ONE = np.uint64(1)
+
+
+def has_alignment(bitboards: npt.NDArray[np.uint64]) -> npt.NDArray[np.bool_]:
+    aligned = np.zeros(len(bitboards), dtype=bool)
+    for shift in _ALIGNMENT_SHIFTS:
+        pairs = bitboards & (bitboards >> shift)
+        aligned |= (pairs & (pairs >> (shift + shift))) != 0
+    return aligned
+
+
+class BatchRolloutEngine:
+    """
+    Plays random games from many positions at once: each step plays one random legal
+    move in every unfinished game and checks all the new alignments together.
+
+    Positions are (red bitboard, yellow bitboard) pairs as returned by
+    ConnectFour.get_bitboards.
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        self._random = np.random.default_rng(seed)
+
+    def simulate(self, positions: Sequence[Tuple[int, int]]) -> List[Optional[Disc]]:
+        red, yellow = np.array(positions, dtype=np.uint64).reshape(-1, 2).T
+        return [
+            None if winner == NO_WINNER else DISCS[winner]
+            for winner in self.simulate_bitboards(red, yellow)
+        ]
+
+    def simulate_bitboards(
+        self, red: npt.NDArray[np.uint64], yellow: npt.NDArray[np.uint64]
+    ) -> npt.NDArray[np.int8]:
+        """
+        Index in DISCS of the winner of each game, NO_WINNER for a draw
+        """
+        bitboards = np.stack([red, yellow]).astype(np.uint64)
+        game_count = bitboards.shape[1]
+        games = np.arange(game_count)
+
+        columns = (
+            (bitboards[0] | bitboards[1])[:, None] >> _COLUMN_SHIFTS
+        ) & _COLUMN_MASK
+        heights = np.zeros((game_count, WIDTH), dtype=np.int64)
+        for row_index in range(HEIGHT):
+            heights += ((columns >> np.uint64(row_index)) & _ONE).astype(np.int64)
+        players = heights.sum(axis=1) & 1
+
+        winners = np.full(game_count, NO_WINNER, dtype=np.int8)
+        # the player who just played is the only one who can have won
+        last_players = 1 - players
+        won = has_alignment(bitboards[last_players, games])
+        winners[won] = last_players[won]
+        running = (winners == NO_WINNER) & (heights < HEIGHT).any(axis=1)
+
+        while running.any():
+            active = np.flatnonzero(running)
+            active_heights = heights[active]
+            scores = self._random.random(active_heights.shape)
+            scores[active_heights >= HEIGHT] = -1
+            cols = scores.argmax(axis=1)
+
+            rows = active_heights[np.arange(len(active)), cols]
+            heights[active, cols] = rows + 1
+            move_bits = _ONE << (
+                cols.astype(np.uint64) * np.uint64(COLUMN_BITS) + rows.astype(np.uint64)
+            )
+            active_players = players[active]
+            bitboards[active_players, active] |= move_bits
+
+            won = has_alignment(bitboards[active_players, active])
+            winners[active[won]] = active_players[won]
+            full = (heights[active] >= HEIGHT).all(axis=1)
+            running[active[won | full]] = False
+            players[active] = 1 - active_players
+
+        return winners
@@ -0,0 +1,374 @@
+import argparse
+import math
+import sys
+import threading
+from typing import Callable, List, Optional, TextIO
+
+from connect_four.core import (
+    CONNECT,
+    HEIGHT,
+    WIDTH,
+    AlreadyFilledColumnException,
+    ConnectFour,
+    GameOverException,
+    InvalidColumnException,
+)
+
+from .mcts import MonteCarloTreeSearch
+from .minimax import MinimaxAI
+from .opening_book import OpeningBook
+from .rollout_policies import ROLLOUT_POLICIES, get_rollout_policy
+from .search import SearchBudget, SearchResult
+from .tablebase import Tablebase
+
+ENGINE_NAME = "connect-four-ai"
+
+ENGINES = ("minimax", "mcts")
+
+# search budget of a `go` without limits
+DEFAULT_DEPTH = 6
+DEFAULT_MOVETIME = 1000
+
+
+class EngineProtocol:
+    """
+    Line-based protocol, in the manner of UCI, driving AIs which live as long as the
+    protocol does, so that the minimax transposition table and the MCTS tree stay warm
+    from one command to the next:
+
+    - `uci`: answers `id name ...`, the options and `uciok`
+    - `isready`: answers `readyok`
+    - `setoption name <engine|depth|rollout> value <value>`
+    - `newgame`: forgets the searches of the previous games
+    - `position [<width>x<height>x<connect>] [<moves>]`: moves are column indexes,
+      separated by spaces or written as a single string of digits; an invalid
+      position resets the start position
+    - `go [movetime <ms>] [depth <n>] [iterations <n>] [infinite]`: searches the
+      position in the background then answers an `info` line and `bestmove <column>`;
+      `depth` only applies to minimax and `iterations` to MCTS
+    - `ponder`: searches the position in the background, without answering; a
+      following `go` on the same position starts from warm caches
+    - `stop`: ends the running search
+    - `quit`
+
+    Commands other than `stop`, `isready` and `quit` wait for the running search to
+    finish, except for `go infinite` and `ponder` searches which they end.
+
+    A failing search reports its error in an `info string` line and, for `go`,
+    answers the most central free column as `bestmove`.
+
+    The `info` line reports the depth, the nodes (playouts for MCTS), the nodes per
+    second and the time in milliseconds.
+    """
+
+    _search_thread: Optional[threading.Thread]
+    _stop_search: Optional[Callable[[], None]]
+
+    def __init__(
+        self,
+        output: TextIO = sys.stdout,
+        engine: str = "minimax",
+        depth: int = DEFAULT_DEPTH,
+        opening_book: Optional[OpeningBook] = None,
+        tablebase: Optional[Tablebase] = None,
+        seed: Optional[int] = None,
+        rollout_policy: str = "random",
+    ):
+        if engine not in ENGINES:
+            raise ValueError(f"unknown engine {engine!r}")
+        self.output = output
+        self.engine = engine
+        self.depth = depth
+        self.opening_book = opening_book
+        self.tablebase = tablebase
+        self.seed = seed
+        self.rollout_policy = rollout_policy
+        self.connect_four = ConnectFour()
+        self._output_lock = threading.Lock()
+        self._search_thread = None
+        self._stop_search = None
+        self._is_search_infinite = False
+        self._create_ais()
+
+    def handle(self, line: str) -> bool:
+        """
+        Runs a command, returns False on `quit`
+        """
+        command, *arguments = line.split() or [""]
+        if command in ("", "stop"):
+            self.stop()
+            return True
+        if command == "quit":
+            self.stop()
+            return False
+        if command == "isready":
+            self._write("readyok")
+            return True
+
+        if self._is_search_infinite:
+            self.stop()
+        self.wait()
+        handler = {
+            "uci": self._handle_uci,
+            "setoption": self._handle_setoption,
+            "newgame": self._handle_newgame,
+            "position": self._handle_position,
+            "go": self._handle_go,
+            "ponder": self._handle_ponder,
+        }.get(command)
+        if handler is None:
+            self._write(f"info string unknown command {command}")
+            return True
+        try:
+            handler(arguments)
+        except (
+            ValueError,
+            AlreadyFilledColumnException,
+            GameOverException,
+            InvalidColumnException,
+        ) as error:
+            message = str(error) or type(error).__name__
+            self._write(f"info string invalid {command}: {message}")
+        return True
+
+    def stop(self):
+        """
+        Ends the running search and waits for it
+        """
+        search_thread = self._search_thread
+        if search_thread is None:
+            return
+        # the search may not have started yet, which would clear the request
+        while search_thread.is_alive():
+            self._stop_search()
+            search_thread.join(0.01)
+        self.wait()
+
+    def wait(self):
+        """
+        Waits for the running search to finish
+        """
+        if self._search_thread is not None:
+            self._search_thread.join()
+        self._search_thread = None
+        self._stop_search = None
+        self._is_search_infinite = False
+
+    def _create_ais(self):
+        self.minimax = MinimaxAI(
+            max_depth=self.depth,
+            opening_book=self.opening_book,
+            tablebase=self.tablebase,
+        )
+        self.mcts = MonteCarloTreeSearch(
+            seed=self.seed,
+            opening_book=self.opening_book,
+            tablebase=self.tablebase,
+            rollout_policy=get_rollout_policy(self.rollout_policy),
+        )
+
+    def _handle_uci(self, arguments: List[str]):
+        self._write(f"id name {ENGINE_NAME}")
+        self._write(
+            "option name engine type combo default "
+            f"{self.engine} {' '.join(f'var {engine}' for engine in ENGINES)}"
+        )
+        self._write(f"option name depth type spin default {self.depth} min 0")
+        self._write(
+            "option name rollout type combo default "
+            f"{self.rollout_policy} "
+            f"{' '.join(f'var {policy}' for policy in ROLLOUT_POLICIES)}"
+        )
+        self._write("uciok")
+
+    def _handle_setoption(self, arguments: List[str]):
+        if len(arguments) != 4 or arguments[0] != "name" or arguments[2] != "value":
+            raise ValueError("expected setoption name <option> value <value>")
+        name, value = arguments[1], arguments[3]
+        if name == "engine":
+            if value not in ENGINES:
+                raise ValueError(f"unknown engine {value!r}")
+            self.engine = value
+        elif name == "depth":
+            self.depth = int(value)
+            if self.depth < 0:
+                raise ValueError("the depth must be positive")
+        elif name == "rollout":
+            self.mcts.rollout_policy = get_rollout_policy(value)
+            self.rollout_policy = value
+        else:
+            raise ValueError(f"unknown option {name!r}")
+
+    def _handle_newgame(self, arguments: List[str]):
+        self._create_ais()
+        self.connect_four = ConnectFour()
+
+    def _handle_position(self, arguments: List[str]):
+        # an invalid position is not searched from the previous one
+        self.connect_four = ConnectFour()
+        board = [WIDTH, HEIGHT, CONNECT]
+        if arguments and "x" in arguments[0]:
+            board = [int(size) for size in arguments.pop(0).split("x")]
+            if len(board) != 3:
+                raise ValueError("expected the board as <width>x<height>x<connect>")
+        # UCI style keywords
+        arguments = [
+            argument for argument in arguments if argument not in ("startpos", "moves")
+        ]
+        if len(arguments) == 1 and board[0] <= 10:
+            arguments = list(arguments[0])
+        self.connect_four = ConnectFour.from_moves(
+            (int(move) for move in arguments), *board
+        )
+
+    def _handle_go(self, arguments: List[str]):
+        if self.connect_four.is_game_over():
+            self._write("bestmove none")
+            return
+        search = self._prepare_search(arguments)
+        self._start_search(search, report=True, is_infinite="infinite" in arguments)
+
+    def _handle_ponder(self, arguments: List[str]):
+        if self.connect_four.is_game_over():
+            return
+        search = self._prepare_search(["infinite"])
+        self._start_search(search, report=False, is_infinite=True)
+
+    def _prepare_search(
+        self, arguments: List[str]
+    ) -> Callable[[ConnectFour], SearchResult]:
+        """
+        Sets the budget of the engine AI from the `go` arguments
+        """
+        limits = {}
+        tokens = iter(arguments)
+        for argument in tokens:
+            if argument == "infinite":
+                limits[argument] = math.inf
+            elif argument in ("movetime", "depth", "iterations"):
+                value = next(tokens, None)
+                if value is None:
+                    raise ValueError(f"{argument} expects a value")
+                limits[argument] = int(value)
+            else:
+                raise ValueError(f"unknown limit {argument!r}")
+
+        if self.engine == "minimax":
+            if "iterations" in limits:
+                raise ValueError("minimax searches take movetime or depth")
+            if "infinite" in limits:
+                self.minimax.time_limit = math.inf
+            elif "movetime" in limits:
+                self.minimax.time_limit = limits["movetime"] / 1000
+            else:
+                self.minimax.time_limit = None
+                self.minimax.max_depth = limits.get("depth", self.depth)
+            return self.minimax.search
+
+        if "depth" in limits:
+            raise ValueError("mcts searches take movetime or iterations")
+        if "infinite" in limits:
+            self.mcts.budget = SearchBudget(time_limit=math.inf)
+        elif "iterations" in limits and "movetime" not in limits:
+            self.mcts.budget = SearchBudget(
+                time_limit=None, max_iterations=limits["iterations"]
+            )
+        else:
+            self.mcts.budget = SearchBudget(
+                time_limit=limits.get("movetime", DEFAULT_MOVETIME) / 1000,
+                max_iterations=limits.get("iterations"),
+            )
+        return self.mcts.search
+
+    def _start_search(
+        self,
+        search: Callable[[ConnectFour], SearchResult],
+        report: bool,
+        is_infinite: bool,
+    ):
+        # the search plays and undoes moves on its own board
+        connect_four = ConnectFour.from_moves(
+            self.connect_four.get_moves(),
+            self.connect_four.width,
+            self.connect_four.height,
+            self.connect_four.connect,
+        )
+        # taken before the search, which may fail with moves played on its board
+        fallback_move = self._get_fallback_move(connect_four)
+
+        def run():
+            try:
+                result = search(connect_four)
+            except Exception as error:
+                message = str(error) or type(error).__name__
+                self._write(f"info string search failed: {message}")
+                if report:
+                    self._write(f"bestmove {fallback_move}")
+                return
+            if report:
+                self._report(result)
+
+        self._stop_search = (
+            self.minimax.stop if self.engine == "minimax" else self.mcts.stop
+        )
+        self._is_search_infinite = is_infinite
+        self._search_thread = threading.Thread(target=run, daemon=True)
+        self._search_thread.start()
+
+    def _get_fallback_move(self, connect_four: ConnectFour) -> int:
+        """
+        Most central free column, answered when the search fails
+        """
+        center_order = connect_four.geometry.center_order
+        return min(connect_four.get_free_column_indexes(), key=center_order.index)
+
+    def _report(self, result: SearchResult):
+        stats = result.stats
+        nodes = stats.nodes if self.engine == "minimax" else stats.iterations
+        nps = int(nodes / stats.elapsed) if stats.elapsed else 0
+        self._write(
+            f"info depth {stats.depth} nodes {nodes} nps {nps} "
+            f"time {round(stats.elapsed * 1000)}"
+        )
+        self._write(f"bestmove {result.move}")
+
+    def _write(self, line: str):
+        with self._output_lock:
+            self.output.write(line + "\n")
+            self.output.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Connect Four engine speaking a UCI like protocol on stdin/stdout"
+    )
+    parser.add_argument("--engine", choices=ENGINES, default="minimax")
+    parser.add_argument(
+        "--depth", type=int, default=DEFAULT_DEPTH, help="minimax depth of a plain go"
+    )
+    parser.add_argument("--book", help="opening book file")
+    parser.add_argument("--tablebase", help="endgame tablebase file")
+    parser.add_argument("--seed", type=int, help="MCTS random seed")
+    parser.add_argument(
+        "--rollout", choices=ROLLOUT_POLICIES, default="random", help="MCTS rollouts"
+    )
+    args = parser.parse_args()
+
+    protocol = EngineProtocol(
+        engine=args.engine,
+        depth=args.depth,
+        opening_book=OpeningBook(args.book) if args.book else None,
+        tablebase=Tablebase(args.tablebase) if args.tablebase else None,
+        seed=args.seed,
+        rollout_policy=args.rollout,
+    )
+    try:
+        for line in sys.stdin:
+            if not protocol.handle(line):
+                break
+    finally:
+        protocol.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+from connect_four.core import ConnectFour, Disc
+from connect_four.core.connect_four import CONNECT, DISCS, HEIGHT, WIDTH
+
+Window = Tuple[int, ...]
+
+WIN_SCORE = 10
+
+
+def get_windows(width: int, height: int, length: int = 4) -> List[Window]:
+    """
+    Every line of `length` cells where a player can win, cells are flat grid indexes
+    (row * width + col)
+    """
+    windows = []
+    for row in range(height):
+        for col in range(width):
+            for row_step, col_step in ((0, 1), (1, 0), (1, 1), (-1, 1)):
+                last_row = row + row_step * (length - 1)
+                last_col = col + col_step * (length - 1)
+                if 0 <= last_row < height and last_col < width:
+                    windows.append(
+                        tuple(
+                            (row + row_step * i) * width + col + col_step * i
+                            for i in range(length)
+                        )
+                    )
+    return windows
+
+
+@lru_cache(maxsize=None)
+def get_window_tables(
+    width: int, height: int, length: int
+) -> Tuple[List[Window], List[List[int]]]:
+    """
+    Windows of the board, and the indexes of the windows going through each cell
+    """
+    windows = get_windows(width, height, length)
+    cell_windows = [
+        [window_index for window_index, window in enumerate(windows) if cell in window]
+        for cell in range(width * height)
+    ]
+    return windows, cell_windows
+
+
+WINDOWS, CELL_WINDOWS = get_window_tables(WIDTH, HEIGHT, CONNECT)
+WINDOW_INDEXES = np.array(WINDOWS, dtype=np.intp)
+
+
+class Evaluator(ABC):
+    """
+    Scores a position from the max_disc point of view.
+
+    The search plays and reverts moves through the evaluator so that incremental
+    evaluators can keep their state in sync with the board.
+    """
+
+    def reset(self, connect_four: ConnectFour):
+        pass
+
+    def play(self, connect_four: ConnectFour, col_index: int):
+        connect_four.play(col_index)
+
+    def undo(self, connect_four: ConnectFour):
+        connect_four.undo()
+
+    @abstractmethod
+    def evaluate(self, connect_four: ConnectFour, max_disc: Disc) -> float:
+        ...
+
+
+class WindowEvaluator(Evaluator):
+    """
+    +1 / -1 for each winning window holding 3 discs of a single player (one less than
+    the discs to align on other boards)
+    +10 / -10 for winning/losing
+    0 for a draw
+
+    Disc counts per window are updated on play/undo, only for the windows going
+    through the played cell.
+    """
+
+    _windows: List[Window]
+    _cell_windows: List[List[int]]
+    _width: int
+    _length: int
+    _disc_counts: Tuple[List[int], List[int]]
+    _three_counts: List[int]
+    _four_counts: List[int]
+    _hash: Optional[int]
+
+    def __init__(self):
+        self._hash = None
+
+    def reset(self, connect_four: ConnectFour):
+        self._windows, self._cell_windows = get_window_tables(
+            connect_four.width, connect_four.height, connect_four.connect
+        )
+        self._width = connect_four.width
+        self._length = connect_four.connect
+        self._disc_counts = ([0] * len(self._windows), [0] * len(self._windows))
+        self._three_counts = [0, 0]
+        self._four_counts = [0, 0]
+        grid = connect_four.get_grid()
+        width = self._width
+        for window_index, window in enumerate(self._windows):
+            cells = [grid[cell // width][cell % width] for cell in window]
+            for disc_index, disc in enumerate(DISCS):
+                count = cells.count(disc)
+                self._disc_counts[disc_index][window_index] = count
+                if count == len(window) - 1 and cells.count(DISCS[1 - disc_index]) == 0:
+                    self._three_counts[disc_index] += 1
+                elif count == len(window):
+                    self._four_counts[disc_index] += 1
+        self._hash = connect_four.get_hash()
+
+    def play(self, connect_four: ConnectFour, col_index: int):
+        if self._hash != connect_four.get_hash():
+            self.reset(connect_four)
+        disc_index = DISCS.index(connect_four.get_next_disc())
+        connect_four.play(col_index)
+        row_index, col_index = connect_four.get_last_move()  # type: ignore[misc]
+
+        own_counts = self._disc_counts[disc_index]
+        other_counts = self._disc_counts[1 - disc_index]
+        length = self._length
+        for window_index in self._cell_windows[row_index * self._width + col_index]:
+            own_count = own_counts[window_index]
+            other_count = other_counts[window_index]
+            if other_count == 0:
+                if own_count == length - 2:
+                    self._three_counts[disc_index] += 1
+                elif own_count == length - 1:
+                    self._three_counts[disc_index] -= 1
+                    self._four_counts[disc_index] += 1
+            elif other_count == length - 1 and own_count == 0:
+                self._three_counts[1 - disc_index] -= 1
+            own_counts[window_index] = own_count + 1
+        self._hash = connect_four.get_hash()
+
+    def undo(self, connect_four: ConnectFour):
+        last_move = connect_four.get_last_move()
+        if last_move is None:
+            return
+        if self._hash != connect_four.get_hash():
+            self.reset(connect_four)
+        row_index, col_index = last_move
+        disc_index = DISCS.index(connect_four.get_grid()[row_index][col_index])
+        connect_four.undo()
+
+        own_counts = self._disc_counts[disc_index]
+        other_counts = self._disc_counts[1 - disc_index]
+        length = self._length
+        for window_index in self._cell_windows[row_index * self._width + col_index]:
+            own_count = own_counts[window_index]
+            other_count = other_counts[window_index]
+            if other_count == 0:
+                if own_count == length - 1:
+                    self._three_counts[disc_index] -= 1
+                elif own_count == length:
+                    self._three_counts[disc_index] += 1
+                    self._four_counts[disc_index] -= 1
+            elif other_count == length - 1 and own_count == 1:
+                self._three_counts[1 - disc_index] += 1
+            own_counts[window_index] = own_count - 1
+        self._hash = connect_four.get_hash()
+
+    def evaluate(self, connect_four: ConnectFour, max_disc: Disc) -> float:
+        if self._hash != connect_four.get_hash():
+            self.reset(connect_four)
+        max_index = DISCS.index(max_disc)
+        min_index = 1 - max_index
+        score = self._three_counts[max_index] - self._three_counts[min_index]
+        if self._four_counts[max_index]:
+            score += WIN_SCORE
+        elif self._four_counts[min_index]:
+            score -= WIN_SCORE
+        return score
+
+
+def to_array(connect_four: ConnectFour) -> npt.NDArray[np.int8]:
+    """
+    Grid as a height x width array: 1 for red discs, -1 for yellow discs, 0 if empty
+    """
+    grid = connect_four.get_grid()
+    return np.array(
+        [
+            [1 if cell == Disc.RED else -1 if cell == Disc.YELLOW else 0 for cell in row]
+            for row in grid
+        ],
+        dtype=np.int8,
+    )
+
+
+def evaluate_batch(
+    grids: npt.NDArray[np.int8],
+    max_disc: Disc,
+    windows: Optional[List[Window]] = None,
+) -> npt.NDArray[np.float64]:
+    """
+    Same scores as WindowEvaluator for a N x height x width stack of `to_array` grids
+    of standard boards, or of the boards whose windows are given
+    """
+    window_indexes = WINDOW_INDEXES if windows is None else np.array(windows, np.intp)
+    window_cells = grids.reshape(len(grids), -1)[:, window_indexes]
+    red_counts = (window_cells == 1).sum(axis=2)
+    yellow_counts = (window_cells == -1).sum(axis=2)
+    window_length = window_indexes.shape[1]
+
+    red_threes = ((red_counts == window_length - 1) & (yellow_counts == 0)).sum(axis=1)
+    yellow_threes = ((yellow_counts == window_length - 1) & (red_counts == 0)).sum(axis=1)
+    red_wins = (red_counts == window_length).any(axis=1)
+    yellow_wins = (yellow_counts == window_length).any(axis=1)
+
+    scores = (
+        red_threes - yellow_threes + WIN_SCORE * (red_wins.astype(np.int64) - yellow_wins)
+    ).astype(np.float64)
+    return scores if max_disc == Disc.RED else -scores
@@ -1,82 +1,349 @@
-from copy import deepcopy
-import math
-from random import choice
+from random import Random
 import time
-from typing import List, Optional, Self
+from typing import List, Optional, Tuple
 
 from connect_four.core import ConnectFour
-from connect_four.core.connect_four import Disc
-
-
-class Node:
-    parent: Optional[Self]
-    children: List[Self]
-    connect_four: ConnectFour
-    game_count: int
-    win_count: float
-    player: Disc
-    move: int
-    temperature: float = 1.5
-
-    def __init__(self, connect_four: ConnectFour, move: int, parent: Optional[Self]):
-        self.children = []
-        self.connect_four = connect_four
-        self.move = move
-        self.player = connect_four.get_next_disc()
-        self.parent = parent
-        self.game_count = 0
-        self.win_count = 0
-
-    def is_leaf(self):
-        return len(self.children) == 0
-
-    def get_ucb_value(self) -> float:
-        if self.game_count == 0:
-            return math.inf
-        parent_game_count = self.parent.game_count if self.parent else 0
-        return self.win_count / self.game_count + self.temperature * math.sqrt(
-            math.log(parent_game_count) / self.game_count
-        )
+from connect_four.core.connect_four import (
+    DISCS,
+    STANDARD_GEOMETRY,
+    BoardGeometry,
+    Disc,
+)
+
+from .batch_rollouts import BatchRolloutEngine
+from .mcts_tree import NO_NODE, MCTSTree
+from .opening_book import OpeningBook
+from .rollout_policies import RandomRolloutPolicy, RolloutPolicy
+from .tablebase import Tablebase
+from .search import PhaseTimer, SearchBudget, SearchResult, SearchStats, get_clock
+
+_ITERATIONS_BETWEEN_CERTAINTY_CHECKS = 100
 
 
 class MonteCarloTreeSearch:
+    """
+    The tree only holds moves and statistics: the search replays moves on a single
+    board while going down the tree and reverts them afterwards.
+
+    The tree is kept between calls: when the next position follows the previous one,
+    the search restarts from the matching subtree, so the same instance should be
+    reused for all the moves of a game.
+
+    Positions found in the `opening_book` or the `tablebase` are played without
+    searching. Simulations stop as soon as they reach a position of the tablebase and
+    take its exact result.
+    """
+
+    _tree: Optional[MCTSTree]
+    _tree_moves: List[int]
+    _tree_geometry: Optional[BoardGeometry]
+
+    def __init__(
+        self,
+        budget: SearchBudget = SearchBudget(),
+        max_nodes: int = 1 << 20,
+        seed: Optional[int] = None,
+        batch_size: int = 1,
+        opening_book: Optional[OpeningBook] = None,
+        tablebase: Optional[Tablebase] = None,
+        rollout_policy: Optional[RolloutPolicy] = None,
+        profile: bool = False,
+    ):
+        """
+        `max_nodes` bounds the tree memory, once it is full the search keeps simulating
+        from its leaves, unless the budget has a node limit.
+
+        With a `batch_size` above 1, leaves of standard boards are selected in batches
+        (with a virtual loss so that a batch spreads over the tree) and simulated
+        together by the NumPy rollout engine, which plays uniformly random moves.
+        Otherwise the moves of the simulations are chosen by the `rollout_policy`,
+        uniformly random by default.
+
+        With `profile`, the time spent selecting, expanding, simulating and
+        backpropagating is reported in the search stats.
+        """
+        self.budget = budget
+        self.batch_size = batch_size
+        self.opening_book = opening_book
+        self.tablebase = tablebase
+        self.rollout_policy = (
+            rollout_policy if rollout_policy is not None else RandomRolloutPolicy()
+        )
+        self.max_nodes = (
+            max_nodes if budget.max_nodes is None else min(max_nodes, budget.max_nodes)
+        )
+        self._random = Random(seed)
+        self._rollout_engine = BatchRolloutEngine(seed)
+        self._clock = get_clock(budget.clock)
+        self._tree = None
+        self._tree_moves = []
+        self._tree_geometry = None
+        self._stop_requested = False
+        self._certainty_check_iterations = 0
+        self.profile = profile
+        self._phase_timer = PhaseTimer() if profile else None
+        if self._phase_timer is not None:
+            for phase, method in (
+                ("select", "_select"),
+                ("expand", "_expand"),
+                ("simulate", "_simulate"),
+                ("simulate", "_simulate_batch"),
+                ("backpropagate", "_backpropagate"),
+                ("backpropagate", "_backpropagate_batch"),
+            ):
+                setattr(
+                    self, method, self._phase_timer.wrap(phase, getattr(self, method))
+                )
+
     def next_move(self, connect_four: ConnectFour) -> int:
-        root_node = Node(connect_four=connect_four, move=-1, parent=None)
-        start = time.process_time()
-        while time.process_time() - start < 1:
-            selected_node = self._select(root_node)
-            if not selected_node.connect_four.is_game_over():
-                self._expand(selected_node)
-            if not selected_node.is_leaf():
-                selected_node = choice(selected_node.children)
-            winner = self._simulate(selected_node)
-            self._backpropagate(selected_node, winner)
-        return min(root_node.children, key=lambda n: n.win_count / n.game_count).move
-
-    def _select(self, node: Node) -> Node:
-        selected_node = node
-        while not selected_node.is_leaf():
-            selected_node = max(selected_node.children, key=lambda n: n.get_ucb_value())
-        return selected_node
-
-    def _expand(self, node: Node):
-        for move in node.connect_four.get_free_column_indexes():
-            connect_four_copy = deepcopy(node.connect_four)
-            connect_four_copy.play(move)
-            child_node = Node(connect_four=connect_four_copy, move=move, parent=node)
-            node.children.append(child_node)
-
-    def _simulate(self, node: Node) -> Optional[Disc]:
-        connect_four_copy = deepcopy(node.connect_four)
-        while not connect_four_copy.is_game_over():
-            moves = connect_four_copy.get_free_column_indexes()
-            connect_four_copy.play(choice(moves))
-        return connect_four_copy.get_winner()
-
-    def _backpropagate(self, node: Node, winner: Optional[Disc]):
-        cur_node = node
-        while cur_node is not None:
-            cur_node.game_count += 1
-            if cur_node.player == winner:
-                cur_node.win_count += 1
-            cur_node = cur_node.parent
+        return self.search(connect_four).move
+
+    def stop(self):
+        """
+        Ends the running search before its budget is exhausted
+        """
+        self._stop_requested = True
+
+    def search(self, connect_four: ConnectFour) -> SearchResult:
+        known_result = self._search_known_move(connect_four)
+        if known_result is not None:
+            return known_result
+
+        start = time.perf_counter()
+        stats = SearchStats()
+        self._stop_requested = False
+        if self._phase_timer is not None:
+            self._phase_timer.reset()
+        tree = self._search(connect_four, stats)
+        stats.elapsed = time.perf_counter() - start
+        if self._phase_timer is not None:
+            stats.phase_times = self._phase_timer.get_phase_times()
+        move = (
+            self._get_fallback_move(connect_four)
+            if tree.is_leaf(0)
+            else tree.get_best_move()
+        )
+        return SearchResult(move=move, stats=stats)
+
+    def _get_fallback_move(self, connect_four: ConnectFour) -> int:
+        """
+        Most central free column, for a root left without children: a tree too small
+        to expand it or a finished game (the most central column then)
+        """
+        center_order = connect_four.geometry.center_order
+        free_col_indexes = connect_four.get_free_column_indexes()
+        if not free_col_indexes:
+            return center_order[0]
+        return min(free_col_indexes, key=center_order.index)
+
+    def _search_known_move(self, connect_four: ConnectFour) -> Optional[SearchResult]:
+        """
+        Move from the opening book or the tablebase
+        """
+        for lookup in (self.opening_book, self.tablebase):
+            if lookup is not None:
+                move = lookup.get_move(connect_four)
+                if move is not None:
+                    return SearchResult(move=move, stats=SearchStats())
+        return None
+
+    def _search(self, connect_four: ConnectFour, stats: SearchStats) -> MCTSTree:
+        tree = self._get_tree(connect_four)
+        root_move_count = len(connect_four.get_moves())
+        # the rollout engine only plays on standard boards
+        is_batched = self.batch_size > 1 and connect_four.geometry is STANDARD_GEOMETRY
+        start = self._clock()
+        self._certainty_check_iterations = 0
+        try:
+            # at least one iteration, which expands the root
+            while not stats.iterations or not self._is_budget_exhausted(
+                tree, start, stats.iterations
+            ):
+                if is_batched:
+                    self._run_batch(tree, connect_four, stats)
+                    continue
+                path = self._select_leaf(tree, connect_four)
+                stats.depth = max(stats.depth, len(path) - 1)
+                winner = self._simulate(connect_four)
+                self._backpropagate(tree, path, winner, connect_four)
+                stats.iterations += 1
+        finally:
+            while len(connect_four.get_moves()) > root_move_count:
+                connect_four.undo()
+        stats.nodes = tree.size
+        return tree
+
+    def _is_budget_exhausted(
+        self, tree: MCTSTree, start: float, iteration_count: int
+    ) -> bool:
+        budget = self.budget
+        return (
+            self._stop_requested
+            or (
+                budget.max_iterations is not None
+                and iteration_count >= budget.max_iterations
+            )
+            or (budget.max_nodes is not None and tree.is_full)
+            or (
+                budget.time_limit is not None
+                and self._clock() - start >= budget.time_limit
+            )
+            or (budget.certainty is not None and self._is_certain(tree, iteration_count))
+        )
+
+    def _is_certain(self, tree: MCTSTree, iteration_count: int) -> bool:
+        """
+        Checked every _ITERATIONS_BETWEEN_CERTAINTY_CHECKS iterations, batches add
+        several iterations at once
+        """
+        if (
+            iteration_count < self.budget.min_iterations
+            or iteration_count - self._certainty_check_iterations
+            < _ITERATIONS_BETWEEN_CERTAINTY_CHECKS
+        ):
+            return False
+        self._certainty_check_iterations = iteration_count
+        return tree.get_best_visit_share() >= self.budget.certainty
+
+    def _run_batch(self, tree: MCTSTree, connect_four: ConnectFour, stats: SearchStats):
+        batch_size = self.batch_size
+        if self.budget.max_iterations is not None:
+            batch_size = max(
+                min(batch_size, self.budget.max_iterations - stats.iterations), 1
+            )
+
+        paths = []
+        positions = []
+        known_paths = []
+        known_winners = []
+        for _ in range(batch_size):
+            path = self._select_leaf(tree, connect_four)
+            stats.depth = max(stats.depth, len(path) - 1)
+            tree.add_virtual_loss(path)
+            is_known, winner = self._get_known_winner(connect_four)
+            if is_known:
+                known_paths.append(path)
+                known_winners.append(winner)
+            else:
+                paths.append(path)
+                positions.append(connect_four.get_bitboards())
+            for _ in range(len(path) - 1):
+                connect_four.undo()
+
+        winners = self._simulate_batch(positions) if positions else []
+        self._backpropagate_batch(tree, paths + known_paths, winners + known_winners)
+        stats.iterations += len(paths) + len(known_paths)
+
+    def _simulate_batch(self, positions: List[Tuple[int, int]]) -> List[Optional[Disc]]:
+        return self._rollout_engine.simulate(positions)
+
+    def _backpropagate_batch(
+        self, tree: MCTSTree, paths: List[List[int]], winners: List[Optional[Disc]]
+    ):
+        for path, winner in zip(paths, winners):
+            tree.backpropagate(path, winner, with_virtual_loss=True)
+
+    def _select_leaf(self, tree: MCTSTree, connect_four: ConnectFour) -> List[int]:
+        """
+        Select a leaf, expand it and pick one of its new children, the moves of the
+        returned path are played on the board
+        """
+        path = self._select(tree, connect_four)
+        if not connect_four.is_game_over():
+            self._expand(tree, path[-1], connect_four)
+        if not tree.is_leaf(path[-1]):
+            child = self._random.choice(tree.get_children(path[-1]))
+            connect_four.play(tree.get_move(child))
+            path.append(child)
+        return path
+
+    def _get_tree(self, connect_four: ConnectFour) -> MCTSTree:
+        """
+        Advance the previous tree through the moves played since the last search, or
+        start a new one when the position does not follow it
+        """
+        moves = connect_four.get_moves()
+        tree = self._tree
+        self._tree = None
+        if (
+            tree is not None
+            and self._tree_geometry is connect_four.geometry
+            and moves[: len(self._tree_moves)] == self._tree_moves
+        ):
+            node = 0
+            for move in moves[len(self._tree_moves) :]:
+                node = next(
+                    (
+                        child
+                        for child in tree.get_children(node)
+                        if tree.get_move(child) == move
+                    ),
+                    NO_NODE,
+                )
+                if node == NO_NODE:
+                    break
+            if node != NO_NODE:
+                self._tree = tree if node == 0 else tree.extract_subtree(node)
+
+        if self._tree is None:
+            self._tree = MCTSTree(connect_four.get_next_disc(), capacity=self.max_nodes)
+        self._tree_moves = moves
+        self._tree_geometry = connect_four.geometry
+        return self._tree
+
+    def _select(self, tree: MCTSTree, connect_four: ConnectFour) -> List[int]:
+        path = [0]
+        while not tree.is_leaf(path[-1]):
+            child = tree.select_child(path[-1])
+            connect_four.play(tree.get_move(child))
+            path.append(child)
+        return path
+
+    def _expand(self, tree: MCTSTree, node: int, connect_four: ConnectFour):
+        tree.add_children(node, connect_four.get_free_column_indexes())
+
+    def _simulate(self, connect_four: ConnectFour) -> Optional[Disc]:
+        play_count = 0
+        choose_move = self.rollout_policy.choose_move
+        is_known, winner = self._get_known_winner(connect_four)
+        while not is_known:
+            connect_four.play(choose_move(connect_four, self._random))
+            play_count += 1
+            is_known, winner = self._get_known_winner(connect_four)
+        for _ in range(play_count):
+            connect_four.undo()
+        return winner
+
+    def _get_known_winner(self, connect_four: ConnectFour) -> Tuple[bool, Optional[Disc]]:
+        """
+        Whether the result is known without simulating, when the game is over or the
+        position is in the tablebase, and the winner with perfect play
+        """
+        if connect_four.is_game_over():
+            return True, connect_four.get_winner()
+        if self.tablebase is None:
+            return False, None
+        score = self.tablebase.get_score(connect_four)
+        if score is None:
+            return False, None
+        next_disc = connect_four.get_next_disc()
+        if score > 0:
+            return True, next_disc
+        if score < 0:
+            return True, DISCS[1 - DISCS.index(next_disc)]
+        return True, None
+
+    def _backpropagate(
+        self,
+        tree: MCTSTree,
+        path: List[int],
+        winner: Optional[Disc],
+        connect_four: ConnectFour,
+    ):
+        """
+        Update the statistics up to the root, reverting the moves played on the way
+        down
+        """
+        tree.backpropagate(path, winner)
+        for _ in range(len(path) - 1):
+            connect_four.undo()
@@ -0,0 +1,169 @@
+import math
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from connect_four.core.connect_four import DISCS, Disc
+
+NO_NODE = -1
+
+
+class MCTSTree:
+    """
+    Struct-of-arrays tree: node statistics live in preallocated arrays indexed by node
+    id, and the children of a node are allocated as one contiguous block.
+
+    Node 0 is the root. Once `capacity` nodes are allocated the tree stops growing and
+    the search keeps simulating from its leaves.
+    """
+
+    temperature: float = 1.5
+
+    def __init__(self, root_player: Disc, capacity: int = 1 << 20):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        # zeroed or uninitialized buffers are only backed by memory once written, so a
+        # tree only costs the nodes it allocated
+        self.game_counts = np.zeros(capacity, dtype=np.float64)
+        self.win_counts = np.zeros(capacity, dtype=np.float64)
+        self.parents = np.empty(capacity, dtype=np.int32)
+        self.first_children = np.empty(capacity, dtype=np.int32)
+        self.child_counts = np.zeros(capacity, dtype=np.int8)
+        self.moves = np.empty(capacity, dtype=np.int8)
+        # index in DISCS of the player who played the node move, win counts are
+        # counted for this player
+        self.players = np.empty(capacity, dtype=np.int8)
+        self.players[0] = 1 - DISCS.index(root_player)
+        self.parents[0] = NO_NODE
+        self.first_children[0] = NO_NODE
+        self.moves[0] = NO_NODE
+        self.size = 1
+        self.is_full = False
+
+    def is_leaf(self, node: int) -> bool:
+        return not self.child_counts[node]
+
+    def get_children(self, node: int) -> range:
+        first_child = int(self.first_children[node])
+        return range(first_child, first_child + int(self.child_counts[node]))
+
+    def get_move(self, node: int) -> int:
+        return int(self.moves[node])
+
+    def add_children(self, node: int, moves: List[int]) -> bool:
+        """
+        Allocate one child per move, return False when the tree is full
+        """
+        first_child = self.size
+        last_child = first_child + len(moves)
+        if last_child > self.capacity:
+            self.is_full = True
+            return False
+        self.parents[first_child:last_child] = node
+        self.moves[first_child:last_child] = moves
+        self.players[first_child:last_child] = 1 - self.players[node]
+        self.first_children[node] = first_child
+        self.child_counts[node] = len(moves)
+        self.size = last_child
+        return True
+
+    def select_child(self, node: int) -> int:
+        """
+        Child with the best upper confidence bound, unvisited children first
+        """
+        first_child = int(self.first_children[node])
+        last_child = first_child + int(self.child_counts[node])
+        game_counts = self.game_counts[first_child:last_child]
+        least_visited = int(game_counts.argmin())
+        if not game_counts[least_visited]:
+            return first_child + least_visited
+        ucb_values = self.win_counts[first_child:last_child] / game_counts
+        ucb_values += self.temperature * np.sqrt(
+            math.log(self.game_counts[node]) / game_counts
+        )
+        return first_child + int(ucb_values.argmax())
+
+    def add_virtual_loss(self, path: List[int]):
+        """
+        Count a game without a win along a path whose simulation is still running, so
+        that the next selections explore other nodes
+        """
+        self.game_counts[np.array(path, dtype=np.intp)] += 1
+
+    def backpropagate(
+        self, path: List[int], winner: Optional[Disc], with_virtual_loss: bool = False
+    ):
+        nodes = np.array(path, dtype=np.intp)
+        if not with_virtual_loss:
+            self.game_counts[nodes] += 1
+        if winner is not None:
+            winning_nodes = nodes[self.players[nodes] == DISCS.index(winner)]
+            self.win_counts[winning_nodes] += 1
+
+    def extract_subtree(self, node: int) -> "MCTSTree":
+        """
+        Copy the subtree below `node` into a new tree rooted at it, dropping its
+        siblings and ancestors
+        """
+        subtree = MCTSTree(DISCS[1 - self.players[node]], capacity=self.capacity)
+        subtree.game_counts[0] = self.game_counts[node]
+        subtree.win_counts[0] = self.win_counts[node]
+        families = [(node, 0)]
+        for old_parent, new_parent in families:
+            child_count = int(self.child_counts[old_parent])
+            if not child_count:
+                continue
+            old_first = int(self.first_children[old_parent])
+            old_children = slice(old_first, old_first + child_count)
+            new_first = subtree.size
+            new_children = slice(new_first, new_first + child_count)
+            subtree.game_counts[new_children] = self.game_counts[old_children]
+            subtree.win_counts[new_children] = self.win_counts[old_children]
+            subtree.moves[new_children] = self.moves[old_children]
+            subtree.players[new_children] = self.players[old_children]
+            subtree.parents[new_children] = new_parent
+            subtree.first_children[new_parent] = new_first
+            subtree.child_counts[new_parent] = child_count
+            subtree.size += child_count
+            families.extend((old_first + i, new_first + i) for i in range(child_count))
+        return subtree
+
+    def get_best_visit_share(self) -> float:
+        """
+        Share of the root visits going to its most visited child
+        """
+        children = self.get_children(0)
+        if not len(children) or not self.game_counts[0]:
+            return 0.0
+        return float(
+            self.game_counts[children.start : children.stop].max() / self.game_counts[0]
+        )
+
+    def get_root_statistics(self) -> List[Tuple[int, float, float]]:
+        """
+        (move, game count, win count) of each root child
+        """
+        return [
+            (
+                self.get_move(child),
+                float(self.game_counts[child]),
+                float(self.win_counts[child]),
+            )
+            for child in self.get_children(0)
+        ]
+
+    def get_best_move(self) -> int:
+        """
+        Root move with the best win rate
+        """
+        children = self.get_children(0)
+        game_counts = self.game_counts[children.start : children.stop]
+        win_rates = np.full(len(children), -np.inf)
+        np.divide(
+            self.win_counts[children.start : children.stop],
+            game_counts,
+            out=win_rates,
+            where=game_counts > 0,
+        )
+        return self.get_move(children.start + int(win_rates.argmax()))
@@ -1,28 +1,219 @@
 import math
-from typing import List, TypeGuard
+import time
+from typing import List, Optional
 from connect_four.core import ConnectFour, Disc
-from connect_four.core.connect_four import HEIGHT, WIDTH, Cell
+from connect_four.core.connect_four import CENTER_ORDER, BoardGeometry
+
+from .evaluators import WIN_SCORE, Evaluator, WindowEvaluator
+from .opening_book import OpeningBook
+from .tablebase import Tablebase
+from .search import PhaseTimer, SearchResult, SearchStats
+from .transposition_table import Bound, TranspositionTable
+
+
+_NODES_BETWEEN_DEADLINE_CHECKS = 256
+
+
+class _SearchTimeout(Exception):
+    pass
 
 
 class MinimaxAI:
-    def __init__(self, max_depth: int = 3):
+    """
+    Scores are cached in a transposition table which is kept between calls, so the
+    same instance should be reused for all the moves of a game.
+
+    The search deepens one ply at a time up to max_depth. With a time_limit (in
+    seconds of wall time), it keeps deepening until the deadline instead and plays the
+    best move of the last completed depth. `stop`, called from another thread, ends the
+    search the same way.
+
+    Positions found in the `opening_book` or the `tablebase` are played without
+    searching. Positions of the search found in the tablebase are scored as a win, a
+    draw or a loss instead of being evaluated.
+
+    With `profile`, the time spent evaluating positions and generating (ordering)
+    moves is reported in the search stats.
+    """
+
+    def __init__(
+        self,
+        max_depth: int = 3,
+        time_limit: Optional[float] = None,
+        transposition_table: Optional[TranspositionTable] = None,
+        evaluator: Optional[Evaluator] = None,
+        opening_book: Optional[OpeningBook] = None,
+        tablebase: Optional[Tablebase] = None,
+        profile: bool = False,
+    ):
         self.max_depth = max_depth
+        self.opening_book = opening_book
+        self.tablebase = tablebase
+        self.time_limit = time_limit
+        self.evaluator = evaluator if evaluator is not None else WindowEvaluator()
+        self.transposition_table = (
+            transposition_table
+            if transposition_table is not None
+            else TranspositionTable()
+        )
+        self._table_disc: Optional[Disc] = None
+        self._table_geometry: Optional[BoardGeometry] = None
+        self._center_order = CENTER_ORDER
+        self._deadline: Optional[float] = None
+        self._stop_requested = False
+        self._node_count = 0
+        self._cutoff_count = 0
+        self._search_depth = 0
+        self._killer_moves: List[List[int]] = []
+        self._history: List[List[int]] = []
+        self._evaluate = self.evaluator.evaluate
+        self.profile = profile
+        self._phase_timer = PhaseTimer() if profile else None
+        if self._phase_timer is not None:
+            self._evaluate = self._phase_timer.wrap("evaluate", self._evaluate)
+            self._order_moves = self._phase_timer.wrap("generate", self._order_moves)
 
     def next_move(self, connect_four: ConnectFour) -> int:
-        best_move = 1
+        return self.search(connect_four).move
+
+    def stop(self):
+        """
+        Ends the running search, which returns the best move of its last completed
+        depth
+        """
+        self._stop_requested = True
+
+    def search(self, connect_four: ConnectFour) -> SearchResult:
+        for lookup in (self.opening_book, self.tablebase):
+            if lookup is not None:
+                move = lookup.get_move(connect_four)
+                if move is not None:
+                    return SearchResult(move=move, stats=SearchStats())
+        return self._search(connect_four, analyze=False)
+
+    def analyze(self, connect_four: ConnectFour) -> SearchResult:
+        """
+        Search which scores every column, None for the full ones, from the point of
+        view of the player to move. Slower than `search`, which stops searching a
+        column once it is proven not better than the best one.
+        """
+        return self._search(connect_four, analyze=True)
+
+    def _search(self, connect_four: ConnectFour, analyze: bool) -> SearchResult:
+        start = time.perf_counter()
+        stats = SearchStats()
+        self._stop_requested = False
+        if self._phase_timer is not None:
+            self._phase_timer.reset()
+
+        ai_disc = connect_four.get_next_disc()
+        geometry = connect_four.geometry
+        if self._table_disc != ai_disc or self._table_geometry is not geometry:
+            # scores are stored from the AI point of view, hashes depend on the board
+            self.transposition_table.clear()
+            self._table_disc = ai_disc
+            self._table_geometry = geometry
+
+        width = connect_four.width
+        free_col_indexes = connect_four.get_free_column_indexes()
+        scores: Optional[List[Optional[float]]] = [None] * width if analyze else None
+        if not free_col_indexes:
+            return SearchResult(move=1, stats=stats, scores=scores)
+        self._center_order = geometry.center_order
+        best_move = min(free_col_indexes, key=self._center_order.index)
+
+        if self.time_limit is None:
+            self._deadline = None
+            max_depth = self.max_depth
+        else:
+            self._deadline = time.perf_counter() + self.time_limit
+            max_depth = geometry.cell_count - len(connect_four.get_moves()) - 1
+
+        self.evaluator.reset(connect_four)
+        self._node_count = 0
+        self._cutoff_count = 0
+        self._killer_moves = [[] for _ in range(max_depth + 1)]
+        self._history = [[0] * width, [0] * width]
+        for depth in range(max_depth + 1):
+            depth_scores = [None] * width if analyze else None
+            try:
+                best_move = self._search_root(
+                    connect_four, ai_disc, depth, best_move, depth_scores
+                )
+            except _SearchTimeout:
+                break
+            stats.depth = depth
+            scores = depth_scores
+
+        stats.nodes = self._node_count
+        stats.cutoffs = self._cutoff_count
+        stats.elapsed = time.perf_counter() - start
+        if self._phase_timer is not None:
+            stats.phase_times = self._phase_timer.get_phase_times()
+        return SearchResult(move=best_move, stats=stats, scores=scores)
+
+    def _search_root(
+        self,
+        connect_four: ConnectFour,
+        ai_disc: Disc,
+        depth: int,
+        pv_move: int,
+        scores: Optional[List[Optional[float]]] = None,
+    ) -> int:
+        """
+        Scores of the moves are recorded in `scores` when given, the moves are then
+        searched with a full window
+        """
+        self._search_depth = depth
+        moves = self._order_moves(connect_four.get_free_column_indexes(), pv_move, 0)
+        best_move = moves[0]
         best_score = -math.inf
-        for move in connect_four.get_free_column_indexes():
-            ai_disc = connect_four.get_next_disc()
-            connect_four.play(move)
-            score = self._minimax(
-                connect_four, ai_disc, is_max=False, depth=self.max_depth
-            )
-            connect_four.undo()
+        for move in moves:
+            self.evaluator.play(connect_four, move)
+            try:
+                score = self._minimax(
+                    connect_four,
+                    ai_disc,
+                    is_max=False,
+                    depth=depth,
+                    alpha=best_score if scores is None else -math.inf,
+                )
+            finally:
+                self.evaluator.undo(connect_four)
+            if scores is not None:
+                scores[move] = score
             if score > best_score:
                 best_move = move
                 best_score = score
         return best_move
 
+    def _order_moves(self, moves: List[int], best_move: Optional[int], ply: int):
+        """
+        Best move from the transposition table (or previous iteration) first, then
+        killer moves of this ply, then moves with the best history, center first
+        """
+        killer_moves = self._killer_moves[ply] if ply < len(self._killer_moves) else []
+        history = self._history[ply & 1]
+        center_order = self._center_order
+
+        def get_priority(move: int):
+            if move == best_move:
+                return (0, 0)
+            if move in killer_moves:
+                return (1, killer_moves.index(move))
+            return (2, -history[move], center_order.index(move))
+
+        return sorted(moves, key=get_priority)
+
+    def _record_cutoff(self, move: int, depth: int):
+        self._cutoff_count += 1
+        ply = self._search_depth - depth + 1
+        killer_moves = self._killer_moves[ply]
+        if move not in killer_moves:
+            killer_moves.insert(0, move)
+            del killer_moves[2:]
+        self._history[ply & 1][move] += depth * depth
+
     def _minimax(
         self,
         connect_four: ConnectFour,
@@ -32,109 +223,96 @@ class MinimaxAI:
         alpha: float = -math.inf,
         beta: float = math.inf,
     ) -> float:
+        self._node_count += 1
+        if self._node_count % _NODES_BETWEEN_DEADLINE_CHECKS == 0 and (
+            self._stop_requested
+            or (self._deadline is not None and time.perf_counter() >= self._deadline)
+        ):
+            raise _SearchTimeout()
+
+        if self.tablebase is not None:
+            tablebase_score = self.tablebase.get_score(connect_four)
+            if tablebase_score is not None:
+                if connect_four.get_next_disc() != max_disc:
+                    tablebase_score = -tablebase_score
+                # same scale as the evaluator wins
+                return math.copysign(WIN_SCORE, tablebase_score) if tablebase_score else 0
+
         if connect_four.is_game_over() or depth == 0:
             return self._evaluate(connect_four, max_disc)
 
+        key = connect_four.get_hash()
+        entry = self.transposition_table.lookup(key)
+        tt_move = None
+        if entry is not None:
+            if entry.depth >= depth:
+                if entry.bound == Bound.EXACT:
+                    return entry.score
+                if entry.bound == Bound.LOWER:
+                    alpha = max(alpha, entry.score)
+                else:
+                    beta = min(beta, entry.score)
+                if beta <= alpha:
+                    return entry.score
+            tt_move = entry.best_move
+        moves = self._order_moves(
+            connect_four.get_free_column_indexes(),
+            tt_move,
+            self._search_depth - depth + 1,
+        )
+
+        original_alpha, original_beta = alpha, beta
+        best_move = None
         if is_max:
             best_score = -math.inf
-            for move in connect_four.get_free_column_indexes():
-                connect_four.play(move)
-                score = self._minimax(
-                    connect_four,
-                    max_disc,
-                    is_max=False,
-                    depth=depth - 1,
-                    alpha=alpha,
-                    beta=beta,
-                )
-                connect_four.undo()
-                best_score = max(best_score, score)
+            for move in moves:
+                self.evaluator.play(connect_four, move)
+                try:
+                    score = self._minimax(
+                        connect_four,
+                        max_disc,
+                        is_max=False,
+                        depth=depth - 1,
+                        alpha=alpha,
+                        beta=beta,
+                    )
+                finally:
+                    self.evaluator.undo(connect_four)
+                if score > best_score:
+                    best_score = score
+                    best_move = move
                 alpha = max(alpha, score)
                 if beta <= alpha:
+                    self._record_cutoff(move, depth)
+                    break
+        else:
+            best_score = math.inf
+            for move in moves:
+                self.evaluator.play(connect_four, move)
+                try:
+                    score = self._minimax(
+                        connect_four,
+                        max_disc,
+                        is_max=True,
+                        depth=depth - 1,
+                        alpha=alpha,
+                        beta=beta,
+                    )
+                finally:
+                    self.evaluator.undo(connect_four)
+                if score < best_score:
+                    best_score = score
+                    best_move = move
+                beta = min(beta, score)
+                if beta <= alpha:
+                    self._record_cutoff(move, depth)
                     break
-            return best_score
-
-        best_score = math.inf
-        for move in connect_four.get_free_column_indexes():
-            connect_four.play(move)
-            score = self._minimax(
-                connect_four,
-                max_disc,
-                is_max=True,
-                depth=depth - 1,
-                alpha=alpha,
-                beta=beta,
-            )
-            connect_four.undo()
-            best_score = min(best_score, score)
-            beta = min(beta, score)
-            if beta <= alpha:
-                break
-        return best_score
-
-    def _evaluate(self, connect_four: ConnectFour, max_disc: Disc) -> float:
-        """
-        +1 / -1 for each line of 3 discs
-        +10 / -10 for winning/losing
-        0 for a draw
-        """
-
-        def count_three_discs_lines(disc: Disc):
-            def has_three_discs_in_a_row(cell: Cell, row: List[Cell]) -> TypeGuard[Disc]:
-                return cell == disc and cell == row[i + 1] == row[i + 2]
-
-            def has_three_discs_in_a_diag(
-                cell: Cell, grid: List[List[Cell]], is_going_up: bool
-            ) -> TypeGuard[Disc]:
-                dir = -1 if is_going_up else 1
-                return (
-                    cell == disc
-                    and cell == grid[y + 1 * dir][x + 1] == grid[y + 2 * dir][x + 2]
-                )
 
-            count = 0
-            for row in connect_four.get_grid():
-                for i in range(WIDTH - 2):
-                    cur_cell = row[i]
-                    if has_three_discs_in_a_row(cur_cell, row):
-                        count += 1
-
-            for col in zip(*connect_four.get_grid()):
-                for i in range(HEIGHT - 2):
-                    cur_cell = col[i]
-                    if has_three_discs_in_a_row(cur_cell, list(col)):
-                        count += 1
-
-            for y in range(HEIGHT - 1, HEIGHT - 3, -1):
-                for x in range(WIDTH - 2):
-                    cur_cell = connect_four.get_grid()[y][x]
-                    if has_three_discs_in_a_diag(
-                        cur_cell, connect_four.get_grid(), is_going_up=True
-                    ):
-                        count += 1
-
-            for y in range(HEIGHT - 2):
-                for x in range(WIDTH - 2):
-                    cur_cell = connect_four.get_grid()[y][x]
-                    if has_three_discs_in_a_diag(
-                        cur_cell, connect_four.get_grid(), is_going_up=False
-                    ):
-                        count += 1
-            return count
-
-        min_disc = Disc.RED if max_disc == Disc.YELLOW else Disc.YELLOW
-        min_disc_count = count_three_discs_lines(min_disc) * -1
-        max_disc_count = count_three_discs_lines(max_disc)
-        win = self._evaluate_win(connect_four, max_disc)
-        return min_disc_count + max_disc_count + win * 10
-
-    def _evaluate_win(self, connect_four: ConnectFour, max_disc: Disc) -> float:
-        """
-        going all the way down to the final state is too slow
-        """
-        if connect_four.get_winner() is None:
-            return 0
-        elif connect_four.get_winner() == max_disc:
-            return 1
+        if best_score <= original_alpha:
+            bound = Bound.UPPER
+        elif best_score >= original_beta:
+            bound = Bound.LOWER
         else:
-            return -1
+            bound = Bound.EXACT
+        self.transposition_table.store(key, depth, best_score, bound, best_move)
+        return best_score
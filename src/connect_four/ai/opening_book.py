@@ -0,0 +1,98 @@
+from bisect import bisect_left
+import mmap
+import os
+import struct
+from typing import Dict, Optional
+
+from connect_four.core import ConnectFour
+from connect_four.core.connect_four import HEIGHT, STANDARD_GEOMETRY, WIDTH
+
+_HEADER = struct.Struct("<4sBBxx")
+_RECORD = struct.Struct("<QB")
+_MAGIC = b"C4OB"
+
+
+class InvalidOpeningBookException(Exception):
+    pass
+
+
+class _Keys:
+    """
+    Sequence view over the record keys, for bisect
+    """
+
+    def __init__(self, buffer: mmap.mmap, count: int):
+        self._buffer = buffer
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> int:
+        return _RECORD.unpack_from(self._buffer, _HEADER.size + index * _RECORD.size)[0]
+
+
+class OpeningBook:
+    """
+    Best moves of the opening positions, read from a file written by
+    `write_opening_book`.
+
+    The file is a header followed by (canonical key, move) records sorted by key, it
+    is memory-mapped and searched by bisection, so nothing is loaded upfront and
+    the pages are shared by all the processes using the same book.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as book_file:
+            if os.fstat(book_file.fileno()).st_size < _HEADER.size:
+                raise InvalidOpeningBookException()
+            self._buffer = mmap.mmap(book_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, width, height = _HEADER.unpack_from(self._buffer)
+        record_bytes = len(self._buffer) - _HEADER.size
+        if (
+            magic != _MAGIC
+            or (width, height) != (WIDTH, HEIGHT)
+            or record_bytes % _RECORD.size
+        ):
+            raise InvalidOpeningBookException()
+        self._keys = _Keys(self._buffer, record_bytes // _RECORD.size)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self._buffer.close()
+
+    def get_move(self, connect_four: ConnectFour) -> Optional[int]:
+        """
+        Book move of the position, None when it is not in the book or the board is not
+        a standard one
+        """
+        if connect_four.geometry is not STANDARD_GEOMETRY:
+            return None
+        key, is_mirrored = connect_four.get_canonical_key()
+        index = bisect_left(self._keys, key)
+        if index == len(self._keys):
+            return None
+        record_key, move = _RECORD.unpack_from(
+            self._buffer, _HEADER.size + index * _RECORD.size
+        )
+        if record_key != key:
+            return None
+        return WIDTH - 1 - move if is_mirrored else move
+
+
+def write_opening_book(path: str, moves_by_key: Dict[int, int]):
+    """
+    `moves_by_key` maps canonical keys to the move of the canonical position
+    """
+    with open(path, "wb") as book_file:
+        book_file.write(_HEADER.pack(_MAGIC, WIDTH, HEIGHT))
+        for key in sorted(moves_by_key):
+            book_file.write(_RECORD.pack(key, moves_by_key[key]))
@@ -0,0 +1,92 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from connect_four.core import ConnectFour
+from connect_four.core.connect_four import WIDTH
+
+from .minimax import MinimaxAI
+from .opening_book import write_opening_book
+
+
+def get_opening_positions(max_plies: int) -> List[List[int]]:
+    """
+    Move lists of every position with at most `max_plies` discs which is not over,
+    one per canonical key
+    """
+    positions: List[List[int]] = []
+    seen_keys = set()
+    ply_positions: List[List[int]] = [[]]
+    for _ in range(max_plies + 1):
+        next_ply_positions = []
+        for moves in ply_positions:
+            connect_four = ConnectFour.from_moves(moves)
+            key, _ = connect_four.get_canonical_key()
+            if key in seen_keys or connect_four.is_game_over():
+                continue
+            seen_keys.add(key)
+            positions.append(moves)
+            next_ply_positions.extend(
+                moves + [col_index]
+                for col_index in connect_four.get_free_column_indexes()
+            )
+        ply_positions = next_ply_positions
+    return positions
+
+
+def _search_canonical_move(
+    moves: List[int], max_depth: int, time_limit: Optional[float]
+) -> Tuple[int, int]:
+    connect_four = ConnectFour.from_moves(moves)
+    key, is_mirrored = connect_four.get_canonical_key()
+    move = MinimaxAI(max_depth=max_depth, time_limit=time_limit).next_move(connect_four)
+    return key, WIDTH - 1 - move if is_mirrored else move
+
+
+def generate_opening_book(
+    path: str,
+    max_plies: int,
+    max_depth: int = 8,
+    time_limit: Optional[float] = None,
+    workers: Optional[int] = None,
+) -> int:
+    """
+    Searches every opening position with a deep minimax and writes the book, returns
+    the number of positions
+    """
+    positions = get_opening_positions(max_plies)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(
+            _search_canonical_move,
+            positions,
+            [max_depth] * len(positions),
+            [time_limit] * len(positions),
+            chunksize=16,
+        )
+        moves_by_key = dict(results)
+    write_opening_book(path, moves_by_key)
+    return len(moves_by_key)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a Connect Four opening book")
+    parser.add_argument("output", help="book file to write")
+    parser.add_argument("--plies", type=int, default=4, help="deepest opening ply")
+    parser.add_argument("--depth", type=int, default=8, help="minimax depth")
+    parser.add_argument(
+        "--time-limit", type=float, help="seconds per position, instead of --depth"
+    )
+    parser.add_argument("--workers", type=int, help="worker processes")
+    args = parser.parse_args()
+    count = generate_opening_book(
+        args.output,
+        max_plies=args.plies,
+        max_depth=args.depth,
+        time_limit=args.time_limit,
+        workers=args.workers,
+    )
+    print(f"{count} positions written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import replace
+from enum import StrEnum
+import math
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from connect_four.core import ConnectFour
+from connect_four.core.connect_four import Disc
+
+from .batch_rollouts import BatchRolloutEngine
+from .mcts import MonteCarloTreeSearch
+from .opening_book import OpeningBook
+from .rollout_policies import RolloutPolicy
+from .tablebase import Tablebase
+from .search import SearchBudget, SearchResult, SearchStats
+
+
+class ParallelMode(StrEnum):
+    ROOT = "root"
+    LEAF = "leaf"
+
+
+# tablebases opened by each worker process
+_tablebases: Dict[str, Tablebase] = {}
+
+
+def _search_tree(
+    moves: List[int],
+    width: int,
+    height: int,
+    connect: int,
+    budget: SearchBudget,
+    max_nodes: int,
+    seed: Optional[int],
+    batch_size: int,
+    tablebase_path: Optional[str] = None,
+    rollout_policy: Optional[RolloutPolicy] = None,
+) -> Tuple[List[Tuple[int, float, float]], SearchStats]:
+    if tablebase_path is not None and tablebase_path not in _tablebases:
+        _tablebases[tablebase_path] = Tablebase(tablebase_path)
+    mcts = MonteCarloTreeSearch(
+        budget=budget,
+        max_nodes=max_nodes,
+        seed=seed,
+        batch_size=batch_size,
+        tablebase=_tablebases.get(tablebase_path) if tablebase_path else None,
+        rollout_policy=rollout_policy,
+    )
+    stats = SearchStats()
+    tree = mcts._search(ConnectFour.from_moves(moves, width, height, connect), stats)
+    return tree.get_root_statistics(), stats
+
+
+def _simulate_games(
+    positions: List[Tuple[int, int]], seed: Optional[int]
+) -> List[Optional[Disc]]:
+    return BatchRolloutEngine(seed).simulate(positions)
+
+
+class ParallelMonteCarloTreeSearch(MonteCarloTreeSearch):
+    """
+    ROOT mode runs one independent search per worker process and sums the root
+    statistics of all the trees.
+
+    LEAF mode keeps a single tree in this process: leaves are selected in batches of
+    `batch_size` and their simulations are split between the worker processes.
+
+    LEAF mode always measures time on the wall clock since the simulations do not use
+    this process CPU. With a seed and an iteration budget the result is deterministic.
+    Worker processes are started on the first search and kept until `close`. Search
+    phases are only profiled in LEAF mode.
+    """
+
+    _executor: Optional[Executor]
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        mode: ParallelMode = ParallelMode.ROOT,
+        budget: SearchBudget = SearchBudget(),
+        max_nodes: int = 1 << 20,
+        seed: Optional[int] = None,
+        batch_size: int = 256,
+        opening_book: Optional[OpeningBook] = None,
+        tablebase: Optional[Tablebase] = None,
+        rollout_policy: Optional[RolloutPolicy] = None,
+        profile: bool = False,
+    ):
+        super().__init__(
+            budget=budget,
+            max_nodes=max_nodes,
+            seed=seed,
+            batch_size=batch_size,
+            opening_book=opening_book,
+            tablebase=tablebase,
+            rollout_policy=rollout_policy,
+            profile=profile,
+        )
+        self.workers = workers or os.cpu_count() or 1
+        self.mode = mode
+        self.seed = seed
+        self._executor = None
+        self._batch_count = 0
+        if mode == ParallelMode.LEAF:
+            self._clock = time.perf_counter
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def search(self, connect_four: ConnectFour) -> SearchResult:
+        if self.mode == ParallelMode.LEAF:
+            return super().search(connect_four)
+        known_result = self._search_known_move(connect_four)
+        if known_result is not None:
+            return known_result
+        return self._search_root_parallel(connect_four)
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def _simulate_batch(self, positions: List[Tuple[int, int]]) -> List[Optional[Disc]]:
+        chunk_size = -(-len(positions) // self.workers)
+        futures = [
+            self._get_executor().submit(
+                _simulate_games,
+                positions[chunk_start : chunk_start + chunk_size],
+                self._get_seed(self._batch_count * self.workers + chunk_index),
+            )
+            for chunk_index, chunk_start in enumerate(
+                range(0, len(positions), chunk_size)
+            )
+        ]
+        self._batch_count += 1
+        return [winner for future in futures for winner in future.result()]
+
+    def _get_seed(self, index: int) -> Optional[int]:
+        return None if self.seed is None else self.seed + index
+
+    def _search_root_parallel(self, connect_four: ConnectFour) -> SearchResult:
+        start = time.perf_counter()
+        moves = connect_four.get_moves()
+        budget = self.budget
+        if budget.max_iterations is not None:
+            # the iterations are shared between the trees
+            budget = replace(
+                budget, max_iterations=-(-budget.max_iterations // self.workers)
+            )
+        futures = [
+            self._get_executor().submit(
+                _search_tree,
+                moves,
+                connect_four.width,
+                connect_four.height,
+                connect_four.connect,
+                budget,
+                self.max_nodes,
+                self._get_seed(worker_index),
+                self.batch_size,
+                self.tablebase.path if self.tablebase is not None else None,
+                self.rollout_policy,
+            )
+            for worker_index in range(self.workers)
+        ]
+
+        statistics: Dict[int, Tuple[float, float]] = {}
+        stats = SearchStats()
+        for future in futures:
+            root_statistics, tree_stats = future.result()
+            for move, game_count, win_count in root_statistics:
+                total_game_count, total_win_count = statistics.get(move, (0, 0))
+                statistics[move] = (
+                    total_game_count + game_count,
+                    total_win_count + win_count,
+                )
+            stats.iterations += tree_stats.iterations
+            stats.nodes += tree_stats.nodes
+            stats.depth = max(stats.depth, tree_stats.depth)
+        stats.elapsed = time.perf_counter() - start
+
+        if not statistics:
+            return SearchResult(move=self._get_fallback_move(connect_four), stats=stats)
+        move = max(
+            statistics,
+            key=lambda move: statistics[move][1] / statistics[move][0]
+            if statistics[move][0]
+            else -math.inf,
+        )
+        return SearchResult(move=move, stats=stats)
@@ -0,0 +1,94 @@
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from random import Random
+from typing import List
+
+from connect_four.core import ConnectFour, Disc
+from connect_four.core.connect_four import STANDARD_GEOMETRY, get_winning_cells
+
+
+@lru_cache(maxsize=None)
+def get_center_weights(width: int) -> List[int]:
+    """
+    Weight of each column, from 1 on the edges to the center, symmetric so that
+    mirrored positions play alike, e.g. 1 2 3 4 3 2 1 or 1 2 3 4 4 3 2 1
+    """
+    return [min(col_index, width - 1 - col_index) + 1 for col_index in range(width)]
+
+
+@lru_cache(maxsize=None)
+def _get_weighted_columns(width: int) -> List[int]:
+    """
+    Each column index repeated by its weight, a uniform choice among them is a
+    weighted choice of column, much faster than `Random.choices`
+    """
+    return [
+        col_index
+        for col_index, weight in enumerate(get_center_weights(width))
+        for _ in range(weight)
+    ]
+
+
+class RolloutPolicy(ABC):
+    """
+    Chooses the moves of the MCTS simulations, among the free columns of a position
+    which is not over
+    """
+
+    @abstractmethod
+    def choose_move(self, connect_four: ConnectFour, random: Random) -> int:
+        ...
+
+
+class RandomRolloutPolicy(RolloutPolicy):
+    def choose_move(self, connect_four: ConnectFour, random: Random) -> int:
+        return random.choice(connect_four.get_free_column_indexes())
+
+
+class HeavyRolloutPolicy(RolloutPolicy):
+    """
+    Plays an immediate win, otherwise blocks an immediate loss, otherwise plays at
+    random with central columns more likely (see `get_center_weights`).
+
+    Winning moves are found with bitboard operations: the shifts of the solver on
+    standard boards, the winning lines on the others.
+    """
+
+    def choose_move(self, connect_four: ConnectFour, random: Random) -> int:
+        geometry = connect_four.geometry
+        red_bitboard, yellow_bitboard = connect_four.get_bitboards()
+        mask = red_bitboard | yellow_bitboard
+        if connect_four.get_next_disc() == Disc.RED:
+            bitboard, opponent_bitboard = red_bitboard, yellow_bitboard
+        else:
+            bitboard, opponent_bitboard = yellow_bitboard, red_bitboard
+        get_cells = (
+            get_winning_cells
+            if geometry is STANDARD_GEOMETRY
+            else geometry.get_winning_cells
+        )
+        # lowest empty cell of each column
+        possible_cells = (mask + geometry.bottom_mask) & geometry.board_mask
+
+        cells = possible_cells & get_cells(bitboard, mask)
+        if not cells:
+            cells = possible_cells & get_cells(opponent_bitboard, mask)
+        if cells:
+            return ((cells & -cells).bit_length() - 1) // geometry.column_bits
+
+        # drawn again while the column is full, the position is not over so one is free
+        weighted_col_indexes = _get_weighted_columns(geometry.width)
+        column_bits = geometry.column_bits
+        while True:
+            col_index = random.choice(weighted_col_indexes)
+            if possible_cells >> col_index * column_bits & geometry.column_mask:
+                return col_index
+
+
+ROLLOUT_POLICIES = {"random": RandomRolloutPolicy, "heavy": HeavyRolloutPolicy}
+
+
+def get_rollout_policy(name: str) -> RolloutPolicy:
+    if name not in ROLLOUT_POLICIES:
+        raise ValueError(f"unknown rollout policy {name!r}")
+    return ROLLOUT_POLICIES[name]()
@@ -0,0 +1,101 @@
+from collections import defaultdict
+from dataclasses import dataclass, field
+from enum import StrEnum
+from functools import wraps
+import time
+from typing import Callable, Dict, List, Optional
+
+
+class Clock(StrEnum):
+    WALL = "wall"
+    CPU = "cpu"
+
+
+def get_clock(clock: Clock) -> Callable[[], float]:
+    return time.perf_counter if clock == Clock.WALL else time.process_time
+
+
+@dataclass(frozen=True)
+class SearchBudget:
+    """
+    The search stops as soon as one of the set limits is reached.
+
+    `certainty` stops early once the most visited root move got this share of the
+    root visits, after at least `min_iterations` iterations.
+    """
+
+    time_limit: Optional[float] = 1
+    clock: Clock = Clock.WALL
+    max_iterations: Optional[int] = None
+    max_nodes: Optional[int] = None
+    certainty: Optional[float] = None
+    min_iterations: int = 1000
+
+    def __post_init__(self):
+        if (
+            self.time_limit is None
+            and self.max_iterations is None
+            and self.max_nodes is None
+        ):
+            raise ValueError("a time limit, an iteration or a node budget is required")
+
+
+@dataclass
+class SearchStats:
+    """
+    `depth` is the deepest completed minimax depth, or the deepest MCTS leaf.
+    `cutoffs` counts the minimax beta cutoffs. `phase_times` holds the seconds spent
+    in each search phase, when the search is profiled.
+    """
+
+    iterations: int = 0
+    nodes: int = 0
+    elapsed: float = 0
+    depth: int = 0
+    cutoffs: int = 0
+    phase_times: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def pruning_rate(self) -> float:
+        return self.cutoffs / self.nodes if self.nodes else 0.0
+
+
+@dataclass(frozen=True)
+class SearchResult:
+    """
+    `scores` holds the score of each column, None for the full ones, when the
+    search analyzed the position
+    """
+
+    move: int
+    stats: SearchStats
+    scores: Optional[List[Optional[float]]] = None
+
+
+class PhaseTimer:
+    """
+    Accumulates the time spent in search phases. The AIs wrap their phase methods
+    with `wrap` only when profiling, so that unprofiled searches pay nothing.
+    """
+
+    def __init__(self):
+        self.phase_times: Dict[str, float] = defaultdict(float)
+
+    def wrap(self, phase: str, function: Callable) -> Callable:
+        phase_times = self.phase_times
+
+        @wraps(function)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                phase_times[phase] += time.perf_counter() - start
+
+        return timed
+
+    def reset(self):
+        self.phase_times.clear()
+
+    def get_phase_times(self) -> Dict[str, float]:
+        return dict(self.phase_times)
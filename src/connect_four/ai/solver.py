@@ -0,0 +1,209 @@
+from typing import List, Optional
+
+from connect_four.core import ConnectFour
+from connect_four.core.connect_four import (
+    CENTER_ORDER,
+    COLUMN_BITS,
+    HEIGHT,
+    STANDARD_GEOMETRY,
+    WIDTH,
+    get_winning_cells,
+    mirror_bitboard,
+)
+
+from .opening_book import OpeningBook
+from .transposition_table import Bound, ReplacementPolicy, TranspositionTable
+
+CELL_COUNT = WIDTH * HEIGHT
+
+# prime number of entries, position keys are far from uniform modulo a power of two
+_TRANSPOSITION_TABLE_SIZE = 2_097_143
+
+_BOTTOM_MASK = STANDARD_GEOMETRY.bottom_mask
+_BOARD_MASK = STANDARD_GEOMETRY.board_mask
+_COLUMN_MASKS = [
+    ((1 << HEIGHT) - 1) << col_index * COLUMN_BITS for col_index in range(WIDTH)
+]
+
+
+class Solver:
+    """
+    Exact solver: negamax with alpha-beta pruning over bitboards, driven by null
+    window searches which narrow the score interval like MTD(f).
+
+    Scores follow the usual convention: a positive score means the player to move
+    wins, by 1 when the winning disc is the last one of the board, by one more for
+    each earlier move. A negative score means the player to move loses, 0 is a draw.
+
+    Only moves which don't hand an immediate win to the opponent are searched, the
+    most threatening first, center first on ties. Mirrored positions share their
+    transposition table entry.
+
+    Pure Python visits some tens of thousands of positions per second: middle game
+    positions are solved in seconds but openings are out of reach, their moves should
+    come from an opening book. Only standard boards are solved.
+    """
+
+    def __init__(self, transposition_table: Optional[TranspositionTable] = None):
+        self.transposition_table = (
+            transposition_table
+            if transposition_table is not None
+            else TranspositionTable(
+                max_entries=_TRANSPOSITION_TABLE_SIZE,
+                replacement_policy=ReplacementPolicy.ALWAYS,
+            )
+        )
+        self.node_count = 0
+
+    def solve(self, connect_four: ConnectFour, weak: bool = False) -> int:
+        """
+        Score of the position, only its sign (win, draw or loss) when `weak`
+        """
+        if connect_four.geometry is not STANDARD_GEOMETRY:
+            raise ValueError("only standard boards are solved")
+        move_count = len(connect_four.get_moves())
+        if connect_four.get_winner() is not None:
+            # lost by the last move of the opponent
+            return -((CELL_COUNT + 2 - move_count) // 2)
+        if connect_four.is_game_over():
+            return 0
+
+        red, yellow = connect_four.get_bitboards()
+        position = red if move_count % 2 == 0 else yellow
+        return self._solve(position, red | yellow, move_count, weak)
+
+    def analyze(
+        self, connect_four: ConnectFour, weak: bool = False
+    ) -> List[Optional[int]]:
+        """
+        Score of each column for the player to move, None for the full columns
+        """
+        scores: List[Optional[int]] = [None] * WIDTH
+        if connect_four.is_game_over():
+            return scores
+        for col_index in connect_four.get_free_column_indexes():
+            connect_four.play(col_index)
+            try:
+                scores[col_index] = -self.solve(connect_four, weak)
+            finally:
+                connect_four.undo()
+        return scores
+
+    def _solve(self, position: int, mask: int, move_count: int, weak: bool) -> int:
+        if get_winning_cells(position, mask) & (mask + _BOTTOM_MASK):
+            return (CELL_COUNT + 1 - move_count) // 2
+
+        min_score = -((CELL_COUNT - move_count) // 2)
+        max_score = (CELL_COUNT + 1 - move_count) // 2
+        if weak:
+            min_score, max_score = -1, 1
+        while min_score < max_score:
+            # null window searches around the middle, or 0 first to settle the sign
+            median = min_score + (max_score - min_score) // 2
+            if median <= 0 and int(min_score / 2) < median:
+                median = int(min_score / 2)
+            elif median >= 0 and int(max_score / 2) > median:
+                median = int(max_score / 2)
+            score = self._negamax(position, mask, move_count, median, median + 1)
+            if score <= median:
+                max_score = score
+            else:
+                min_score = score
+        return min_score
+
+    def _negamax(
+        self, position: int, mask: int, move_count: int, alpha: int, beta: int
+    ) -> int:
+        """
+        The player to move can't win right away, this was checked by the caller
+        """
+        self.node_count += 1
+        opponent_position = position ^ mask
+        possible_moves = (mask + _BOTTOM_MASK) & _BOARD_MASK
+        opponent_winning_cells = get_winning_cells(opponent_position, mask)
+        forced_moves = possible_moves & opponent_winning_cells
+        if forced_moves:
+            if forced_moves & (forced_moves - 1):
+                # two threats can't both be blocked
+                return -((CELL_COUNT - move_count) // 2)
+            possible_moves = forced_moves
+        # playing below an opponent winning cell lets the opponent play there
+        non_losing_moves = possible_moves & ~(opponent_winning_cells >> 1)
+        if not non_losing_moves:
+            return -((CELL_COUNT - move_count) // 2)
+
+        if move_count >= CELL_COUNT - 2:
+            return 0
+
+        # neither player can win before their next move
+        min_score = -((CELL_COUNT - 2 - move_count) // 2)
+        if alpha < min_score:
+            alpha = min_score
+            if alpha >= beta:
+                return alpha
+        max_score = (CELL_COUNT - 1 - move_count) // 2
+        if beta > max_score:
+            beta = max_score
+            if alpha >= beta:
+                return beta
+
+        key = position + mask
+        mirrored_key = mirror_bitboard(key)
+        if mirrored_key < key:
+            key = mirrored_key
+        entry = self.transposition_table.lookup(key)
+        if entry is not None:
+            if entry.bound == Bound.LOWER:
+                if alpha < entry.score:
+                    alpha = entry.score
+                    if alpha >= beta:
+                        return alpha
+            elif beta > entry.score:
+                beta = entry.score
+                if alpha >= beta:
+                    return beta
+
+        scored_moves = []
+        for order, col_index in enumerate(CENTER_ORDER):
+            move = non_losing_moves & _COLUMN_MASKS[col_index]
+            if move:
+                threat_count = get_winning_cells(position | move, mask).bit_count()
+                scored_moves.append((-threat_count, order, move))
+        scored_moves.sort()
+
+        for _, _, move in scored_moves:
+            # the opponent moves next, with the current position as its opponent
+            score = -self._negamax(
+                opponent_position, mask | move, move_count + 1, -beta, -alpha
+            )
+            if score >= beta:
+                self.transposition_table.store(key, 0, score, Bound.LOWER)
+                return score
+            if score > alpha:
+                alpha = score
+        self.transposition_table.store(key, 0, alpha, Bound.UPPER)
+        return alpha
+
+
+class SolverAI:
+    """
+    Plays the move with the best exact score, the most central one on ties
+    """
+
+    def __init__(
+        self, solver: Optional[Solver] = None, opening_book: Optional[OpeningBook] = None
+    ):
+        self.solver = solver if solver is not None else Solver()
+        self.opening_book = opening_book
+
+    def next_move(self, connect_four: ConnectFour) -> int:
+        if self.opening_book is not None:
+            book_move = self.opening_book.get_move(connect_four)
+            if book_move is not None:
+                return book_move
+
+        scores = self.solver.analyze(connect_four)
+        return max(
+            (col_index for col_index in CENTER_ORDER if scores[col_index] is not None),
+            key=lambda col_index: scores[col_index],
+        )
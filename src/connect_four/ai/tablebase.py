@@ -0,0 +1,164 @@
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+import mmap
+import os
+import struct
+from typing import Dict, List, Optional, Tuple
+import zlib
+
+from connect_four.core import ConnectFour
+from connect_four.core.connect_four import (
+    CENTER_ORDER,
+    HEIGHT,
+    STANDARD_GEOMETRY,
+    WIDTH,
+)
+
+_HEADER = struct.Struct("<4sBBBxI")
+_INDEX_ENTRY = struct.Struct("<QQI")
+_MAGIC = b"C4TB"
+
+
+class InvalidTablebaseException(Exception):
+    pass
+
+
+class Tablebase:
+    """
+    Exact scores of end game positions, read from a file written by `write_tablebase`.
+
+    Scores use the Solver convention, positive when the player to move wins. Positions
+    are stored by canonical key (see ConnectFour.get_canonical_key) and only the
+    positions which are not over are stored.
+
+    The records are sorted by key and split into zlib compressed blocks. The index of
+    the first key of each block is loaded upfront, the blocks are read from the
+    memory-mapped file on demand and the most recent ones are kept decompressed.
+    """
+
+    def __init__(self, path: str, cached_blocks: int = 64):
+        self.path = path
+        with open(path, "rb") as tablebase_file:
+            if os.fstat(tablebase_file.fileno()).st_size < _HEADER.size:
+                raise InvalidTablebaseException()
+            self._buffer = mmap.mmap(tablebase_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, width, height, max_empty_cells, block_count = _HEADER.unpack_from(
+            self._buffer
+        )
+        if magic != _MAGIC or (width, height) != (WIDTH, HEIGHT):
+            raise InvalidTablebaseException()
+        self.max_empty_cells = max_empty_cells
+
+        index = [
+            _INDEX_ENTRY.unpack_from(
+                self._buffer, _HEADER.size + block_index * _INDEX_ENTRY.size
+            )
+            for block_index in range(block_count)
+        ]
+        self._first_keys = [first_key for first_key, _, _ in index]
+        self._block_ranges = [(offset, size) for _, offset, size in index]
+        self._read_block = lru_cache(maxsize=cached_blocks)(self._read_block)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self._buffer.close()
+
+    def get_score(self, connect_four: ConnectFour) -> Optional[int]:
+        """
+        Score for the player to move, None when the position is not in the tablebase
+        or the board is not a standard one
+        """
+        if connect_four.geometry is not STANDARD_GEOMETRY:
+            return None
+        empty_cell_count = WIDTH * HEIGHT - len(connect_four.get_moves())
+        if empty_cell_count > self.max_empty_cells or connect_four.is_game_over():
+            return None
+        key, _ = connect_four.get_canonical_key()
+        return self.lookup(key)
+
+    def get_move(self, connect_four: ConnectFour) -> Optional[int]:
+        """
+        Move with the best score, the most central one on ties, None when the position
+        is not in the tablebase
+        """
+        if self.get_score(connect_four) is None:
+            return None
+        free_col_indexes = connect_four.get_free_column_indexes()
+        best_move = None
+        best_score = 0
+        for col_index in CENTER_ORDER:
+            if col_index not in free_col_indexes:
+                continue
+            connect_four.play(col_index)
+            try:
+                if connect_four.get_winner() is not None:
+                    return col_index
+                if connect_four.is_game_over():
+                    score = 0
+                else:
+                    child_score = self.get_score(connect_four)
+                    if child_score is None:
+                        # the tablebase was built from other positions
+                        return None
+                    score = -child_score
+            finally:
+                connect_four.undo()
+            if best_move is None or score > best_score:
+                best_move = col_index
+                best_score = score
+        return best_move
+
+    def lookup(self, key: int) -> Optional[int]:
+        block_index = bisect_right(self._first_keys, key) - 1
+        if block_index < 0:
+            return None
+        keys, scores = self._read_block(block_index)
+        record_index = bisect_left(keys, key)
+        if record_index == len(keys) or keys[record_index] != key:
+            return None
+        return scores[record_index]
+
+    def _read_block(self, block_index: int) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+        offset, size = self._block_ranges[block_index]
+        data = zlib.decompress(self._buffer[offset : offset + size])
+        record_count = len(data) // 9
+        return (
+            struct.unpack_from(f"<{record_count}Q", data),
+            struct.unpack_from(f"<{record_count}b", data, record_count * 8),
+        )
+
+
+def write_tablebase(
+    path: str,
+    scores_by_key: Dict[int, int],
+    max_empty_cells: int,
+    block_size: int = 4096,
+):
+    """
+    `scores_by_key` maps canonical keys to the score of the canonical position. Each
+    block holds `block_size` keys (8 bytes each) followed by their scores (1 byte).
+    """
+    keys = sorted(scores_by_key)
+    blocks: List[Tuple[int, bytes]] = []
+    for block_start in range(0, len(keys), block_size):
+        block_keys = keys[block_start : block_start + block_size]
+        data = struct.pack(f"<{len(block_keys)}Q", *block_keys) + struct.pack(
+            f"<{len(block_keys)}b", *(scores_by_key[key] for key in block_keys)
+        )
+        blocks.append((block_keys[0], zlib.compress(data, 9)))
+
+    offset = _HEADER.size + len(blocks) * _INDEX_ENTRY.size
+    with open(path, "wb") as tablebase_file:
+        tablebase_file.write(
+            _HEADER.pack(_MAGIC, WIDTH, HEIGHT, max_empty_cells, len(blocks))
+        )
+        for first_key, data in blocks:
+            tablebase_file.write(_INDEX_ENTRY.pack(first_key, offset, len(data)))
+            offset += len(data)
+        for _, data in blocks:
+            tablebase_file.write(data)
@@ -0,0 +1,116 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from random import Random
+from typing import Dict, List, Optional
+
+from connect_four.core import ConnectFour
+from connect_four.core.connect_four import HEIGHT, WIDTH
+
+from .tablebase import write_tablebase
+
+CELL_COUNT = WIDTH * HEIGHT
+
+
+def _solve_all(connect_four: ConnectFour, scores_by_key: Dict[int, int]) -> int:
+    """
+    Exact score of the position, which is not over, recording the score of every
+    position below it
+    """
+    key, _ = connect_four.get_canonical_key()
+    score = scores_by_key.get(key)
+    if score is not None:
+        return score
+
+    # a win with the next disc
+    win_score = (CELL_COUNT + 1 - len(connect_four.get_moves())) // 2
+    score = None
+    for col_index in connect_four.get_free_column_indexes():
+        connect_four.play(col_index)
+        try:
+            if connect_four.get_winner() is not None:
+                move_score = win_score
+            elif connect_four.is_game_over():
+                move_score = 0
+            else:
+                move_score = -_solve_all(connect_four, scores_by_key)
+        finally:
+            connect_four.undo()
+        if score is None or move_score > score:
+            score = move_score
+    scores_by_key[key] = score
+    return score
+
+
+def get_seed_positions(
+    max_empty_cells: int, game_count: int, seed: Optional[int] = None
+) -> List[List[int]]:
+    """
+    Moves of random games up to the first position with `max_empty_cells` empty
+    cells, for the games which last this long
+    """
+    random = Random(seed)
+    positions = []
+    for _ in range(game_count):
+        connect_four = ConnectFour()
+        while (
+            CELL_COUNT - len(connect_four.get_moves()) > max_empty_cells
+            and not connect_four.is_game_over()
+        ):
+            connect_four.play(random.choice(connect_four.get_free_column_indexes()))
+        if not connect_four.is_game_over():
+            positions.append(connect_four.get_moves())
+    return positions
+
+
+def _solve_seed_positions(positions: List[List[int]]) -> Dict[int, int]:
+    scores_by_key: Dict[int, int] = {}
+    for moves in positions:
+        _solve_all(ConnectFour.from_moves(moves), scores_by_key)
+    return scores_by_key
+
+
+def generate_tablebase(
+    path: str,
+    max_empty_cells: int,
+    seed_positions: List[List[int]],
+    workers: Optional[int] = None,
+) -> int:
+    """
+    Solves every position reachable from the seed positions, which must have at most
+    `max_empty_cells` empty cells, and writes the tablebase. Returns the number of
+    positions.
+    """
+    chunk_size = 64
+    chunks = [
+        seed_positions[chunk_start : chunk_start + chunk_size]
+        for chunk_start in range(0, len(seed_positions), chunk_size)
+    ]
+    scores_by_key: Dict[int, int] = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk_scores in executor.map(_solve_seed_positions, chunks):
+            scores_by_key.update(chunk_scores)
+    write_tablebase(path, scores_by_key, max_empty_cells)
+    return len(scores_by_key)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a Connect Four tablebase")
+    parser.add_argument("output", help="tablebase file to write")
+    parser.add_argument(
+        "--empty-cells", type=int, default=8, help="empty cells of the seed positions"
+    )
+    parser.add_argument(
+        "--games", type=int, default=10_000, help="random games giving the seeds"
+    )
+    parser.add_argument("--seed", type=int, help="random seed")
+    parser.add_argument("--workers", type=int, help="worker processes")
+    args = parser.parse_args()
+    seed_positions = get_seed_positions(args.empty_cells, args.games, args.seed)
+    count = generate_tablebase(
+        args.output, args.empty_cells, seed_positions, workers=args.workers
+    )
+    print(f"{count} positions written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+from enum import IntEnum, StrEnum
+from typing import List, NamedTuple, Optional
+
+
+class Bound(IntEnum):
+    EXACT = 0
+    LOWER = 1
+    UPPER = 2
+
+
+class ReplacementPolicy(StrEnum):
+    ALWAYS = "always"
+    DEPTH_PREFERRED = "depth-preferred"
+
+
+class TranspositionEntry(NamedTuple):
+    key: int
+    depth: int
+    score: float
+    bound: Bound
+    best_move: Optional[int]
+
+
+class TranspositionTableStats(NamedTuple):
+    size: int
+    used: int
+    hits: int
+    misses: int
+    stores: int
+    replacements: int
+    rejections: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class TranspositionTable:
+    """
+    Fixed size table indexed by position hash, one entry per slot.
+
+    When two positions share a slot, the replacement policy decides which one is kept:
+    ALWAYS keeps the newest entry, DEPTH_PREFERRED keeps the deepest one.
+    """
+
+    _entries: List[Optional[TranspositionEntry]]
+
+    def __init__(
+        self,
+        max_entries: int = 1 << 18,
+        replacement_policy: ReplacementPolicy = ReplacementPolicy.DEPTH_PREFERRED,
+    ):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.max_entries = max_entries
+        self.replacement_policy = replacement_policy
+        self.clear()
+
+    def clear(self):
+        self._entries = [None] * self.max_entries
+        self._used = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.replacements = 0
+        self.rejections = 0
+
+    def lookup(self, key: int) -> Optional[TranspositionEntry]:
+        entry = self._entries[key % self.max_entries]
+        if entry is None or entry.key != key:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def store(
+        self,
+        key: int,
+        depth: int,
+        score: float,
+        bound: Bound,
+        best_move: Optional[int] = None,
+    ):
+        index = key % self.max_entries
+        current = self._entries[index]
+        if current is None:
+            self._used += 1
+        elif current.key != key:
+            if (
+                self.replacement_policy == ReplacementPolicy.DEPTH_PREFERRED
+                and current.depth > depth
+            ):
+                self.rejections += 1
+                return
+            self.replacements += 1
+        self._entries[index] = TranspositionEntry(key, depth, score, bound, best_move)
+        self.stores += 1
+
+    def get_stats(self) -> TranspositionTableStats:
+        return TranspositionTableStats(
+            size=self.max_entries,
+            used=self._used,
+            hits=self.hits,
+            misses=self.misses,
+            stores=self.stores,
+            replacements=self.replacements,
+            rejections=self.rejections,
+        )
@@ -1,2 +1 @@
 from .app import app
-from .schemas import ColumnResponse
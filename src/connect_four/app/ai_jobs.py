@@ -0,0 +1,41 @@
+import asyncio
+from enum import StrEnum
+from typing import Coroutine, Optional
+import uuid
+
+
+class AIJobStatus(StrEnum):
+    PENDING = "pending"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class AIJob:
+    """
+    AI reply searched in the background after a human move
+    """
+
+    id: str
+    task: "asyncio.Task[Optional[int]]"
+
+    def __init__(self, coroutine: Coroutine):
+        self.id = uuid.uuid4().hex
+        self.task = asyncio.create_task(coroutine)
+
+    def get_status(self) -> AIJobStatus:
+        if not self.task.done():
+            return AIJobStatus.PENDING
+        if self.task.cancelled() or self.task.exception() is not None:
+            return AIJobStatus.FAILED
+        return AIJobStatus.DONE
+
+    def get_move(self) -> Optional[int]:
+        if self.get_status() != AIJobStatus.DONE:
+            return None
+        return self.task.result()
+
+    def cancel(self):
+        self.task.cancel()
+
+    async def wait(self):
+        await asyncio.wait({self.task})
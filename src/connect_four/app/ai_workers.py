@@ -0,0 +1,376 @@
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import astuple, replace
+from enum import StrEnum
+from functools import lru_cache
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from connect_four.ai import (
+    MinimaxAI,
+    MonteCarloTreeSearch,
+    OpeningBook,
+    SearchBudget,
+    SearchResult,
+    Tablebase,
+)
+from connect_four.ai.rollout_policies import ROLLOUT_POLICIES, get_rollout_policy
+from connect_four.core import ConnectFour
+
+from .metrics import AIMetrics, Counter, Gauge, Metric
+from .move_cache import MoveCache
+
+# engines kept by each worker process, so that a game keeps its search tree when it
+# lands on the same worker again
+_ENGINES_PER_WORKER = 64
+_engines: "OrderedDict[str, MonteCarloTreeSearch]" = OrderedDict()
+
+# share of the search budget given to the ponders, which cannot be stopped once running
+_PONDER_BUDGET_SHARE = 0.5
+
+
+# opened once by each worker process, the memory-mapped pages are shared between them
+@lru_cache(maxsize=None)
+def _open_opening_book(path: str) -> OpeningBook:
+    return OpeningBook(path)
+
+
+@lru_cache(maxsize=None)
+def _open_tablebase(path: str) -> Tablebase:
+    return Tablebase(path)
+
+
+def compute_move(
+    game_id: Optional[str],
+    moves: List[int],
+    budget: SearchBudget,
+    opening_book_path: Optional[str] = None,
+    tablebase_path: Optional[str] = None,
+    profile: bool = False,
+    rollout_policy: str = "random",
+) -> SearchResult:
+    opening_book = _open_opening_book(opening_book_path) if opening_book_path else None
+    tablebase = _open_tablebase(tablebase_path) if tablebase_path else None
+    if game_id is None:
+        engine = MonteCarloTreeSearch(
+            budget=budget,
+            opening_book=opening_book,
+            tablebase=tablebase,
+            rollout_policy=get_rollout_policy(rollout_policy),
+            profile=profile,
+        )
+        return engine.search(ConnectFour.from_moves(moves))
+
+    engine = _engines.pop(game_id, None)
+    if (
+        engine is None
+        or engine.budget != budget
+        or engine.opening_book is not opening_book
+        or engine.tablebase is not tablebase
+        or type(engine.rollout_policy) is not ROLLOUT_POLICIES[rollout_policy]
+        or engine.profile != profile
+    ):
+        engine = MonteCarloTreeSearch(
+            budget=budget,
+            opening_book=opening_book,
+            tablebase=tablebase,
+            rollout_policy=get_rollout_policy(rollout_policy),
+            profile=profile,
+        )
+    _engines[game_id] = engine
+    while len(_engines) > _ENGINES_PER_WORKER:
+        _engines.popitem(last=False)
+    return engine.search(ConnectFour.from_moves(moves))
+
+
+def compute_analysis(
+    moves: List[int], max_depth: int, tablebase_path: Optional[str] = None
+) -> SearchResult:
+    tablebase = _open_tablebase(tablebase_path) if tablebase_path else None
+    return MinimaxAI(max_depth=max_depth, tablebase=tablebase).analyze(
+        ConnectFour.from_moves(moves)
+    )
+
+
+class OverloadPolicy(StrEnum):
+    REJECT = "reject"
+    DEGRADE = "degrade"
+
+
+class AIOverloadedException(Exception):
+    pass
+
+
+class AIWorkerPool:
+    """
+    Runs the AI searches in worker processes so that they don't block the event loop.
+
+    At most `max_pending` searches are queued or running. When the pool is saturated,
+    or a search takes longer than `timeout` seconds, the REJECT policy raises
+    AIOverloadedException while the DEGRADE policy answers with a shallow minimax
+    search computed right away.
+
+    Between two moves of a game, `ponder` searches the replies to the most likely
+    human moves, the reply is then taken from there when the human plays one of them.
+    Ponders only take idle workers while keeping one free for the live searches, they
+    don't count in `max_pending` and get a share of the budget, as a running ponder
+    cannot be cancelled and holds its worker until its budget is spent.
+
+    The simulations of the searches play the moves of the `rollout_policy`, a name of
+    ROLLOUT_POLICIES.
+
+    Searched moves are kept in the `move_cache`, keyed by the budget and the rollout
+    policy as difficulty, and replayed for the positions reached again by any game.
+    Fallback and pondered moves, searched with less than the budget, are not cached.
+
+    Move latencies and search statistics are recorded in `metrics`, the latencies by
+    engine answering the move: the search engine, "ponder", "cache" or "fallback". With
+    `profile`, the searches also report the time spent in each of their phases.
+    """
+
+    engine = "mcts"
+
+    _executor: Optional[Executor]
+    _ponders: "OrderedDict[str, Dict[Tuple[int, ...], Future]]"
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_pending: int = 32,
+        timeout: float = 5,
+        overload_policy: OverloadPolicy = OverloadPolicy.DEGRADE,
+        budget: SearchBudget = SearchBudget(),
+        executor: Optional[Executor] = None,
+        opening_book_path: Optional[str] = None,
+        tablebase_path: Optional[str] = None,
+        move_cache: Optional[MoveCache] = None,
+        profile: bool = False,
+        rollout_policy: str = "random",
+    ):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.overload_policy = overload_policy
+        self.budget = budget
+        self.opening_book_path = opening_book_path
+        self.tablebase_path = tablebase_path
+        self.move_cache = move_cache
+        self.profile = profile
+        if rollout_policy not in ROLLOUT_POLICIES:
+            raise ValueError(f"unknown rollout policy {rollout_policy!r}")
+        self.rollout_policy = rollout_policy
+        self.metrics = AIMetrics()
+        self.pending_count = 0
+        self.ponder_count = 0
+        self._pending_lock = threading.Lock()
+        self._executor = executor
+        self._ponders = OrderedDict()
+        self._degraded_ai = MinimaxAI(
+            max_depth=1,
+            opening_book=_open_opening_book(opening_book_path)
+            if opening_book_path
+            else None,
+            tablebase=_open_tablebase(tablebase_path) if tablebase_path else None,
+        )
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def get_difficulty(self) -> str:
+        return ":".join(
+            str(value) for value in (*astuple(self.budget), self.rollout_policy)
+        )
+
+    async def next_move(self, game_id: str, connect_four: ConnectFour) -> int:
+        start = time.perf_counter()
+        moves = connect_four.get_moves()
+        future = self._discard_ponders(game_id, keep=tuple(moves))
+        if self.move_cache is not None:
+            move = self.move_cache.get(connect_four, self.engine, self.get_difficulty())
+            if move is not None:
+                if future is not None:
+                    future.cancel()
+                self.metrics.observe_move("cache", time.perf_counter() - start)
+                return move
+        # pondered replies are searched with a share of the budget
+        engine = self.engine if future is None else "ponder"
+        if future is None:
+            if self.is_saturated():
+                return self._fallback(connect_four, start)
+            future = self._submit(game_id, moves)
+
+        try:
+            result: SearchResult = await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(future)), self.timeout
+            )
+        except asyncio.TimeoutError:
+            return self._fallback(connect_four, start)
+        self.metrics.observe_move(engine, time.perf_counter() - start)
+        self.metrics.observe_search(engine, result.stats)
+        if self.move_cache is not None and engine == self.engine:
+            self.move_cache.put(
+                connect_four, self.engine, self.get_difficulty(), result.move
+            )
+        return result.move
+
+    def is_saturated(self) -> bool:
+        return self.pending_count >= self.max_pending
+
+    def is_rejecting(self) -> bool:
+        """
+        Whether a new search would be rejected, checked before playing the human move
+        that it answers
+        """
+        return self.overload_policy == OverloadPolicy.REJECT and self.is_saturated()
+
+    def get_metrics(self) -> List[Metric]:
+        pending_searches = Gauge(
+            "connect_four_ai_pending_searches", "Searches queued or running"
+        )
+        pending_searches.set(self.pending_count)
+        metrics = [*self.metrics.get_metrics(), pending_searches]
+        if self.move_cache is not None:
+            move_cache_stats = self.move_cache.get_stats()
+            move_cache_size = Gauge(
+                "connect_four_move_cache_size", "Moves in the in-memory move cache"
+            )
+            move_cache_size.set(move_cache_stats.size)
+            move_cache_lookups = Counter(
+                "connect_four_move_cache_lookups_total",
+                "Move cache lookups, by result",
+                ["result"],
+            )
+            move_cache_lookups.inc(move_cache_stats.hits, result="hit")
+            move_cache_lookups.inc(move_cache_stats.shared_hits, result="shared_hit")
+            move_cache_lookups.inc(move_cache_stats.misses, result="miss")
+            metrics += [move_cache_size, move_cache_lookups]
+        return metrics
+
+    async def analyze(self, moves: List[int], max_depth: int) -> SearchResult:
+        """
+        Minimax analysis of the position, see MinimaxAI.analyze. Analyses wait for
+        their worker without timeout, but they count as pending searches so that the
+        games are answered by the overload policy while a batch runs.
+        """
+        future = self._get_executor().submit(
+            compute_analysis, moves, max_depth, self.tablebase_path
+        )
+        self._add_pending(future)
+        # cancelling the caller cancels the analysis if it has not started yet
+        result: SearchResult = await asyncio.wrap_future(future)
+        self.metrics.observe_search("minimax", result.stats)
+        return result
+
+    def ponder(self, game_id: str, connect_four: ConnectFour):
+        self._discard_ponders(game_id)
+        futures: Dict[Tuple[int, ...], Future] = {}
+        free_col_indexes = connect_four.get_free_column_indexes()
+        center_order = connect_four.geometry.center_order
+        for col_index in sorted(free_col_indexes, key=center_order.index):
+            if self.pending_count + self.ponder_count >= self.workers - 1:
+                break
+            connect_four.play(col_index)
+            try:
+                if not connect_four.is_game_over():
+                    moves = connect_four.get_moves()
+                    futures[tuple(moves)] = self._submit_ponder(moves)
+            finally:
+                connect_four.undo()
+        if futures:
+            self._ponders[game_id] = futures
+            while len(self._ponders) > self.max_pending:
+                _, stale_futures = self._ponders.popitem(last=False)
+                self._cancel(stale_futures.values())
+
+    def _discard_ponders(
+        self, game_id: str, keep: Optional[Tuple[int, ...]] = None
+    ) -> Optional[Future]:
+        futures = self._ponders.pop(game_id, {})
+        kept_future = futures.pop(keep, None) if keep is not None else None
+        self._cancel(futures.values())
+        return kept_future
+
+    def _cancel(self, futures):
+        for future in futures:
+            future.cancel()
+
+    def _submit(self, game_id: Optional[str], moves: List[int]) -> Future:
+        future = self._get_executor().submit(
+            compute_move,
+            game_id,
+            moves,
+            self.budget,
+            self.opening_book_path,
+            self.tablebase_path,
+            self.profile,
+            self.rollout_policy,
+        )
+        self._add_pending(future)
+        return future
+
+    def _submit_ponder(self, moves: List[int]) -> Future:
+        future = self._get_executor().submit(
+            compute_move,
+            None,
+            moves,
+            self.get_ponder_budget(),
+            self.opening_book_path,
+            self.tablebase_path,
+            self.profile,
+            self.rollout_policy,
+        )
+        with self._pending_lock:
+            self.ponder_count += 1
+        future.add_done_callback(self._on_ponder_done)
+        return future
+
+    def get_ponder_budget(self) -> SearchBudget:
+        """
+        Share of the budget given to the ponders, on each of its set limits
+        """
+        budget = self.budget
+        time_limit, max_iterations, max_nodes = (
+            limit if limit is None else limit * _PONDER_BUDGET_SHARE
+            for limit in (budget.time_limit, budget.max_iterations, budget.max_nodes)
+        )
+        return replace(
+            budget,
+            time_limit=time_limit,
+            max_iterations=max_iterations
+            if max_iterations is None
+            else max(1, int(max_iterations)),
+            max_nodes=max_nodes if max_nodes is None else max(1, int(max_nodes)),
+        )
+
+    def _add_pending(self, future: Future):
+        # a timed out search keeps its worker busy, so it stays pending until it ends
+        with self._pending_lock:
+            self.pending_count += 1
+        future.add_done_callback(self._on_done)
+
+    def _on_done(self, future: Future):
+        # called from the executor thread
+        with self._pending_lock:
+            self.pending_count -= 1
+
+    def _on_ponder_done(self, future: Future):
+        # called from the executor thread, or right away by a cancel
+        with self._pending_lock:
+            self.ponder_count -= 1
+
+    def _fallback(self, connect_four: ConnectFour, start: float) -> int:
+        if self.overload_policy == OverloadPolicy.REJECT:
+            raise AIOverloadedException()
+        move = self._degraded_ai.next_move(connect_four)
+        self.metrics.observe_move("fallback", time.perf_counter() - start)
+        return move
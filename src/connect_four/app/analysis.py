@@ -0,0 +1,111 @@
+import asyncio
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from connect_four.ai import SearchResult
+from connect_four.core import (
+    WIDTH,
+    AlreadyFilledColumnException,
+    ConnectFour,
+    GameOverException,
+    InvalidColumnException,
+)
+
+from .ai_workers import AIWorkerPool
+from .schemas import AnalysisResponse
+
+
+def parse_position(position: str) -> ConnectFour:
+    """
+    Position from its move string, ValueError when it is not a valid game
+    """
+    try:
+        return ConnectFour.from_moves(int(move) for move in position)
+    except ValueError:
+        raise ValueError("moves must be column indexes")
+    except (InvalidColumnException, AlreadyFilledColumnException, GameOverException):
+        raise ValueError("the moves are not a valid game")
+
+
+async def analyze_positions(
+    ai_workers: AIWorkerPool,
+    positions: List[str],
+    depth: int,
+    concurrency: Optional[int] = None,
+) -> AsyncIterator[AnalysisResponse]:
+    """
+    Analyses of the positions in the order they complete. Identical positions,
+    mirrored ones included, are analyzed once. At most `concurrency` analyses, the
+    number of workers by default, run at the same time.
+    """
+    # canonical key -> indexes of the positions and whether each is mirrored
+    requests: Dict[int, List[Tuple[int, bool]]] = {}
+    canonical_moves: Dict[int, List[int]] = {}
+    for index, position in enumerate(positions):
+        try:
+            connect_four = parse_position(position)
+        except ValueError as exception:
+            yield AnalysisResponse(index=index, position=position, error=str(exception))
+            continue
+        if connect_four.is_game_over():
+            yield AnalysisResponse(
+                index=index, position=position, error="the game is over"
+            )
+            continue
+        key, is_mirrored = connect_four.get_canonical_key()
+        if key not in requests:
+            requests[key] = []
+            moves = connect_four.get_moves()
+            canonical_moves[key] = (
+                [WIDTH - 1 - move for move in moves] if is_mirrored else moves
+            )
+        requests[key].append((index, is_mirrored))
+
+    concurrency = concurrency or ai_workers.workers
+    keys = iter(requests)
+    running: Set["asyncio.Task[Tuple[int, SearchResult]]"] = set()
+
+    async def analyze(key: int) -> Tuple[int, SearchResult]:
+        return key, await ai_workers.analyze(canonical_moves[key], depth)
+
+    try:
+        while True:
+            for key in keys:
+                running.add(asyncio.create_task(analyze(key)))
+                if len(running) >= concurrency:
+                    break
+            if not running:
+                break
+            done, running = await asyncio.wait(
+                running, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                key, result = task.result()
+                for index, is_mirrored in requests[key]:
+                    yield _build_analysis_response(
+                        index, positions[index], result, is_mirrored
+                    )
+    finally:
+        for task in running:
+            task.cancel()
+
+
+def _build_analysis_response(
+    index: int, position: str, result: SearchResult, is_mirrored: bool
+) -> AnalysisResponse:
+    scores = result.scores
+    best_move = result.move
+    if is_mirrored and scores is not None:
+        scores = scores[::-1]
+        best_move = WIDTH - 1 - best_move
+    return AnalysisResponse(
+        index=index,
+        position=position,
+        scores=scores,
+        best_move=best_move,
+        stats={
+            "nodes": result.stats.nodes,
+            "depth": result.stats.depth,
+            "cutoffs": result.stats.cutoffs,
+            "elapsed": result.stats.elapsed,
+        },
+    )
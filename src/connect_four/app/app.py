@@ -1,15 +1,30 @@
 import os
+from typing import Optional
 
-from fastapi import Depends, FastAPI, Request
-from fastapi.responses import HTMLResponse
+from fastapi import Depends, FastAPI, HTTPException, Request, Response
+from fastapi.responses import HTMLResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
-from connect_four.ai import MinimaxAI
-from connect_four.ai.mcts import MonteCarloTreeSearch
+from connect_four.core import (
+    AlreadyFilledColumnException,
+    GameOverException,
+    InvalidColumnException,
+)
 
-from .connect_four_service import ConnectFourService
-from .dependencies import get_connect_four_service
+from .ai_jobs import AIJob
+from .analysis import analyze_positions
+from .ai_workers import AIWorkerPool
+from .connect_four_service import ConnectFourService, decode_moves, encode_moves
+from .dependencies import (
+    GAME_ID_COOKIE,
+    get_ai_workers,
+    get_connect_four_service,
+    get_game_store,
+)
+from .game_store import GameStore
+from .metrics import render_metrics
+from .schemas import AIJobResponse, AnalyzeRequest
 
 app = FastAPI(title="Connect Four App")
 templates = Jinja2Templates(
@@ -23,14 +38,59 @@ app.mount(
 )
 
 
+@app.on_event("shutdown")
+def shutdown_ai_workers():
+    get_ai_workers().shutdown()
+
+
 @app.get("/", response_class=HTMLResponse)
 async def get_index(
     request: Request,
     connect_four_service: ConnectFourService = Depends(get_connect_four_service),
 ):
+    return _render("index.html", request, connect_four_service)
+
+
+@app.get("/game", response_class=HTMLResponse)
+async def get_game(
+    request: Request,
+    connect_four_service: ConnectFourService = Depends(get_connect_four_service),
+):
+    etag = connect_four_service.get_etag()
+    if _is_not_modified(request, etag):
+        return _build_not_modified_response(etag)
+    response = _render("partials/game.html", request, connect_four_service)
+    _set_etag(response, etag)
+    return response
+
+
+@app.get("/game/delta", response_class=HTMLResponse)
+async def get_game_delta(
+    request: Request,
+    moves: str = "",
+    connect_four_service: ConnectFourService = Depends(get_connect_four_service),
+):
+    """
+    Out of band swaps of the cells which changed since the client grid, given by its
+    moves, and of the game status. No content while the AI thinks on the same moves.
+    """
+    try:
+        changed_cells = connect_four_service.get_changed_cells(decode_moves(moves))
+    except (
+        ValueError,
+        AlreadyFilledColumnException,
+        GameOverException,
+        InvalidColumnException,
+    ):
+        raise HTTPException(status_code=400, detail="Invalid moves")
+    if not changed_cells and connect_four_service.is_ai_thinking():
+        return Response(status_code=204)
     return templates.TemplateResponse(
-        "index.html",
-        _build_page_context(request, connect_four_service),
+        "partials/delta.html",
+        {
+            **_build_page_context(request, connect_four_service),
+            "changed_cells": changed_cells,
+        },
     )
 
 
@@ -39,33 +99,252 @@ async def play(
     col_index: int,
     request: Request,
     connect_four_service: ConnectFourService = Depends(get_connect_four_service),
+    game_store: GameStore = Depends(get_game_store),
+    ai_workers: AIWorkerPool = Depends(get_ai_workers),
 ):
-    connect_four_service.play(col_index)
-    connect_four_service.play(
-        MonteCarloTreeSearch().next_move(connect_four_service.connect_four)
-    )
-    return templates.TemplateResponse(
-        "partials/game.html",
-        _build_page_context(request, connect_four_service),
+    """
+    Plays the human move right away, the AI reply is searched in the background by
+    the job whose id is sent in the X-AI-Job-Id header
+    """
+    ai_job = await _play_human(col_index, connect_four_service, game_store, ai_workers)
+    response = _render("partials/game.html", request, connect_four_service)
+    response.headers["X-AI-Job-Id"] = ai_job.id
+    return response
+
+
+@app.get("/api/game")
+async def get_game_state(
+    request: Request,
+    connect_four_service: ConnectFourService = Depends(get_connect_four_service),
+):
+    """
+    Compact game state, polling clients get a 304 while it is unchanged
+    """
+    etag = connect_four_service.get_etag()
+    if _is_not_modified(request, etag):
+        return _build_not_modified_response(etag)
+    return _build_state_response(connect_four_service)
+
+
+@app.post("/api/play/{col_index}")
+async def play_state(
+    col_index: int,
+    connect_four_service: ConnectFourService = Depends(get_connect_four_service),
+    game_store: GameStore = Depends(get_game_store),
+    ai_workers: AIWorkerPool = Depends(get_ai_workers),
+):
+    ai_job = await _play_human(col_index, connect_four_service, game_store, ai_workers)
+    response = _build_state_response(connect_four_service)
+    response.headers["X-AI-Job-Id"] = ai_job.id
+    return response
+
+
+@app.post("/api/reset")
+async def reset_state(
+    connect_four_service: ConnectFourService = Depends(get_connect_four_service),
+    game_store: GameStore = Depends(get_game_store),
+):
+    connect_four_service.reset()
+    game_store.save(connect_four_service)
+    return _build_state_response(connect_four_service)
+
+
+@app.post("/analyze")
+async def analyze(
+    analyze_request: AnalyzeRequest,
+    ai_workers: AIWorkerPool = Depends(get_ai_workers),
+):
+    """
+    Minimax scores of each column of the positions, from the point of view of the
+    player to move, streamed as JSON lines in the order the analyses complete
+    """
+
+    async def stream_analyses():
+        async for analysis in analyze_positions(
+            ai_workers, analyze_request.positions, analyze_request.depth
+        ):
+            yield analysis.model_dump_json() + "\n"
+
+    return StreamingResponse(stream_analyses(), media_type="application/x-ndjson")
+
+
+@app.get("/stats")
+async def get_stats(ai_workers: AIWorkerPool = Depends(get_ai_workers)):
+    stats = {"pending_ai_searches": ai_workers.pending_count}
+    if ai_workers.move_cache is not None:
+        move_cache_stats = ai_workers.move_cache.get_stats()
+        stats["move_cache"] = {
+            **move_cache_stats._asdict(),
+            "hit_rate": move_cache_stats.hit_rate,
+        }
+    return stats
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(ai_workers: AIWorkerPool = Depends(get_ai_workers)):
+    return PlainTextResponse(
+        render_metrics(ai_workers.get_metrics()),
+        media_type="text/plain; version=0.0.4",
     )
 
 
+@app.get("/jobs/{job_id}", response_model=AIJobResponse)
+async def get_ai_job(
+    job_id: str,
+    connect_four_service: ConnectFourService = Depends(get_connect_four_service),
+):
+    return _build_ai_job_response(_get_ai_job(connect_four_service, job_id))
+
+
+@app.get("/jobs/{job_id}/events")
+async def stream_ai_job(
+    job_id: str,
+    connect_four_service: ConnectFourService = Depends(get_connect_four_service),
+):
+    """
+    Server-sent events stream with a single event sent when the AI job ends
+    """
+    ai_job = _get_ai_job(connect_four_service, job_id)
+
+    async def stream_events():
+        await ai_job.wait()
+        data = _build_ai_job_response(ai_job).model_dump_json()
+        yield f"event: ai-move\ndata: {data}\n\n"
+
+    return StreamingResponse(stream_events(), media_type="text/event-stream")
+
+
 @app.post("/reset", response_class=HTMLResponse)
 async def reset(
     request: Request,
     connect_four_service: ConnectFourService = Depends(get_connect_four_service),
+    game_store: GameStore = Depends(get_game_store),
 ):
     connect_four_service.reset()
-    return templates.TemplateResponse(
-        "partials/game.html",
-        _build_page_context(request, connect_four_service),
+    game_store.save(connect_four_service)
+    return _render("partials/game.html", request, connect_four_service)
+
+
+async def _play_human(
+    col_index: int,
+    connect_four_service: ConnectFourService,
+    game_store: GameStore,
+    ai_workers: AIWorkerPool,
+) -> AIJob:
+    # checked before waiting for the lock which the AI job holds while it thinks
+    _ensure_human_turn(connect_four_service)
+    async with connect_four_service.lock:
+        _ensure_human_turn(connect_four_service)
+        if ai_workers.is_rejecting():
+            raise HTTPException(
+                status_code=503,
+                detail="The AI is busy, retry later",
+                headers={"Retry-After": "1"},
+            )
+        try:
+            connect_four_service.play(col_index)
+        except (
+            AlreadyFilledColumnException,
+            GameOverException,
+            InvalidColumnException,
+        ):
+            raise HTTPException(status_code=400, detail="Invalid move")
+        game_store.save(connect_four_service)
+        return connect_four_service.start_ai_job(
+            _play_ai(connect_four_service, ai_workers, game_store)
+        )
+
+
+async def _play_ai(
+    connect_four_service: ConnectFourService,
+    ai_workers: AIWorkerPool,
+    game_store: GameStore,
+) -> Optional[int]:
+    async with connect_four_service.lock:
+        try:
+            move = await connect_four_service.play_ai(ai_workers)
+        except Exception:
+            # the AI did not play, the human plays again rather than for the AI
+            connect_four_service.connect_four.undo()
+            raise
+        finally:
+            game_store.save(connect_four_service)
+    if move is not None:
+        ai_workers.ponder(connect_four_service.game_id, connect_four_service.connect_four)
+    return move
+
+
+def _ensure_human_turn(connect_four_service: ConnectFourService):
+    if connect_four_service.is_ai_thinking():
+        raise HTTPException(status_code=409, detail="The AI is still thinking")
+
+
+def _get_ai_job(connect_four_service: ConnectFourService, job_id: str) -> AIJob:
+    ai_job = connect_four_service.get_ai_job(job_id)
+    if ai_job is None:
+        raise HTTPException(status_code=404, detail="Unknown AI job")
+    return ai_job
+
+
+def _build_ai_job_response(ai_job: AIJob) -> AIJobResponse:
+    return AIJobResponse(
+        job_id=ai_job.id, status=ai_job.get_status(), move=ai_job.get_move()
+    )
+
+
+def _render(
+    template_name: str, request: Request, connect_four_service: ConnectFourService
+):
+    response = templates.TemplateResponse(
+        template_name, _build_page_context(request, connect_four_service)
+    )
+    _set_game_cookie(response, connect_four_service)
+    return response
+
+
+def _build_state_response(connect_four_service: ConnectFourService) -> Response:
+    # serialized directly, without the validation of a response model
+    response = Response(
+        connect_four_service.get_state().model_dump_json(),
+        media_type="application/json",
     )
+    _set_etag(response, connect_four_service.get_etag())
+    _set_game_cookie(response, connect_four_service)
+    return response
+
+
+def _set_game_cookie(response: Response, connect_four_service: ConnectFourService):
+    response.set_cookie(
+        GAME_ID_COOKIE, connect_four_service.game_id, httponly=True, samesite="lax"
+    )
+
+
+def _set_etag(response: Response, etag: str):
+    response.headers["ETag"] = etag
+    # cached, but revalidated before each use
+    response.headers["Cache-Control"] = "no-cache"
+
+
+def _is_not_modified(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is None:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+def _build_not_modified_response(etag: str) -> Response:
+    response = Response(status_code=304)
+    _set_etag(response, etag)
+    return response
 
 
 def _build_page_context(request: Request, connect_four_service: ConnectFourService):
     return {
         "request": request,
         "grid": connect_four_service.get_columns(),
+        "moves": encode_moves(connect_four_service.connect_four.get_moves()),
         "next_disc": connect_four_service.get_next_disc(),
         "winner": connect_four_service.get_winner(),
+        "thinking": connect_four_service.is_ai_thinking(),
     }
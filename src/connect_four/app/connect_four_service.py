@@ -1,23 +1,103 @@
-from connect_four.app.schemas import ColumnResponse
-from connect_four.core import ConnectFour
+import asyncio
+from typing import Coroutine, List, Optional, Tuple
+
+from connect_four.app.ai_jobs import AIJob, AIJobStatus
+from connect_four.app.ai_workers import AIWorkerPool
+from connect_four.app.schemas import GameStateResponse, MoveResponse
+from connect_four.core import Cell, ConnectFour
+
+
+def encode_moves(moves: List[int]) -> str:
+    """
+    Moves as a string of column indexes, e.g. "3342"
+    """
+    return "".join(str(move) for move in moves)
+
+
+def decode_moves(encoded_moves: str) -> List[int]:
+    return [int(move) for move in encoded_moves]
 
 
 class ConnectFourService:
+    game_id: str
     connect_four: ConnectFour
+    lock: asyncio.Lock
+    ai_job: Optional[AIJob]
 
-    def __init__(self):
+    def __init__(self, game_id: str = "", connect_four: Optional[ConnectFour] = None):
+        self.game_id = game_id
+        self.ai_job = None
+        # held from the human move to the AI reply so concurrent requests can't interleave
+        self.lock = asyncio.Lock()
         self.reset()
+        if connect_four is not None:
+            self.connect_four = connect_four
+
+    def get_columns(self) -> List[Tuple[Cell, ...]]:
+        return list(zip(*self.connect_four.get_grid()))
 
-    def get_columns(self):
+    def get_state(self) -> GameStateResponse:
+        """
+        Compact state: the moves and the last move, from which clients update their
+        grid instead of receiving it
+        """
+        connect_four = self.connect_four
+        last_move = connect_four.get_last_move()
+        return GameStateResponse(
+            moves=encode_moves(connect_four.get_moves()),
+            last_move=None
+            if last_move is None
+            else MoveResponse(
+                row=last_move[0],
+                col=last_move[1],
+                disc=connect_four.get_grid()[last_move[0]][last_move[1]],
+            ),
+            next_disc=connect_four.get_next_disc(),
+            winner=connect_four.get_winner(),
+            thinking=self.is_ai_thinking(),
+        )
+
+    def get_etag(self) -> str:
+        """
+        The moves and whether the AI is thinking make the whole state of a game, the
+        game id keeps two games with the same moves apart
+        """
+        moves = encode_moves(self.connect_four.get_moves())
+        return f'"{self.game_id}-{moves}-{int(self.is_ai_thinking())}"'
+
+    def get_changed_cells(self, moves: List[int]) -> List[Tuple[int, int, Cell]]:
+        """
+        (row, col, cell) of the cells which differ from the grid after `moves`
+        """
         grid = self.connect_four.get_grid()
+        other_grid = ConnectFour.from_moves(moves).get_grid()
         return [
-            ColumnResponse(cells=cells)
-            for cells in list(list(cells) for cells in zip(*grid))
+            (row_index, col_index, cell)
+            for row_index, (row, other_row) in enumerate(zip(grid, other_grid))
+            for col_index, (cell, other_cell) in enumerate(zip(row, other_row))
+            if cell != other_cell
         ]
 
     def play(self, column_index: int):
         self.connect_four.play(column_index)
 
+    async def play_ai(self, ai_workers: AIWorkerPool) -> Optional[int]:
+        if self.connect_four.is_game_over():
+            return None
+        move = await ai_workers.next_move(self.game_id, self.connect_four)
+        self.connect_four.play(move)
+        return move
+
+    def start_ai_job(self, coroutine: Coroutine) -> AIJob:
+        self.ai_job = AIJob(coroutine)
+        return self.ai_job
+
+    def get_ai_job(self, job_id: str) -> Optional[AIJob]:
+        return self.ai_job if self.ai_job and self.ai_job.id == job_id else None
+
+    def is_ai_thinking(self) -> bool:
+        return self.ai_job is not None and self.ai_job.get_status() == AIJobStatus.PENDING
+
     def get_next_disc(self):
         return self.connect_four.get_next_disc()
 
@@ -25,4 +105,7 @@ class ConnectFourService:
         return self.connect_four.get_winner()
 
     def reset(self):
+        if self.ai_job is not None:
+            self.ai_job.cancel()
+            self.ai_job = None
         self.connect_four = ConnectFour()
@@ -1,7 +1,65 @@
+import os
+from typing import Optional
+
+from fastapi import Depends, Request
+
+from .ai_workers import AIWorkerPool, OverloadPolicy
 from .connect_four_service import ConnectFourService
+from .game_store import GameStore, SQLiteGamePersistence
+from .move_cache import MoveCache, SQLiteMoveCache
+
+GAME_ID_COOKIE = "game_id"
+
+game_store = GameStore(
+    max_games=int(os.environ.get("CONNECT_FOUR_MAX_GAMES", 10_000)),
+    ttl=float(os.environ.get("CONNECT_FOUR_GAME_TTL", 3600)),
+    # without a database file, games only live in memory, up to the max_games
+    persistence=SQLiteGamePersistence(os.environ["CONNECT_FOUR_DATABASE"])
+    if "CONNECT_FOUR_DATABASE" in os.environ
+    else None,
+)
+
+ai_workers = AIWorkerPool(
+    workers=int(os.environ["CONNECT_FOUR_AI_WORKERS"])
+    if "CONNECT_FOUR_AI_WORKERS" in os.environ
+    else None,
+    max_pending=int(os.environ.get("CONNECT_FOUR_AI_MAX_PENDING", 32)),
+    timeout=float(os.environ.get("CONNECT_FOUR_AI_TIMEOUT", 5)),
+    overload_policy=OverloadPolicy(
+        os.environ.get("CONNECT_FOUR_AI_OVERLOAD_POLICY", OverloadPolicy.DEGRADE)
+    ),
+    opening_book_path=os.environ.get("CONNECT_FOUR_OPENING_BOOK"),
+    tablebase_path=os.environ.get("CONNECT_FOUR_TABLEBASE"),
+    move_cache=MoveCache(
+        max_entries=int(os.environ.get("CONNECT_FOUR_MOVE_CACHE_SIZE", 100_000)),
+        # shared by the app processes using the same file
+        shared=SQLiteMoveCache(os.environ["CONNECT_FOUR_MOVE_CACHE_DATABASE"])
+        if "CONNECT_FOUR_MOVE_CACHE_DATABASE" in os.environ
+        else None,
+    ),
+    profile=os.environ.get("CONNECT_FOUR_AI_PROFILE", "") == "1",
+    rollout_policy=os.environ.get("CONNECT_FOUR_AI_ROLLOUT_POLICY", "random"),
+)
+
+
+def get_game_store() -> GameStore:
+    return game_store
+
 
-connect_four_service = ConnectFourService()
+def get_ai_workers() -> AIWorkerPool:
+    return ai_workers
 
 
-def get_connect_four_service() -> ConnectFourService:
+def get_connect_four_service(
+    request: Request,
+    game_id: Optional[str] = None,
+    game_store: GameStore = Depends(get_game_store),
+) -> ConnectFourService:
+    """
+    Game from the `game_id` query parameter or cookie, a new game when it is unknown
+    """
+    game_id = game_id or request.cookies.get(GAME_ID_COOKIE)
+    connect_four_service = game_store.get(game_id) if game_id else None
+    if connect_four_service is None:
+        connect_four_service = game_store.create()
     return connect_four_service
@@ -0,0 +1,170 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+import sqlite3
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+import uuid
+
+from connect_four.core import ConnectFour
+
+from .connect_four_service import ConnectFourService, decode_moves, encode_moves
+
+# seconds between two deletions of the expired persisted games, at most the TTL
+_PERSISTENCE_EXPIRY_INTERVAL = 60
+
+
+class GamePersistence(ABC):
+    @abstractmethod
+    def load(self, game_id: str) -> Optional[List[int]]:
+        ...
+
+    @abstractmethod
+    def save(self, game_id: str, moves: List[int]):
+        ...
+
+    @abstractmethod
+    def delete(self, game_id: str):
+        ...
+
+    @abstractmethod
+    def delete_expired(self, max_age: float):
+        """
+        Delete the games saved more than `max_age` seconds ago
+        """
+
+
+class SQLiteGamePersistence(GamePersistence):
+    """
+    Games are stored as their move string, one row per game
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS games ("
+                "id TEXT PRIMARY KEY, moves TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+
+    def load(self, game_id: str) -> Optional[List[int]]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT moves FROM games WHERE id = ?", (game_id,)
+            ).fetchone()
+        return None if row is None else decode_moves(row[0])
+
+    def save(self, game_id: str, moves: List[int]):
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT INTO games (id, moves, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET "
+                "moves = excluded.moves, updated_at = excluded.updated_at",
+                (game_id, encode_moves(moves), time.time()),
+            )
+
+    def delete(self, game_id: str):
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM games WHERE id = ?", (game_id,))
+
+    def delete_expired(self, max_age: float):
+        with self._lock, self._connection:
+            self._connection.execute(
+                "DELETE FROM games WHERE updated_at < ?", (time.time() - max_age,)
+            )
+
+    def close(self):
+        self._connection.close()
+
+
+class GameStore:
+    """
+    Live games are kept in memory up to `max_games`, least recently used games are
+    evicted first and games unused for `ttl` seconds are evicted on access.
+
+    Every change is written to the persistence, so an evicted game is rebuilt from its
+    moves the next time it is requested. Games are only persisted once they have
+    moves, and persisted games expire `ttl` seconds after their last change.
+    """
+
+    _games: "OrderedDict[str, Tuple[ConnectFourService, float]]"
+
+    def __init__(
+        self,
+        max_games: int = 10_000,
+        ttl: float = 3600,
+        persistence: Optional[GamePersistence] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_games = max_games
+        self.ttl = ttl
+        self.persistence = persistence
+        self._clock = clock
+        self._games = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_persistence_expiry = clock()
+
+    def __len__(self) -> int:
+        return len(self._games)
+
+    def get(self, game_id: str) -> Optional[ConnectFourService]:
+        now = self._clock()
+        self._expire_persisted_games(now)
+        with self._lock:
+            self._evict_expired(now)
+            game = self._games.get(game_id)
+            if game is not None:
+                self._games[game_id] = (game[0], now)
+                self._games.move_to_end(game_id)
+                return game[0]
+
+        moves = self.persistence.load(game_id) if self.persistence else None
+        if moves is None:
+            return None
+        connect_four_service = ConnectFourService(
+            game_id=game_id, connect_four=ConnectFour.from_moves(moves)
+        )
+        self._add(connect_four_service, now)
+        return connect_four_service
+
+    def create(self) -> ConnectFourService:
+        # persisted on its first move, requests without cookie would fill the storage
+        connect_four_service = ConnectFourService(game_id=uuid.uuid4().hex)
+        self._add(connect_four_service, self._clock())
+        return connect_four_service
+
+    def save(self, connect_four_service: ConnectFourService):
+        if self.persistence is None:
+            return
+        moves = connect_four_service.connect_four.get_moves()
+        if moves:
+            self.persistence.save(connect_four_service.game_id, moves)
+        else:
+            # an empty game is the same as a new one
+            self.persistence.delete(connect_four_service.game_id)
+
+    def _add(self, connect_four_service: ConnectFourService, now: float):
+        with self._lock:
+            self._games[connect_four_service.game_id] = (connect_four_service, now)
+            self._games.move_to_end(connect_four_service.game_id)
+            while len(self._games) > self.max_games:
+                self._games.popitem(last=False)
+
+    def _expire_persisted_games(self, now: float):
+        if self.persistence is None:
+            return
+        with self._lock:
+            if now - self._last_persistence_expiry < min(
+                self.ttl, _PERSISTENCE_EXPIRY_INTERVAL
+            ):
+                return
+            self._last_persistence_expiry = now
+        self.persistence.delete_expired(self.ttl)
+
+    def _evict_expired(self, now: float):
+        while self._games:
+            _, last_access = next(iter(self._games.values()))
+            if now - last_access < self.ttl:
+                break
+            self._games.popitem(last=False)
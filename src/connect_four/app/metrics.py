@@ -0,0 +1,190 @@
+from bisect import bisect_left
+import math
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from connect_four.ai import SearchStats
+
+# seconds, from cached moves to searches hitting the worker timeout
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+DEPTH_BUCKETS = (1, 2, 4, 6, 8, 12, 16, 24, 32, 42)
+
+
+class Metric:
+    """
+    Metric rendered in the Prometheus text exposition format
+    """
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+            *self._render_samples(),
+        ]
+
+    def _render_samples(self) -> List[str]:
+        raise NotImplementedError()
+
+    def _get_label_values(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} labels are {self.label_names}")
+        return tuple(str(labels[label_name]) for label_name in self.label_names)
+
+    def _format_labels(self, label_values: Tuple[str, ...], **extra_labels: str) -> str:
+        labels = list(zip(self.label_names, label_values)) + list(extra_labels.items())
+        if not labels:
+            return ""
+        formatted_labels = ",".join(
+            f'{name}="{_escape(value)}"' for name, value in labels
+        )
+        return f"{{{formatted_labels}}}"
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        label_values = self._get_label_values(labels)
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def _render_samples(self) -> List[str]:
+        return [
+            f"{self.name}{self._format_labels(label_values)} {_format_value(value)}"
+            for label_values, value in self._values.items()
+        ]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def set(self, value: float, **labels: str):
+        self._values[self._get_label_values(labels)] = value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # per labels: observation count of each bucket (not cumulative), the last one
+        # for the values above all the buckets, and the sum of the values
+        self._bucket_counts: Dict[Tuple[str, ...], List[int]] = {}
+        self._sums: Dict[Tuple[str, ...], float] = {}
+
+    def observe(self, value: float, **labels: str):
+        label_values = self._get_label_values(labels)
+        bucket_counts = self._bucket_counts.setdefault(
+            label_values, [0] * (len(self.buckets) + 1)
+        )
+        bucket_counts[bisect_left(self.buckets, value)] += 1
+        self._sums[label_values] = self._sums.get(label_values, 0) + value
+
+    def _render_samples(self) -> List[str]:
+        samples = []
+        for label_values, bucket_counts in self._bucket_counts.items():
+            cumulative_count = 0
+            for upper_bound, count in zip(self.buckets + (math.inf,), bucket_counts):
+                cumulative_count += count
+                labels = self._format_labels(label_values, le=_format_value(upper_bound))
+                samples.append(f"{self.name}_bucket{labels} {cumulative_count}")
+            labels = self._format_labels(label_values)
+            samples.append(
+                f"{self.name}_sum{labels} {_format_value(self._sums[label_values])}"
+            )
+            samples.append(f"{self.name}_count{labels} {cumulative_count}")
+        return samples
+
+
+class AIMetrics:
+    """
+    AI moves and search statistics, labelled by engine
+    """
+
+    def __init__(self):
+        self.move_seconds = Histogram(
+            "connect_four_ai_move_seconds",
+            "Time taken to answer an AI move, by engine answering it",
+            ["engine"],
+        )
+        self.search_seconds = Histogram(
+            "connect_four_ai_search_seconds",
+            "Time spent searching by the workers",
+            ["engine"],
+        )
+        self.search_depth = Histogram(
+            "connect_four_ai_search_depth",
+            "Depth reached by the searches",
+            ["engine"],
+            buckets=DEPTH_BUCKETS,
+        )
+        self.search_nodes = Counter(
+            "connect_four_ai_search_nodes_total", "Nodes searched", ["engine"]
+        )
+        self.search_iterations = Counter(
+            "connect_four_ai_search_iterations_total",
+            "MCTS iterations searched",
+            ["engine"],
+        )
+        self.search_cutoffs = Counter(
+            "connect_four_ai_search_cutoffs_total", "Minimax beta cutoffs", ["engine"]
+        )
+        self.search_phase_seconds = Counter(
+            "connect_four_ai_search_phase_seconds_total",
+            "Time spent in each phase of the profiled searches",
+            ["engine", "phase"],
+        )
+
+    def observe_move(self, engine: str, seconds: float):
+        self.move_seconds.observe(seconds, engine=engine)
+
+    def observe_search(self, engine: str, stats: SearchStats):
+        self.search_seconds.observe(stats.elapsed, engine=engine)
+        self.search_depth.observe(stats.depth, engine=engine)
+        self.search_nodes.inc(stats.nodes, engine=engine)
+        self.search_iterations.inc(stats.iterations, engine=engine)
+        self.search_cutoffs.inc(stats.cutoffs, engine=engine)
+        for phase, seconds in stats.phase_times.items():
+            self.search_phase_seconds.inc(seconds, engine=engine, phase=phase)
+
+    def get_metrics(self) -> List[Metric]:
+        return [
+            self.move_seconds,
+            self.search_seconds,
+            self.search_depth,
+            self.search_nodes,
+            self.search_iterations,
+            self.search_cutoffs,
+            self.search_phase_seconds,
+        ]
+
+
+def render_metrics(metrics: Iterable[Metric]) -> str:
+    return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
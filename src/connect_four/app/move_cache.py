@@ -0,0 +1,134 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+import sqlite3
+import threading
+from typing import NamedTuple, Optional, Tuple
+
+from connect_four.core import ConnectFour
+
+
+class MoveCacheStats(NamedTuple):
+    size: int
+    hits: int
+    shared_hits: int
+    misses: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.shared_hits + self.misses
+        return (self.hits + self.shared_hits) / lookups if lookups else 0.0
+
+
+class SharedMoveCache(ABC):
+    @abstractmethod
+    def get(self, key: str) -> Optional[int]:
+        ...
+
+    @abstractmethod
+    def put(self, key: str, move: int):
+        ...
+
+
+class SQLiteMoveCache(SharedMoveCache):
+    """
+    Moves shared by the processes using the same database file
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS moves ("
+                "key TEXT PRIMARY KEY, move INTEGER NOT NULL)"
+            )
+
+    def get(self, key: str) -> Optional[int]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT move FROM moves WHERE key = ?", (key,)
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def put(self, key: str, move: int):
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO moves (key, move) VALUES (?, ?)", (key, move)
+            )
+
+    def close(self):
+        self._connection.close()
+
+
+class MoveCache:
+    """
+    AI moves by position, engine and difficulty. Mirrored positions share their entry.
+
+    The `max_entries` most recently used moves are kept in memory, in front of the
+    optional shared cache.
+    """
+
+    _moves: "OrderedDict[str, int]"
+
+    def __init__(
+        self, max_entries: int = 100_000, shared: Optional[SharedMoveCache] = None
+    ):
+        self.max_entries = max_entries
+        self.shared = shared
+        self._moves = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._moves)
+
+    def get(
+        self, connect_four: ConnectFour, engine: str, difficulty: str
+    ) -> Optional[int]:
+        key, is_mirrored = self._get_key(connect_four, engine, difficulty)
+        with self._lock:
+            move = self._moves.get(key)
+            if move is not None:
+                self._moves.move_to_end(key)
+                self.hits += 1
+        if move is None and self.shared is not None:
+            move = self.shared.get(key)
+            if move is not None:
+                self._add(key, move)
+                self.shared_hits += 1
+        if move is None:
+            self.misses += 1
+            return None
+        return connect_four.width - 1 - move if is_mirrored else move
+
+    def put(self, connect_four: ConnectFour, engine: str, difficulty: str, move: int):
+        key, is_mirrored = self._get_key(connect_four, engine, difficulty)
+        canonical_move = connect_four.width - 1 - move if is_mirrored else move
+        self._add(key, canonical_move)
+        if self.shared is not None:
+            self.shared.put(key, canonical_move)
+
+    def get_stats(self) -> MoveCacheStats:
+        return MoveCacheStats(
+            size=len(self._moves),
+            hits=self.hits,
+            shared_hits=self.shared_hits,
+            misses=self.misses,
+        )
+
+    def _add(self, key: str, move: int):
+        with self._lock:
+            self._moves[key] = move
+            self._moves.move_to_end(key)
+            while len(self._moves) > self.max_entries:
+                self._moves.popitem(last=False)
+
+    def _get_key(
+        self, connect_four: ConnectFour, engine: str, difficulty: str
+    ) -> Tuple[str, bool]:
+        position_key, is_mirrored = connect_four.get_canonical_key()
+        board = f"{connect_four.width}x{connect_four.height}x{connect_four.connect}"
+        return f"{engine}:{difficulty}:{board}:{position_key}", is_mirrored
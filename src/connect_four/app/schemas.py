@@ -1,9 +1,42 @@
-from typing import List
+from typing import Dict, List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
-from connect_four.core import Cell
+from connect_four.app.ai_jobs import AIJobStatus
+from connect_four.core import Disc
 
 
-class ColumnResponse(BaseModel):
-    cells: List[Cell]
+class MoveResponse(BaseModel):
+    row: int
+    col: int
+    disc: Disc
+
+
+class GameStateResponse(BaseModel):
+    # move string, one digit per move giving the column index, e.g. "3324"
+    moves: str
+    last_move: Optional[MoveResponse]
+    next_disc: Disc
+    winner: Optional[Disc]
+    thinking: bool
+
+
+class AIJobResponse(BaseModel):
+    job_id: str
+    status: AIJobStatus
+    move: Optional[int]
+
+
+class AnalyzeRequest(BaseModel):
+    # move strings, one digit per move giving the column index, e.g. "3324"
+    positions: List[str] = Field(max_length=10_000)
+    depth: int = Field(default=4, ge=0, le=10)
+
+
+class AnalysisResponse(BaseModel):
+    index: int
+    position: str
+    scores: Optional[List[Optional[float]]] = None
+    best_move: Optional[int] = None
+    stats: Optional[Dict[str, float]] = None
+    error: Optional[str] = None
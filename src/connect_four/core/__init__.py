@@ -1,4 +1,14 @@
-from .connect_four import EMPTY_CELL, HEIGHT, WIDTH, Cell, ConnectFour, Disc, Grid
+from .connect_four import (
+    CONNECT,
+    EMPTY_CELL,
+    HEIGHT,
+    WIDTH,
+    BoardGeometry,
+    Cell,
+    ConnectFour,
+    Disc,
+    Grid,
+)
 from .exceptions import (
     AlreadyFilledColumnException,
     InvalidColumnException,
@@ -1,5 +1,7 @@
 from enum import StrEnum
-from typing import List, Literal, Optional, Tuple, TypeGuard, Union
+from functools import lru_cache
+from random import Random
+from typing import Iterable, List, Literal, Optional, Self, Tuple, Union
 
 from .exceptions import (
     AlreadyFilledColumnException,
@@ -20,103 +22,299 @@ Grid = List[List[Cell]]
 
 WIDTH = 7
 HEIGHT = 6
+CONNECT = 4
+
+DISCS: Tuple[Disc, Disc] = (Disc.RED, Disc.YELLOW)
+
+# Line directions as (column step, row step): horizontal, vertical and both diagonals
+_DIRECTIONS = ((1, 0), (0, 1), (1, 1), (1, -1))
+
+
+class BoardGeometry:
+    """
+    Board size and number of discs to align, with the tables derived from them. Boards
+    of the same geometry share the instance returned by `get_geometry`.
+
+    Bitboard layout: each column uses height + 1 bits, bit 0 is the bottom cell of
+    the first column. The extra sentinel bit on top of each column keeps shifted
+    alignments from wrapping into the next column. On the standard board:
+
+      6 13 20 27 34 41 48
+      5 12 19 26 33 40 47
+      4 11 18 25 32 39 46
+      3 10 17 24 31 38 45
+      2  9 16 23 30 37 44
+      1  8 15 22 29 36 43
+      0  7 14 21 28 35 42
+
+    `lines_by_bit` holds, for each bit index, the bitboard mask of every winning line
+    going through the cell, so that a move only checks the lines of its own disc.
+    """
+
+    def __init__(self, width: int, height: int, connect: int):
+        if width < 1 or height < 1 or not 1 < connect <= max(width, height):
+            raise ValueError(
+                f"invalid board geometry {width}x{height}, connect {connect}"
+            )
+        self.width = width
+        self.height = height
+        self.connect = connect
+        self.cell_count = width * height
+        self.column_bits = height + 1
+        self.column_mask = (1 << self.column_bits) - 1
+        self.bottom_mask = sum(
+            1 << col_index * self.column_bits for col_index in range(width)
+        )
+        self.board_mask = self.bottom_mask * ((1 << height) - 1)
+        # columns sorted from the center to the edges, central discs belong to more
+        # lines; on even widths the two central columns come first, left one first
+        self.center_order = sorted(
+            range(width), key=lambda col_index: abs(2 * col_index - (width - 1))
+        )
+        # Zobrist keys, one random 64 bits value per (disc, bit index). Seeded so that
+        # hashes are stable across processes and can be stored on disk.
+        zobrist_random = Random(0xC4)
+        self.zobrist_keys: Tuple[List[int], List[int]] = (
+            [zobrist_random.getrandbits(64) for _ in range(width * self.column_bits)],
+            [zobrist_random.getrandbits(64) for _ in range(width * self.column_bits)],
+        )
+        self.lines = self._get_lines()
+        self.lines_by_bit: List[List[int]] = [[] for _ in range(width * self.column_bits)]
+        for line in self.lines:
+            for bit_index in range(width * self.column_bits):
+                if line >> bit_index & 1:
+                    self.lines_by_bit[bit_index].append(line)
+
+    def __repr__(self) -> str:
+        return f"BoardGeometry({self.width}, {self.height}, {self.connect})"
+
+    def _get_lines(self) -> List[int]:
+        """
+        Bitboard masks of the `connect` aligned cells of every winning line
+        """
+        lines = []
+        for col_index in range(self.width):
+            for row_index in range(self.height):
+                for col_step, row_step in _DIRECTIONS:
+                    last_col_index = col_index + col_step * (self.connect - 1)
+                    last_row_index = row_index + row_step * (self.connect - 1)
+                    if last_col_index < self.width and 0 <= last_row_index < self.height:
+                        lines.append(
+                            sum(
+                                1
+                                << (col_index + col_step * i) * self.column_bits
+                                + row_index
+                                + row_step * i
+                                for i in range(self.connect)
+                            )
+                        )
+        return lines
+
+    def get_winning_cells(self, bitboard: int, mask: int) -> int:
+        """
+        Empty cells (reachable or not) which would complete a line of `bitboard`,
+        `mask` holding the discs of both players
+        """
+        winning_cells = 0
+        for line in self.lines:
+            missing_cells = line & ~bitboard
+            # a single missing cell
+            if missing_cells & (missing_cells - 1) == 0:
+                winning_cells |= missing_cells
+        return winning_cells & ~mask
+
+    def mirror(self, bitboard: int) -> int:
+        """
+        Bitboard flipped left to right
+        """
+        mirrored = 0
+        for col_index in range(self.width):
+            column = (bitboard >> col_index * self.column_bits) & self.column_mask
+            mirrored |= column << (self.width - 1 - col_index) * self.column_bits
+        return mirrored
+
+
+@lru_cache(maxsize=None)
+def get_geometry(width: int, height: int, connect: int) -> BoardGeometry:
+    return BoardGeometry(width, height, connect)
+
+
+STANDARD_GEOMETRY = get_geometry(WIDTH, HEIGHT, CONNECT)
+
+# tables of the standard board, used by the engines which only handle it
+CENTER_ORDER = STANDARD_GEOMETRY.center_order
+COLUMN_BITS = STANDARD_GEOMETRY.column_bits
+ZOBRIST_KEYS = STANDARD_GEOMETRY.zobrist_keys
+_STANDARD_BOARD_MASK = STANDARD_GEOMETRY.board_mask
+
+
+def mirror_bitboard(bitboard: int) -> int:
+    """
+    Standard board bitboard flipped left to right
+    """
+    return STANDARD_GEOMETRY.mirror(bitboard)
+
+
+def get_winning_cells(bitboard: int, mask: int) -> int:
+    """
+    Empty cells (reachable or not) which would align four discs of `bitboard` on a
+    standard board, `mask` holding the discs of both players
+    """
+    # vertical
+    winning_cells = (bitboard << 1) & (bitboard << 2) & (bitboard << 3)
+    for shift in (COLUMN_BITS, COLUMN_BITS - 1, COLUMN_BITS + 1):
+        # horizontal and both diagonals, the empty cell at each place of the line
+        pairs = (bitboard << shift) & (bitboard << 2 * shift)
+        winning_cells |= pairs & (bitboard << 3 * shift)
+        winning_cells |= pairs & (bitboard >> shift)
+        pairs = (bitboard >> shift) & (bitboard >> 2 * shift)
+        winning_cells |= pairs & (bitboard << shift)
+        winning_cells |= pairs & (bitboard >> 3 * shift)
+    return winning_cells & (_STANDARD_BOARD_MASK ^ mask)
 
 
 class ConnectFour:
+    """
+    Board of `width` columns and `height` rows, won by aligning `connect` discs
+    """
+
     _grid: Grid
-    _last_moves: List[Tuple[Disc, int]]
+    _moves: List[int]
+    _bitboards: List[int]
+    _mask: int
+    _heights: List[int]
+    _winner: Optional[Disc]
+    _hash: int
 
-    def __init__(self):
-        self._grid = [[EMPTY_CELL] * WIDTH for _ in range(HEIGHT)]
-        self._last_moves = []
+    def __init__(self, width: int = WIDTH, height: int = HEIGHT, connect: int = CONNECT):
+        self.geometry = get_geometry(width, height, connect)
+        self.width = width
+        self.height = height
+        self.connect = connect
+        self._grid = [[EMPTY_CELL] * width for _ in range(height)]
+        self._moves = []
+        self._bitboards = [0, 0]
+        self._mask = 0
+        self._heights = [0] * width
+        self._winner = None
+        self._hash = 0
+
+    @classmethod
+    def from_moves(
+        cls,
+        moves: Iterable[int],
+        width: int = WIDTH,
+        height: int = HEIGHT,
+        connect: int = CONNECT,
+    ) -> Self:
+        connect_four = cls(width, height, connect)
+        for col_index in moves:
+            connect_four.play(col_index)
+        return connect_four
 
     def get_grid(self) -> Grid:
         return self._grid
 
+    def get_bitboards(self) -> Tuple[int, int]:
+        """
+        Red and yellow discs bitboards, see BoardGeometry for the layout
+        """
+        return self._bitboards[0], self._bitboards[1]
+
+    def get_hash(self) -> int:
+        """
+        Zobrist hash of the position, updated incrementally on play/undo
+        """
+        return self._hash
+
+    def get_key(self) -> int:
+        """
+        Unique key of the position: the discs of the player to move plus the mask,
+        which sets the bit above the top disc of each column
+        """
+        return self._bitboards[len(self._moves) & 1] + self._mask
+
+    def get_canonical_key(self) -> Tuple[int, bool]:
+        """
+        Smallest key of the position and of its mirror, with whether it is the mirror's.
+        A move found for the mirrored position maps back to column width - 1 - move.
+        """
+        key = self.get_key()
+        mirrored_key = self.geometry.mirror(key)
+        if mirrored_key < key:
+            return mirrored_key, True
+        return key, False
+
+    def get_moves(self) -> List[int]:
+        return list(self._moves)
+
+    def get_last_move(self) -> Optional[Tuple[int, int]]:
+        """
+        Grid (row, col) indexes of the last played disc
+        """
+        if not len(self._moves):
+            return None
+        col_index = self._moves[-1]
+        return self.height - self._heights[col_index], col_index
+
     def get_next_disc(self) -> Disc:
-        return (
-            Disc.RED
-            if not len(self._last_moves) or self._last_moves[-1][0] == Disc.YELLOW
-            else Disc.YELLOW
-        )
+        return DISCS[len(self._moves) & 1]
 
     def get_free_column_indexes(self) -> List[int]:
-        free_col_indexes = []
-        for i, col in enumerate(zip(*self._grid)):
-            if col.count(EMPTY_CELL) > 0:
-                free_col_indexes.append(i)
-        return free_col_indexes
+        board_height = self.height
+        return [i for i, height in enumerate(self._heights) if height < board_height]
 
     def is_game_over(self) -> bool:
         return (
-            all(cell != EMPTY_CELL for row in self._grid for cell in row)
-            or self.get_winner() is not None
+            self._winner is not None or self._mask.bit_count() == self.geometry.cell_count
         )
 
     def play(self, col_index: int):
-        if col_index < 0 or col_index >= WIDTH:
+        if col_index < 0 or col_index >= self.width:
             raise InvalidColumnException()
 
         if self.is_game_over():
             raise GameOverException()
 
-        try:
-            available_row_index = [row[col_index] for row in self._grid][::-1].index(
-                EMPTY_CELL
-            )
-        except ValueError as value_err:
-            raise AlreadyFilledColumnException() from value_err
+        row_index = self._heights[col_index]
+        if row_index == self.height:
+            raise AlreadyFilledColumnException()
 
-        played_disc = self.get_next_disc()
-        self._grid[HEIGHT - 1 - available_row_index][col_index] = played_disc
-        self._last_moves.append((played_disc, col_index))
+        geometry = self.geometry
+        disc_index = len(self._moves) & 1
+        bit_index = col_index * geometry.column_bits + row_index
+        move_bit = 1 << bit_index
+        bitboard = self._bitboards[disc_index] | move_bit
+        self._bitboards[disc_index] = bitboard
+        self._mask |= move_bit
+        self._hash ^= geometry.zobrist_keys[disc_index][bit_index]
+        self._heights[col_index] = row_index + 1
+        self._grid[self.height - 1 - row_index][col_index] = DISCS[disc_index]
+        self._moves.append(col_index)
+
+        # only the lines through the new disc can be complete
+        for line in geometry.lines_by_bit[bit_index]:
+            if bitboard & line == line:
+                self._winner = DISCS[disc_index]
+                break
 
     def undo(self):
-        if not len(self._last_moves):
+        if not len(self._moves):
             return
 
-        _last_play, _last_col_index = self._last_moves.pop()
-        last_row_index = list(zip(*self._grid))[_last_col_index].index(_last_play)
-        self._grid[last_row_index][_last_col_index] = EMPTY_CELL
+        col_index = self._moves.pop()
+        row_index = self._heights[col_index] - 1
+        geometry = self.geometry
+        disc_index = len(self._moves) & 1
+        bit_index = col_index * geometry.column_bits + row_index
+        move_bit = 1 << bit_index
+        self._bitboards[disc_index] ^= move_bit
+        self._mask ^= move_bit
+        self._hash ^= geometry.zobrist_keys[disc_index][bit_index]
+        self._heights[col_index] = row_index
+        self._grid[self.height - 1 - row_index][col_index] = EMPTY_CELL
+        # a won position is always the last one, so going back clears the winner
+        self._winner = None
 
     def get_winner(self) -> Optional[Disc]:
-        def has_four_discs_in_a_row(cell: Cell, row: List[Cell]) -> TypeGuard[Disc]:
-            return (
-                isinstance(cell, Disc) and cell == row[i + 1] == row[i + 2] == row[i + 3]
-            )
-
-        def has_four_discs_in_a_diag(
-            cell: Cell, grid: List[List[Cell]], is_going_up: bool
-        ) -> TypeGuard[Disc]:
-            dir = -1 if is_going_up else 1
-            return (
-                isinstance(cell, Disc)
-                and cell
-                == grid[y + 1 * dir][x + 1]
-                == grid[y + 2 * dir][x + 2]
-                == grid[y + 3 * dir][x + 3]
-            )
-
-        for row in self._grid:
-            for i in range(WIDTH - 3):
-                cur_cell = row[i]
-                if has_four_discs_in_a_row(cur_cell, row):
-                    return cur_cell
-
-        for col in zip(*self._grid):
-            for i in range(HEIGHT - 3):
-                cur_cell = col[i]
-                if has_four_discs_in_a_row(cur_cell, list(col)):
-                    return cur_cell
-
-        for y in range(HEIGHT - 1, HEIGHT - 2, -1):
-            for x in range(WIDTH - 3):
-                cur_cell = self._grid[y][x]
-                if has_four_discs_in_a_diag(cur_cell, self._grid, is_going_up=True):
-                    return cur_cell
-
-        for y in range(HEIGHT - 3):
-            for x in range(WIDTH - 3):
-                cur_cell = self._grid[y][x]
-                if has_four_discs_in_a_diag(cur_cell, self._grid, is_going_up=False):
-                    return cur_cell
+        return self._winner
@@ -1,7 +1,8 @@
 import pytest
 
-from connect_four.ai import MonteCarloTreeSearch
-from connect_four.core import ConnectFour
+from connect_four.ai import MonteCarloTreeSearch, SearchBudget
+from connect_four.ai.mcts_tree import MCTSTree
+from connect_four.core import ConnectFour, Disc
 
 
 @pytest.fixture
@@ -45,3 +46,176 @@ def test_should_play_the_winning_move_when_possible(
             connect_four.play(i)
 
     assert minimax_ai.next_move(connect_four) == 3
+
+
+def test_should_leave_the_board_unchanged(
+    connect_four: ConnectFour, minimax_ai: MonteCarloTreeSearch
+):
+    for col_index in [3, 3, 2]:
+        connect_four.play(col_index)
+
+    minimax_ai.next_move(connect_four)
+
+    assert connect_four.get_moves() == [3, 3, 2]
+    assert connect_four.get_next_disc() == Disc.YELLOW
+
+
+def test_should_reuse_the_subtree_of_the_played_moves(
+    connect_four: ConnectFour, minimax_ai: MonteCarloTreeSearch
+):
+    connect_four.play(minimax_ai.next_move(connect_four))
+    connect_four.play(3)
+
+    tree = minimax_ai._get_tree(connect_four)
+
+    assert tree.game_counts[0] > 0
+    assert tree.size > 1
+
+
+def test_should_start_a_new_tree_when_the_position_does_not_follow(
+    connect_four: ConnectFour, minimax_ai: MonteCarloTreeSearch
+):
+    connect_four.play(0)
+    minimax_ai.next_move(connect_four)
+    other_connect_four = ConnectFour()
+    other_connect_four.play(1)
+
+    tree = minimax_ai._get_tree(other_connect_four)
+
+    assert tree.game_counts[0] == 0
+    assert tree.size == 1
+
+
+def test_should_stop_after_the_iteration_budget(connect_four: ConnectFour):
+    mcts = MonteCarloTreeSearch(budget=SearchBudget(time_limit=None, max_iterations=50))
+
+    result = mcts.search(connect_four)
+
+    assert result.stats.iterations == 50
+    assert result.stats.nodes > 1
+    assert result.stats.depth >= 1
+
+
+def test_should_stop_when_the_node_budget_is_reached(connect_four: ConnectFour):
+    mcts = MonteCarloTreeSearch(budget=SearchBudget(time_limit=None, max_nodes=100))
+
+    assert mcts.search(connect_four).stats.nodes <= 100
+
+
+def test_should_stop_early_when_the_best_move_is_certain(connect_four: ConnectFour):
+    for i in range(3):
+        for _ in range(4):
+            connect_four.play(i)
+    mcts = MonteCarloTreeSearch(
+        budget=SearchBudget(time_limit=5, certainty=0.5, min_iterations=100)
+    )
+
+    result = mcts.search(connect_four)
+
+    assert result.move == 3
+    assert result.stats.elapsed < 5
+
+
+def test_should_check_the_certainty_between_batches(
+    connect_four: ConnectFour, monkeypatch: pytest.MonkeyPatch
+):
+    checks = []
+    get_best_visit_share = MCTSTree.get_best_visit_share
+
+    def spy(tree: MCTSTree) -> float:
+        checks.append(tree)
+        return get_best_visit_share(tree)
+
+    monkeypatch.setattr(MCTSTree, "get_best_visit_share", spy)
+    mcts = MonteCarloTreeSearch(
+        budget=SearchBudget(
+            time_limit=None, max_iterations=1024, certainty=1.1, min_iterations=100
+        ),
+        batch_size=128,
+    )
+
+    mcts.search(connect_four)
+
+    # after the batches ending at 128, 256, ... 896 iterations
+    assert len(checks) == 7
+
+
+def test_should_require_a_bounded_budget():
+    with pytest.raises(ValueError):
+        SearchBudget(time_limit=None)
+
+
+def test_should_play_the_winning_move_with_batched_rollouts(connect_four: ConnectFour):
+    for i in range(3):
+        for _ in range(4):
+            connect_four.play(i)
+    mcts = MonteCarloTreeSearch(
+        budget=SearchBudget(time_limit=None, max_iterations=2000), batch_size=64
+    )
+
+    assert mcts.next_move(connect_four) == 3
+    assert connect_four.get_moves() == [0, 0, 0, 0, 1, 1, 1, 1, 2, 2, 2, 2]
+
+
+def test_should_profile_the_search_phases(connect_four: ConnectFour):
+    mcts = MonteCarloTreeSearch(
+        budget=SearchBudget(time_limit=None, max_iterations=100), profile=True
+    )
+
+    phase_times = mcts.search(connect_four).stats.phase_times
+
+    assert set(phase_times) == {"select", "expand", "simulate", "backpropagate"}
+
+
+def test_should_search_larger_boards_without_batched_rollouts():
+    connect_four = ConnectFour.from_moves([1, 1, 2, 2, 3, 3], 8, 7, 4)
+    mcts = MonteCarloTreeSearch(
+        budget=SearchBudget(time_limit=None, max_iterations=2000), seed=0, batch_size=32
+    )
+
+    assert mcts.next_move(connect_four) in (0, 4)
+
+
+@pytest.mark.parametrize(
+    "budget, batch_size",
+    [
+        (SearchBudget(time_limit=0), 1),
+        (SearchBudget(time_limit=None, max_iterations=0), 1),
+        (SearchBudget(time_limit=None, max_iterations=0), 64),
+    ],
+)
+def test_should_expand_the_root_whatever_the_budget(
+    connect_four: ConnectFour, budget: SearchBudget, batch_size: int
+):
+    result = MonteCarloTreeSearch(budget=budget, batch_size=batch_size).search(
+        connect_four
+    )
+
+    assert 0 <= result.move < 7
+    assert result.stats.iterations >= 1
+
+
+def test_should_play_a_move_when_stopped_before_the_first_iteration(
+    connect_four: ConnectFour,
+):
+    mcts = MonteCarloTreeSearch()
+    mcts._is_budget_exhausted = lambda *args: True
+
+    assert 0 <= mcts.search(connect_four).move < 7
+
+
+def test_should_play_the_central_column_when_the_root_can_not_be_expanded(
+    connect_four: ConnectFour,
+):
+    mcts = MonteCarloTreeSearch(budget=SearchBudget(time_limit=None, max_iterations=10))
+    mcts.max_nodes = 3
+
+    assert mcts.search(connect_four).move == 3
+    assert mcts.search(ConnectFour.from_moves([3, 3, 3, 3, 3, 3])).move in (2, 4)
+
+
+def test_should_return_a_move_for_a_finished_game():
+    connect_four = ConnectFour.from_moves([0, 1, 0, 1, 0, 1, 0])
+    mcts = MonteCarloTreeSearch(budget=SearchBudget(time_limit=None, max_iterations=10))
+
+    assert 0 <= mcts.search(connect_four).move < 7
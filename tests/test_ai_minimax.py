@@ -1,3 +1,5 @@
+import time
+
 import pytest
 
 from connect_four.ai import MinimaxAI
@@ -45,3 +47,45 @@ def test_should_play_the_winning_move_when_possible(
             connect_four.play(i)
 
     assert minimax_ai.next_move(connect_four) == 3
+
+
+def test_should_play_the_center_col_first(
+    connect_four: ConnectFour, minimax_ai: MinimaxAI
+):
+    assert minimax_ai.next_move(connect_four) == 3
+
+
+def test_should_return_within_the_time_limit(connect_four: ConnectFour):
+    minimax_ai = MinimaxAI(time_limit=0.2)
+
+    start = time.perf_counter()
+    move = minimax_ai.next_move(connect_four)
+
+    assert time.perf_counter() - start < 0.5
+    assert 0 <= move < 7
+
+
+def test_should_play_the_winning_move_when_time_limited(connect_four: ConnectFour):
+    for i in range(3):
+        for _ in range(4):
+            connect_four.play(i)
+
+    assert MinimaxAI(time_limit=0.2).next_move(connect_four) == 3
+
+
+def test_should_report_search_stats():
+    connect_four = ConnectFour.from_moves([3, 3, 2])
+
+    result = MinimaxAI(max_depth=4, profile=True).search(connect_four)
+
+    assert result.stats.depth == 4
+    assert result.stats.nodes > 0
+    assert 0 < result.stats.pruning_rate < 1
+    assert set(result.stats.phase_times) == {"evaluate", "generate"}
+
+
+def test_should_block_an_opponent_line_on_a_larger_board():
+    # red threatens to complete five discs on the bottom row of a 9x7 board
+    connect_four = ConnectFour.from_moves([1, 0, 2, 1, 3, 2, 4], 9, 7, 5)
+
+    assert MinimaxAI(max_depth=2).next_move(connect_four) == 5
@@ -0,0 +1,62 @@
+import pytest
+
+from connect_four.ai import ParallelMode, ParallelMonteCarloTreeSearch, SearchBudget
+from connect_four.core import ConnectFour
+
+
+@pytest.fixture
+def connect_four():
+    return ConnectFour()
+
+
+@pytest.mark.parametrize("mode", [ParallelMode.ROOT, ParallelMode.LEAF])
+def test_should_play_the_winning_move_when_possible(
+    connect_four: ConnectFour, mode: ParallelMode
+):
+    for i in range(3):
+        for _ in range(4):
+            connect_four.play(i)
+
+    with ParallelMonteCarloTreeSearch(
+        workers=2,
+        mode=mode,
+        budget=SearchBudget(time_limit=None, max_iterations=2000),
+        batch_size=100,
+        seed=1,
+    ) as mcts:
+        assert mcts.next_move(connect_four) == 3
+
+
+@pytest.mark.parametrize("mode", [ParallelMode.ROOT, ParallelMode.LEAF])
+def test_should_return_the_same_move_with_the_same_seed(
+    connect_four: ConnectFour, mode: ParallelMode
+):
+    connect_four.play(3)
+
+    moves = []
+    for _ in range(2):
+        with ParallelMonteCarloTreeSearch(
+            workers=2,
+            mode=mode,
+            budget=SearchBudget(time_limit=None, max_iterations=400),
+            batch_size=100,
+            seed=7,
+        ) as mcts:
+            moves.append(mcts.next_move(connect_four))
+
+    assert moves[0] == moves[1]
+    assert connect_four.get_moves() == [3]
+
+
+@pytest.mark.parametrize("mode", [ParallelMode.ROOT, ParallelMode.LEAF])
+def test_should_search_a_non_standard_board(mode: ParallelMode):
+    connect_four = ConnectFour.from_moves([8, 0, 8, 0, 8, 1], 9, 7, 4)
+
+    with ParallelMonteCarloTreeSearch(
+        workers=2,
+        mode=mode,
+        budget=SearchBudget(time_limit=None, max_iterations=400),
+        batch_size=100,
+        seed=1,
+    ) as mcts:
+        assert mcts.next_move(connect_four) == 8
@@ -0,0 +1,156 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from connect_four.ai import SearchBudget
+from connect_four.app.ai_workers import (
+    AIOverloadedException,
+    AIWorkerPool,
+    OverloadPolicy,
+)
+from connect_four.app.move_cache import MoveCache
+from connect_four.core import ConnectFour
+
+
+@pytest.fixture
+def connect_four():
+    return ConnectFour()
+
+
+def create_pool(**kwargs) -> AIWorkerPool:
+    kwargs.setdefault("budget", SearchBudget(time_limit=None, max_iterations=200))
+    return AIWorkerPool(executor=ThreadPoolExecutor(max_workers=1), **kwargs)
+
+
+def test_should_compute_a_move_in_a_worker(connect_four: ConnectFour):
+    pool = create_pool()
+
+    move = asyncio.run(pool.next_move("game", connect_four))
+
+    assert 0 <= move < 7
+    assert pool.pending_count == 0
+    pool.shutdown()
+
+
+def test_should_reject_when_the_pool_is_saturated(connect_four: ConnectFour):
+    pool = create_pool(max_pending=0, overload_policy=OverloadPolicy.REJECT)
+
+    with pytest.raises(AIOverloadedException):
+        asyncio.run(pool.next_move("game", connect_four))
+    pool.shutdown()
+
+
+def test_should_degrade_when_the_pool_is_saturated(connect_four: ConnectFour):
+    for _ in range(3):
+        connect_four.play(0)
+        connect_four.play(1)
+    pool = create_pool(max_pending=0, overload_policy=OverloadPolicy.DEGRADE)
+
+    assert asyncio.run(pool.next_move("game", connect_four)) == 0
+    pool.shutdown()
+
+
+def test_should_degrade_when_the_search_times_out(connect_four: ConnectFour):
+    pool = create_pool(timeout=0.01, budget=SearchBudget(time_limit=0.5))
+
+    move = asyncio.run(pool.next_move("game", connect_four))
+
+    assert 0 <= move < 7
+    assert pool.pending_count == 1
+    pool.shutdown()
+
+
+def test_should_reuse_the_pondered_reply(connect_four: ConnectFour):
+    pool = create_pool(workers=2)
+    pool.ponder("game", connect_four)
+    ((pondered_moves, future),) = pool._ponders["game"].items()
+    for move in pondered_moves:
+        connect_four.play(move)
+
+    move = asyncio.run(pool.next_move("game", connect_four))
+
+    assert move == future.result().move
+    assert "game" not in pool._ponders
+    pool.shutdown()
+
+
+def test_should_not_cache_the_pondered_reply(connect_four: ConnectFour):
+    pool = create_pool(workers=2, move_cache=MoveCache())
+    pool.ponder("game", connect_four)
+    ((pondered_moves, _),) = pool._ponders["game"].items()
+    for move in pondered_moves:
+        connect_four.play(move)
+
+    asyncio.run(pool.next_move("game", connect_four))
+
+    assert pool.move_cache.get(connect_four, "mcts", pool.get_difficulty()) is None
+    assert 'connect_four_ai_search_iterations_total{engine="ponder"} 100' in [
+        line for metric in pool.get_metrics() for line in metric.render()
+    ]
+    pool.shutdown()
+
+
+def test_should_only_ponder_on_idle_workers(connect_four: ConnectFour):
+    pool = create_pool(workers=3)
+
+    pool.ponder("game", connect_four)
+
+    assert list(pool._ponders["game"]) == [(3,), (2,)]
+    assert pool.ponder_count == 2
+    assert pool.pending_count == 0
+    pool.shutdown()
+
+
+def test_should_keep_a_worker_for_the_live_searches(connect_four: ConnectFour):
+    pool = create_pool(workers=1)
+
+    pool.ponder("game", connect_four)
+
+    assert "game" not in pool._ponders
+    assert pool.ponder_count == 0
+    pool.shutdown()
+
+
+def test_should_not_count_the_ponders_as_pending(connect_four: ConnectFour):
+    pool = create_pool(workers=2, max_pending=1, overload_policy=OverloadPolicy.REJECT)
+    pool.ponder("game", connect_four)
+    connect_four.play(0)
+
+    move = asyncio.run(pool.next_move("other game", connect_four))
+
+    assert 0 <= move < 7
+    pool.shutdown()
+
+
+def test_should_ponder_with_a_share_of_the_budget():
+    pool = create_pool(budget=SearchBudget(time_limit=0.5, max_iterations=201))
+
+    assert pool.get_ponder_budget() == SearchBudget(time_limit=0.25, max_iterations=100)
+    pool.shutdown()
+
+
+def test_should_answer_from_the_move_cache(connect_four: ConnectFour):
+    pool = create_pool(move_cache=MoveCache())
+    move = asyncio.run(pool.next_move("game", connect_four))
+    pool.max_pending = 0
+    pool.overload_policy = OverloadPolicy.REJECT
+
+    assert asyncio.run(pool.next_move("other game", connect_four)) == move
+    assert pool.move_cache.get_stats().hits == 1
+    pool.shutdown()
+
+
+def test_should_search_with_the_rollout_policy(connect_four: ConnectFour):
+    pool = create_pool(rollout_policy="heavy", move_cache=MoveCache())
+
+    move = asyncio.run(pool.next_move("game", connect_four))
+
+    assert 0 <= move < 7
+    assert pool.get_difficulty().endswith(":heavy")
+    assert (
+        pool.move_cache.get(connect_four, "mcts", create_pool().get_difficulty()) is None
+    )
+    with pytest.raises(ValueError):
+        create_pool(rollout_policy="light")
+    pool.shutdown()
@@ -0,0 +1,224 @@
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import json
+
+from fastapi.testclient import TestClient
+import pytest
+
+from connect_four.ai import SearchBudget
+from connect_four.app import app
+from connect_four.app.ai_workers import AIWorkerPool, OverloadPolicy
+from connect_four.app.dependencies import get_ai_workers
+from connect_four.app.move_cache import MoveCache
+
+
+@pytest.fixture
+def ai_workers():
+    ai_workers = AIWorkerPool(
+        budget=SearchBudget(time_limit=None, max_iterations=200),
+        executor=ThreadPoolExecutor(max_workers=1),
+    )
+    app.dependency_overrides[get_ai_workers] = lambda: ai_workers
+    yield ai_workers
+    del app.dependency_overrides[get_ai_workers]
+    ai_workers.shutdown()
+
+
+@pytest.fixture
+def client(ai_workers: AIWorkerPool):
+    # the context keeps the event loop running the AI jobs between requests
+    with TestClient(app) as client:
+        yield client
+
+
+def play(client: TestClient, col_index: int):
+    response = client.post(f"/play/{col_index}")
+    client.get(f"/jobs/{response.headers['X-AI-Job-Id']}/events")
+    return response
+
+
+def test_should_give_each_visitor_its_own_game(client: TestClient):
+    with TestClient(app) as other_client:
+        client.get("/")
+        other_client.get("/")
+
+        play(client, 3)
+        response = other_client.get("/")
+
+    assert client.cookies["game_id"] != other_client.cookies["game_id"]
+    assert response.text.count("disc R") == 0
+
+
+def test_should_load_a_game_from_its_url_id(client: TestClient):
+    client.get("/")
+    play(client, 3)
+
+    response = TestClient(app).get("/", params={"game_id": client.cookies["game_id"]})
+
+    assert response.text.count("disc R") == 1
+    assert response.text.count("disc Y") == 1
+
+
+def test_should_reject_the_human_move_when_the_ai_is_busy(
+    client: TestClient, ai_workers: AIWorkerPool
+):
+    ai_workers.max_pending = 0
+    ai_workers.overload_policy = OverloadPolicy.REJECT
+    client.get("/")
+
+    response = client.post("/play/3")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert client.get("/").text.count("disc R") == 0
+
+
+def test_should_undo_the_human_move_when_the_ai_fails(
+    client: TestClient, ai_workers: AIWorkerPool, monkeypatch: pytest.MonkeyPatch
+):
+    async def next_move(*args):
+        raise BrokenProcessPool()
+
+    monkeypatch.setattr(ai_workers, "next_move", next_move)
+    client.get("/")
+
+    job_id = client.post("/play/3").headers["X-AI-Job-Id"]
+    client.get(f"/jobs/{job_id}/events")
+
+    assert client.get(f"/jobs/{job_id}").json()["status"] == "failed"
+    assert client.get("/").text.count("disc R") == 0
+    assert client.post("/play/3").status_code == 200
+
+
+def test_should_return_the_human_move_before_the_ai_reply(
+    client: TestClient, ai_workers: AIWorkerPool
+):
+    ai_workers.budget = SearchBudget(time_limit=0.5)
+    client.get("/")
+
+    response = client.post("/play/3")
+    job = client.get(f"/jobs/{response.headers['X-AI-Job-Id']}").json()
+
+    assert response.text.count("disc R") == 1
+    assert response.text.count("disc Y") == 0
+    assert 'hx-trigger="every' in response.text
+    assert job["status"] == "pending"
+    assert client.post("/play/2").status_code == 409
+
+
+def test_should_stream_the_ai_move_when_the_job_ends(client: TestClient):
+    client.get("/")
+    job_id = client.post("/play/3").headers["X-AI-Job-Id"]
+
+    response = client.get(f"/jobs/{job_id}/events")
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text.startswith("event: ai-move\ndata: ")
+    assert '"status":"done"' in response.text
+    assert client.get("/game").text.count("disc Y") == 1
+
+
+def test_should_not_find_the_jobs_of_other_games(client: TestClient):
+    client.get("/")
+    job_id = client.post("/play/3").headers["X-AI-Job-Id"]
+
+    assert TestClient(app).get(f"/jobs/{job_id}").status_code == 404
+
+
+def test_should_report_the_move_cache_stats(client: TestClient, ai_workers: AIWorkerPool):
+    ai_workers.move_cache = MoveCache()
+    play(client, 3)
+
+    stats = client.get("/stats").json()
+
+    assert stats["move_cache"]["size"] == 1
+    assert stats["move_cache"]["misses"] == 1
+
+
+def test_should_export_the_ai_metrics(client: TestClient):
+    play(client, 3)
+
+    response = client.get("/metrics")
+
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'connect_four_ai_move_seconds_count{engine="mcts"} 1' in response.text
+    assert 'connect_four_ai_search_iterations_total{engine="mcts"} 200' in response.text
+    assert "connect_four_ai_pending_searches" in response.text
+
+
+def test_should_stream_the_analysis_of_each_position(client: TestClient):
+    response = client.post(
+        "/analyze", json={"positions": ["33", "0", "6", "9", "0000000", "0"], "depth": 2}
+    )
+
+    analyses = {
+        analysis["index"]: analysis
+        for analysis in map(json.loads, response.text.splitlines())
+    }
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert sorted(analyses) == [0, 1, 2, 3, 4, 5]
+    assert len(analyses[0]["scores"]) == 7
+    assert analyses[0]["stats"]["depth"] == 2
+    assert analyses[2]["scores"] == analyses[1]["scores"][::-1]
+    assert analyses[2]["best_move"] == 6 - analyses[1]["best_move"]
+    assert analyses[5] == {**analyses[1], "index": 5}
+    assert (
+        analyses[3]["error"] == analyses[4]["error"] == "the moves are not a valid game"
+    )
+
+
+def test_should_return_the_compact_game_state(client: TestClient):
+    response = client.post("/api/play/3")
+    client.get(f"/jobs/{response.headers['X-AI-Job-Id']}/events")
+
+    state = client.get("/api/game").json()
+
+    assert response.json()["moves"] == "3"
+    assert response.json()["last_move"] == {"row": 5, "col": 3, "disc": "R"}
+    assert len(state["moves"]) == 2
+    assert state["last_move"]["disc"] == "Y"
+    assert state["next_disc"] == "R" and state["winner"] is None
+    assert not state["thinking"]
+    assert client.post("/api/reset").json()["moves"] == ""
+
+
+def test_should_answer_not_modified_to_polling_clients(client: TestClient):
+    etag = client.get("/api/game").headers["ETag"]
+
+    not_modified = client.get("/api/game", headers={"If-None-Match": etag})
+    play(client, 3)
+    modified = client.get("/api/game", headers={"If-None-Match": etag})
+
+    assert not_modified.status_code == 304 and not_modified.content == b""
+    assert modified.status_code == 200 and modified.headers["ETag"] != etag
+    assert client.get("/game", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_should_not_share_etags_between_games(client: TestClient):
+    with TestClient(app) as other_client:
+        etag = client.get("/api/game").headers["ETag"]
+
+        response = other_client.get("/api/game", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_should_reject_invalid_moves(client: TestClient):
+    client.get("/")
+
+    assert client.post("/api/play/7").status_code == 400
+    assert client.get("/game/delta", params={"moves": "0000000"}).status_code == 400
+
+
+def test_should_only_send_the_changed_cells(client: TestClient):
+    play(client, 3)
+    moves = client.get("/api/game").json()["moves"]
+
+    response = client.get("/game/delta", params={"moves": "3"})
+
+    ai_move = int(moves[1])
+    ai_cell_id = f"cell-{4 if ai_move == 3 else 5}-{ai_move}"
+    assert response.text.count("hx-swap-oob") == 2
+    assert f'id="{ai_cell_id}" class="disc Y" hx-swap-oob="true"' in response.text
+    assert client.get("/game/delta", params={"moves": moves}).text.count("cell-") == 0
@@ -0,0 +1,75 @@
+from concurrent.futures import ThreadPoolExecutor
+import io
+import json
+
+import pytest
+
+from connect_four.ai import MinimaxAI, MonteCarloTreeSearch
+from connect_four.ai.arena import (
+    EngineSpec,
+    ResultWriter,
+    get_elo_difference,
+    get_wilson_interval,
+    run_arena,
+)
+from connect_four.ai.rollout_policies import HeavyRolloutPolicy
+
+
+def test_should_create_engines_from_their_spec():
+    minimax = EngineSpec.parse("minimax:depth=2").create()
+    mcts = EngineSpec.parse("mcts:iterations=50").create()
+
+    assert isinstance(minimax, MinimaxAI) and minimax.max_depth == 2
+    assert isinstance(mcts, MonteCarloTreeSearch)
+    assert mcts.budget.max_iterations == 50 and mcts.budget.time_limit is None
+    assert str(EngineSpec.parse("mcts:iterations=50")) == "mcts:iterations=50"
+    assert isinstance(
+        EngineSpec.parse("mcts:rollout=heavy").create().rollout_policy,
+        HeavyRolloutPolicy,
+    )
+
+
+def test_should_reject_unknown_engines_and_options():
+    with pytest.raises(ValueError):
+        EngineSpec.parse("random")
+    with pytest.raises(ValueError):
+        EngineSpec.parse("minimax:width=2").create()
+
+
+def test_should_compute_the_wilson_interval():
+    low, high = get_wilson_interval(50, 100)
+
+    assert low == pytest.approx(0.4038, abs=1e-4)
+    assert high == pytest.approx(0.5962, abs=1e-4)
+    assert get_wilson_interval(0, 10)[0] == 0
+
+
+def test_should_compute_the_elo_difference():
+    assert get_elo_difference(0.5) == 0
+    assert get_elo_difference(0.75) == pytest.approx(190.8, abs=0.1)
+    assert get_elo_difference(1) == -get_elo_difference(0)
+
+
+def test_should_play_each_opening_with_both_colors():
+    output = io.StringIO()
+    engines = [EngineSpec.parse("minimax:depth=1"), EngineSpec.parse("minimax:depth=2")]
+
+    summaries = run_arena(
+        engines,
+        4,
+        writer=ResultWriter(output),
+        seed=1,
+        executor=ThreadPoolExecutor(max_workers=1),
+    )
+
+    results = sorted(
+        (json.loads(line) for line in output.getvalue().splitlines()),
+        key=lambda result: result["game_index"],
+    )
+    assert [result["red"] for result in results] == [
+        "minimax:depth=1",
+        "minimax:depth=2",
+    ] * 2
+    assert results[0]["moves"][:2] == results[1]["moves"][:2]
+    assert summaries[0].game_count == 4
+    assert len(summaries[0].engine_move_times) > 0
@@ -0,0 +1,65 @@
+import pytest
+
+from connect_four.ai.batch_rollouts import BatchRolloutEngine
+from connect_four.core import HEIGHT, ConnectFour, Disc
+
+
+@pytest.fixture
+def connect_four():
+    return ConnectFour()
+
+
+@pytest.fixture
+def engine():
+    return BatchRolloutEngine(seed=0)
+
+
+def fill_all_but_last_col(connect_four: ConnectFour):
+    for i in range(3):
+        for _ in range(HEIGHT - 1):
+            connect_four.play(i)
+    for i in range(3):
+        connect_four.play(i)
+    for i in range(3, 6):
+        for _ in range(HEIGHT - 1):
+            connect_four.play(i)
+    for i in range(3, 6):
+        connect_four.play(i)
+
+
+def test_should_return_the_winner_of_a_finished_game(
+    connect_four: ConnectFour, engine: BatchRolloutEngine
+):
+    for i in range(4):
+        connect_four.play(col_index=0)
+        if i != 3:
+            connect_four.play(col_index=1)
+
+    assert engine.simulate([connect_four.get_bitboards()]) == [Disc.RED]
+
+
+def test_should_return_no_winner_for_a_draw(
+    connect_four: ConnectFour, engine: BatchRolloutEngine
+):
+    fill_all_but_last_col(connect_four)
+
+    assert engine.simulate([connect_four.get_bitboards()] * 10) == [None] * 10
+
+
+def test_should_play_until_a_win(connect_four: ConnectFour, engine: BatchRolloutEngine):
+    for col_index in [0, 1, 0, 1, 0, 1]:
+        connect_four.play(col_index)
+    # red wins by playing in the first col, yellow in the second one
+    winners = engine.simulate([connect_four.get_bitboards()] * 1000)
+
+    assert {Disc.RED, Disc.YELLOW} <= set(winners)
+    assert winners.count(Disc.RED) > winners.count(Disc.YELLOW)
+
+
+def test_should_simulate_games_from_different_positions(engine: BatchRolloutEngine):
+    won_by_red = ConnectFour.from_moves([0, 1, 0, 1, 0, 1, 0])
+    won_by_yellow = ConnectFour.from_moves([6, 0, 1, 0, 1, 0, 1, 0])
+
+    assert engine.simulate(
+        [won_by_red.get_bitboards(), won_by_yellow.get_bitboards()]
+    ) == [Disc.RED, Disc.YELLOW]
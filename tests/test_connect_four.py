@@ -9,6 +9,7 @@ from connect_four.core import (
     Disc,
     InvalidColumnException,
 )
+from connect_four.core.connect_four import get_winning_cells
 from connect_four.core.exceptions import GameOverException
 
 
@@ -237,3 +238,120 @@ def test_should_raise_an_error_when_playing_and_there_is_a_winner(
         for i in range(WIDTH):
             for _ in range(HEIGHT):
                 connect_four.play(i)
+
+
+def test_should_raise_an_error_when_placing_in_a_negative_col(
+    connect_four: ConnectFour,
+):
+    with pytest.raises(InvalidColumnException):
+        connect_four.play(col_index=-1)
+
+
+def test_red_should_win_when_4_red_discs_in_top_right_dir_above_bottom_row(
+    connect_four: ConnectFour,
+):
+    for col_index in [4, 2, 3, 1, 6, 2, 2, 6, 1, 4, 2, 4, 3, 3, 4, 1, 3, 2, 4]:
+        connect_four.play(col_index)
+
+    assert connect_four.get_grid()[1][4] == Disc.RED
+    assert connect_four.get_winner() == Disc.RED
+
+
+def test_should_have_no_winner_when_reverting_the_winning_play(
+    connect_four: ConnectFour,
+):
+    for i in range(4):
+        connect_four.play(col_index=0)
+        if i != 3:
+            connect_four.play(col_index=1)
+    connect_four.undo()
+
+    assert connect_four.get_winner() is None
+    assert not connect_four.is_game_over()
+    assert connect_four.get_next_disc() == Disc.RED
+
+
+def test_should_have_same_hash_when_reaching_a_position_by_another_move_order(
+    connect_four: ConnectFour,
+):
+    other_connect_four = ConnectFour()
+    for col_index in [0, 1, 2]:
+        connect_four.play(col_index)
+    for col_index in [2, 1, 0]:
+        other_connect_four.play(col_index)
+
+    assert connect_four.get_hash() == other_connect_four.get_hash()
+
+
+def test_should_restore_the_hash_when_reverting_plays(connect_four: ConnectFour):
+    connect_four.play(3)
+    hash_after_first_play = connect_four.get_hash()
+    connect_four.play(3)
+    connect_four.undo()
+
+    assert connect_four.get_hash() == hash_after_first_play
+    connect_four.undo()
+    assert connect_four.get_hash() == 0
+
+
+def test_should_share_canonical_key_between_mirrored_positions():
+    connect_four = ConnectFour.from_moves([0, 3, 1])
+    mirrored = ConnectFour.from_moves([6, 3, 5])
+
+    key, is_mirrored = connect_four.get_canonical_key()
+    mirrored_key, mirrored_is_mirrored = mirrored.get_canonical_key()
+
+    assert key == mirrored_key
+    assert is_mirrored != mirrored_is_mirrored
+    assert connect_four.get_key() != ConnectFour.from_moves([1, 3, 0, 2]).get_key()
+
+
+def test_should_need_5_aligned_discs_on_a_connect_5_board():
+    connect_four = ConnectFour.from_moves([0, 0, 1, 1, 2, 2, 3, 3], 9, 7, 5)
+
+    assert connect_four.get_winner() is None
+    connect_four.play(4)
+    assert connect_four.get_winner() == Disc.RED
+    assert len(connect_four.get_grid()) == 7 and len(connect_four.get_grid()[0]) == 9
+
+
+def test_should_fill_a_board_of_any_size():
+    connect_four = ConnectFour.from_moves([0, 1, 0, 1], 2, 3, 3)
+
+    assert connect_four.get_free_column_indexes() == [0, 1]
+    connect_four.play(1)
+    connect_four.play(0)
+    assert connect_four.is_game_over() and connect_four.get_winner() is None
+
+
+def test_should_index_the_winning_lines_through_each_cell(connect_four: ConnectFour):
+    geometry = connect_four.geometry
+
+    assert len(geometry.lines) == 69
+    # bottom left corner: horizontal, vertical and one diagonal
+    assert len(geometry.lines_by_bit[0]) == 3
+    assert all(len(lines) == 0 for lines in geometry.lines_by_bit[HEIGHT :: HEIGHT + 1])
+
+
+def test_should_sort_the_columns_from_the_center():
+    assert ConnectFour().geometry.center_order == [3, 2, 4, 1, 5, 0, 6]
+    assert ConnectFour(8, 6, 4).geometry.center_order == [3, 4, 2, 5, 1, 6, 0, 7]
+
+
+def test_should_reject_boards_where_no_line_fits():
+    with pytest.raises(ValueError):
+        ConnectFour(4, 4, 5)
+
+
+def test_should_find_the_cells_completing_a_line():
+    connect_four = ConnectFour.from_moves([0, 6, 1, 6, 2, 5, 0, 5])
+    red, yellow = connect_four.get_bitboards()
+    mask = red | yellow
+    geometry = connect_four.geometry
+
+    # red completes the bottom row at column 3, yellow has no three discs aligned
+    assert get_winning_cells(red, mask) == 1 << 3 * geometry.column_bits
+    assert geometry.get_winning_cells(red, mask) == get_winning_cells(red, mask)
+    assert (
+        geometry.get_winning_cells(yellow, mask) == get_winning_cells(yellow, mask) == 0
+    )
@@ -0,0 +1,150 @@
+import io
+import threading
+import time
+
+import pytest
+
+from connect_four.ai import MinimaxAI, MonteCarloTreeSearch, SearchBudget
+from connect_four.ai.engine import EngineProtocol
+from connect_four.core import ConnectFour
+
+
+@pytest.fixture
+def output():
+    return io.StringIO()
+
+
+@pytest.fixture
+def protocol(output):
+    protocol = EngineProtocol(output, seed=0)
+    yield protocol
+    protocol.stop()
+
+
+def get_lines(output: io.StringIO):
+    return output.getvalue().splitlines()
+
+
+def test_should_answer_the_handshake(protocol, output):
+    protocol.handle("uci")
+    protocol.handle("isready")
+
+    assert get_lines(output)[0] == "id name connect-four-ai"
+    assert get_lines(output)[-2:] == ["uciok", "readyok"]
+
+
+def test_should_play_the_winning_move(protocol, output):
+    protocol.handle("position 010101")
+    protocol.handle("go depth 2")
+    protocol.wait()
+
+    info, bestmove = get_lines(output)
+    assert info.startswith("info depth 2 nodes ")
+    assert " nps " in info and " time " in info
+    assert bestmove == "bestmove 0"
+
+
+@pytest.mark.parametrize("engine", ["minimax", "mcts"])
+def test_should_stop_an_infinite_search(protocol, output, engine):
+    protocol.handle(f"setoption name engine value {engine}")
+    protocol.handle("position startpos moves 3 3")
+    protocol.handle("go infinite")
+    time.sleep(0.05)
+    protocol.handle("stop")
+
+    assert get_lines(output)[-1] in [f"bestmove {move}" for move in range(7)]
+
+
+def test_should_keep_the_tree_between_ponder_and_go(protocol, output):
+    protocol.handle("setoption name engine value mcts")
+    protocol.handle("position 33")
+    protocol.handle("ponder")
+    time.sleep(0.05)
+    protocol.handle("go iterations 10")
+    protocol.wait()
+
+    assert get_lines(output)[-1].startswith("bestmove ")
+    assert protocol.mcts._tree.size > 10
+
+
+@pytest.mark.parametrize("engine", ["minimax", "mcts"])
+def test_should_answer_a_move_when_the_search_fails(protocol, output, engine):
+    def search(connect_four: ConnectFour):
+        raise RuntimeError("broken search")
+
+    protocol.handle(f"setoption name engine value {engine}")
+    protocol.minimax.search = protocol.mcts.search = search
+    protocol.handle("position 33")
+    protocol.handle("go movetime 0")
+    protocol.wait()
+
+    assert get_lines(output) == [
+        "info string search failed: broken search",
+        "bestmove 3",
+    ]
+
+
+def test_should_set_positions_of_other_boards(protocol, output):
+    protocol.handle("position 11x7x5 5 5 10")
+    protocol.handle("go depth 1")
+    protocol.wait()
+
+    assert protocol.connect_four.width == 11
+    assert protocol.connect_four.get_moves() == [5, 5, 10]
+    assert get_lines(output)[-1].startswith("bestmove ")
+
+
+def test_should_report_invalid_commands(protocol, output):
+    protocol.handle("position 0000000")
+    protocol.handle("go depth")
+    protocol.handle("fly")
+
+    assert get_lines(output) == [
+        "info string invalid position: AlreadyFilledColumnException",
+        "info string invalid go: depth expects a value",
+        "info string unknown command fly",
+    ]
+    assert not protocol.handle("quit")
+
+
+def test_should_reset_the_start_position_when_the_position_is_invalid(protocol, output):
+    protocol.handle("position 0101010")
+    protocol.handle("position 0000000")
+    protocol.handle("go depth 1")
+    protocol.wait()
+
+    assert protocol.connect_four.get_moves() == []
+    assert get_lines(output)[-1].startswith("bestmove ")
+    assert get_lines(output)[-1] != "bestmove none"
+
+
+@pytest.mark.parametrize(
+    "engine, limit", [("mcts", "depth 4"), ("minimax", "iterations 100")]
+)
+def test_should_report_the_limits_of_the_other_engine(protocol, output, engine, limit):
+    protocol.handle(f"setoption name engine value {engine}")
+    protocol.handle(f"go {limit}")
+    protocol.wait()
+
+    assert get_lines(output) == [
+        f"info string invalid go: {engine} searches take movetime or "
+        f"{'iterations' if engine == 'mcts' else 'depth'}"
+    ]
+
+
+@pytest.mark.parametrize(
+    "ai",
+    [MinimaxAI(time_limit=60), MonteCarloTreeSearch(budget=SearchBudget(time_limit=60))],
+)
+def test_should_stop_the_ais_searches(ai):
+    results = []
+    search_thread = threading.Thread(
+        target=lambda: results.append(ai.search(ConnectFour.from_moves([3, 3])))
+    )
+    search_thread.start()
+    time.sleep(0.05)
+    ai.stop()
+    search_thread.join(5)
+
+    assert not search_thread.is_alive()
+    assert results[0].stats.elapsed < 5
@@ -0,0 +1,87 @@
+from random import Random
+
+import numpy as np
+import pytest
+
+from connect_four.ai.evaluators import (
+    WINDOWS,
+    WindowEvaluator,
+    evaluate_batch,
+    to_array,
+)
+from connect_four.core import ConnectFour, Disc
+
+
+@pytest.fixture
+def connect_four():
+    return ConnectFour()
+
+
+@pytest.fixture
+def evaluator():
+    return WindowEvaluator()
+
+
+def play_random_game(connect_four: ConnectFour, evaluator: WindowEvaluator, seed: int):
+    random = Random(seed)
+    while not connect_four.is_game_over():
+        evaluator.play(
+            connect_four, random.choice(connect_four.get_free_column_indexes())
+        )
+
+
+def test_should_have_69_winning_windows():
+    assert len(WINDOWS) == 69
+
+
+def test_should_score_zero_when_no_discs(
+    connect_four: ConnectFour, evaluator: WindowEvaluator
+):
+    assert evaluator.evaluate(connect_four, Disc.RED) == 0
+
+
+def test_should_score_a_line_of_three_discs(
+    connect_four: ConnectFour, evaluator: WindowEvaluator
+):
+    for col_index in [0, 0, 1, 1, 2]:
+        evaluator.play(connect_four, col_index)
+
+    # bottom row: R R R . and the window starting at the second column
+    assert evaluator.evaluate(connect_four, Disc.RED) == 1
+    assert evaluator.evaluate(connect_four, Disc.YELLOW) == -1
+
+
+def test_should_score_a_win(connect_four: ConnectFour, evaluator: WindowEvaluator):
+    for col_index in [0, 0, 1, 1, 2, 2, 3]:
+        evaluator.play(connect_four, col_index)
+
+    assert evaluator.evaluate(connect_four, Disc.RED) >= 10
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_should_match_a_full_evaluation_when_playing_and_reverting(
+    connect_four: ConnectFour, evaluator: WindowEvaluator, seed: int
+):
+    play_random_game(connect_four, evaluator, seed)
+    for _ in range(seed + 1):
+        evaluator.undo(connect_four)
+    incremental_score = evaluator.evaluate(connect_four, Disc.RED)
+
+    evaluator.reset(connect_four)
+    assert evaluator.evaluate(connect_four, Disc.RED) == incremental_score
+
+
+def test_should_score_a_batch_like_the_incremental_evaluator(
+    evaluator: WindowEvaluator,
+):
+    grids = []
+    scores = []
+    for seed in range(10):
+        connect_four = ConnectFour()
+        play_random_game(connect_four, evaluator, seed)
+        for _ in range(seed):
+            evaluator.undo(connect_four)
+        grids.append(to_array(connect_four))
+        scores.append(evaluator.evaluate(connect_four, Disc.YELLOW))
+
+    assert list(evaluate_batch(np.stack(grids), Disc.YELLOW)) == scores
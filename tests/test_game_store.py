@@ -0,0 +1,116 @@
+import pytest
+
+from connect_four.app.game_store import GameStore, SQLiteGamePersistence
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def persistence():
+    return SQLiteGamePersistence()
+
+
+@pytest.fixture
+def game_store(clock: FakeClock, persistence: SQLiteGamePersistence):
+    return GameStore(max_games=2, ttl=60, persistence=persistence, clock=clock)
+
+
+def test_should_return_the_created_game(game_store: GameStore):
+    connect_four_service = game_store.create()
+
+    assert game_store.get(connect_four_service.game_id) is connect_four_service
+
+
+def test_should_return_no_game_when_unknown(game_store: GameStore):
+    assert game_store.get("unknown") is None
+
+
+def test_should_evict_the_least_recently_used_game(game_store: GameStore):
+    first_game = game_store.create()
+    second_game = game_store.create()
+    game_store.get(first_game.game_id)
+    game_store.create()
+
+    assert len(game_store) == 2
+    assert first_game.game_id in game_store._games
+    assert second_game.game_id not in game_store._games
+
+
+def test_should_evict_expired_games(game_store: GameStore, clock: FakeClock):
+    connect_four_service = game_store.create()
+    clock.now = 61
+
+    game_store.get("unknown")
+
+    assert len(game_store) == 0
+    assert connect_four_service.game_id not in game_store._games
+
+
+def test_should_reload_an_evicted_game_from_its_moves(
+    game_store: GameStore, clock: FakeClock
+):
+    connect_four_service = game_store.create()
+    for col_index in [3, 3, 4]:
+        connect_four_service.play(col_index)
+    game_store.save(connect_four_service)
+    clock.now = 61
+
+    reloaded_service = game_store.get(connect_four_service.game_id)
+
+    assert reloaded_service is not None
+    assert reloaded_service is not connect_four_service
+    assert reloaded_service.connect_four.get_moves() == [3, 3, 4]
+
+
+def test_should_store_moves_as_a_string(persistence: SQLiteGamePersistence):
+    persistence.save("game", [3, 3, 4])
+
+    assert persistence._connection.execute("SELECT moves FROM games").fetchone() == (
+        "334",
+    )
+    assert persistence.load("game") == [3, 3, 4]
+
+
+def count_persisted_games(persistence: SQLiteGamePersistence) -> int:
+    return persistence._connection.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+
+
+def test_should_only_persist_games_with_moves(
+    game_store: GameStore, persistence: SQLiteGamePersistence
+):
+    connect_four_service = game_store.create()
+    game_store.create()
+    assert count_persisted_games(persistence) == 0
+
+    connect_four_service.play(3)
+    game_store.save(connect_four_service)
+    assert count_persisted_games(persistence) == 1
+
+    connect_four_service.reset()
+    game_store.save(connect_four_service)
+    assert count_persisted_games(persistence) == 0
+
+
+def test_should_delete_the_expired_persisted_games(
+    game_store: GameStore, persistence: SQLiteGamePersistence, clock: FakeClock
+):
+    for game_id in ("old", "recent"):
+        persistence.save(game_id, [3])
+    persistence._connection.execute("UPDATE games SET updated_at = 0 WHERE id = 'old'")
+    clock.now = 61
+
+    game_store.get("unknown")
+
+    assert persistence.load("old") is None
+    assert persistence.load("recent") == [3]
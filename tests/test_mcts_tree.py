@@ -0,0 +1,59 @@
+import pytest
+
+from connect_four.ai.mcts_tree import MCTSTree
+from connect_four.core import Disc
+
+
+@pytest.fixture
+def tree():
+    return MCTSTree(Disc.RED, capacity=16)
+
+
+def test_should_allocate_children_contiguously(tree: MCTSTree):
+    tree.add_children(0, [0, 1, 2])
+    tree.add_children(2, [4, 5])
+
+    assert list(tree.get_children(0)) == [1, 2, 3]
+    assert list(tree.get_children(2)) == [4, 5]
+    assert [tree.get_move(child) for child in tree.get_children(2)] == [4, 5]
+    assert tree.parents[5] == 2
+
+
+def test_should_not_grow_beyond_capacity(tree: MCTSTree):
+    assert tree.add_children(0, list(range(7)))
+    assert tree.add_children(1, list(range(7)))
+    assert not tree.add_children(2, list(range(7)))
+    assert tree.is_leaf(2)
+    assert tree.size == 15
+
+
+def test_should_select_unvisited_children_first(tree: MCTSTree):
+    tree.add_children(0, [0, 1, 2])
+    tree.backpropagate([0, 1], Disc.RED)
+
+    assert tree.select_child(0) == 2
+
+
+def test_should_select_the_child_with_the_best_ucb_value(tree: MCTSTree):
+    tree.add_children(0, [0, 1])
+    tree.backpropagate([0, 1], Disc.YELLOW)
+    tree.backpropagate([0, 2], Disc.RED)
+
+    assert tree.select_child(0) == 2
+
+
+def test_should_count_wins_for_the_player_of_each_node(tree: MCTSTree):
+    tree.add_children(0, [3])
+    tree.add_children(1, [3])
+    tree.backpropagate([0, 1, 2], Disc.YELLOW)
+
+    assert list(tree.game_counts[:3]) == [1, 1, 1]
+    assert list(tree.win_counts[:3]) == [1, 0, 1]
+
+
+def test_should_return_the_move_with_the_best_win_rate(tree: MCTSTree):
+    tree.add_children(0, [0, 1, 2])
+    tree.backpropagate([0, 1], Disc.YELLOW)
+    tree.backpropagate([0, 2], Disc.RED)
+
+    assert tree.get_best_move() == 1
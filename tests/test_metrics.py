@@ -0,0 +1,46 @@
+from connect_four.ai import SearchStats
+from connect_four.app.metrics import AIMetrics, Counter, Histogram, render_metrics
+
+
+def test_should_render_cumulative_histogram_buckets():
+    histogram = Histogram("latency_seconds", "Latency", ["engine"], buckets=(0.1, 1))
+    histogram.observe(0.05, engine="mcts")
+    histogram.observe(0.5, engine="mcts")
+    histogram.observe(5, engine="mcts")
+
+    assert histogram.render() == [
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{engine="mcts",le="0.1"} 1',
+        'latency_seconds_bucket{engine="mcts",le="1"} 2',
+        'latency_seconds_bucket{engine="mcts",le="+Inf"} 3',
+        'latency_seconds_sum{engine="mcts"} 5.55',
+        'latency_seconds_count{engine="mcts"} 3',
+    ]
+
+
+def test_should_render_counters_by_labels():
+    counter = Counter("nodes_total", "Nodes", ["engine"])
+    counter.inc(3, engine="mcts")
+    counter.inc(2, engine="mcts")
+    counter.inc(engine="minimax")
+
+    assert render_metrics([counter]).splitlines()[2:] == [
+        'nodes_total{engine="mcts"} 5',
+        'nodes_total{engine="minimax"} 1',
+    ]
+
+
+def test_should_record_the_search_phases():
+    metrics = AIMetrics()
+
+    metrics.observe_search(
+        "mcts", SearchStats(iterations=10, nodes=5, phase_times={"select": 0.5})
+    )
+
+    assert metrics.search_iterations.render()[-1] == (
+        'connect_four_ai_search_iterations_total{engine="mcts"} 10'
+    )
+    assert metrics.search_phase_seconds.render()[-1] == (
+        'connect_four_ai_search_phase_seconds_total{engine="mcts",phase="select"} 0.5'
+    )
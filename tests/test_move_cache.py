@@ -0,0 +1,46 @@
+import pytest
+
+from connect_four.app.move_cache import MoveCache, SQLiteMoveCache
+from connect_four.core import ConnectFour
+
+
+@pytest.fixture
+def move_cache():
+    return MoveCache(max_entries=2)
+
+
+def test_should_return_the_cached_move(move_cache: MoveCache):
+    move_cache.put(ConnectFour.from_moves([3]), "mcts", "easy", 2)
+
+    assert move_cache.get(ConnectFour.from_moves([3]), "mcts", "easy") == 2
+    assert move_cache.get(ConnectFour.from_moves([3]), "mcts", "hard") is None
+    assert move_cache.get(ConnectFour.from_moves([3]), "minimax", "easy") is None
+
+
+def test_should_mirror_the_move_of_a_mirrored_position(move_cache: MoveCache):
+    move_cache.put(ConnectFour.from_moves([0]), "mcts", "easy", 1)
+
+    assert move_cache.get(ConnectFour.from_moves([6]), "mcts", "easy") == 5
+
+
+def test_should_evict_the_least_recently_used_moves(move_cache: MoveCache):
+    move_cache.put(ConnectFour.from_moves([0]), "mcts", "easy", 1)
+    move_cache.put(ConnectFour.from_moves([1]), "mcts", "easy", 1)
+    move_cache.get(ConnectFour.from_moves([0]), "mcts", "easy")
+    move_cache.put(ConnectFour.from_moves([2]), "mcts", "easy", 1)
+
+    assert len(move_cache) == 2
+    assert move_cache.get(ConnectFour.from_moves([0]), "mcts", "easy") == 1
+    assert move_cache.get(ConnectFour.from_moves([1]), "mcts", "easy") is None
+
+
+def test_should_share_moves_between_caches(tmp_path):
+    path = str(tmp_path / "moves.db")
+    MoveCache(shared=SQLiteMoveCache(path)).put(ConnectFour(), "mcts", "easy", 3)
+    move_cache = MoveCache(shared=SQLiteMoveCache(path))
+
+    assert move_cache.get(ConnectFour(), "mcts", "easy") == 3
+    assert move_cache.get(ConnectFour(), "mcts", "easy") == 3
+    assert move_cache.get(ConnectFour.from_moves([3]), "mcts", "easy") is None
+    assert move_cache.get_stats() == (1, 1, 1, 1)
+    assert move_cache.get_stats().hit_rate == 2 / 3
@@ -0,0 +1,76 @@
+import pytest
+
+from connect_four.ai import MinimaxAI, MonteCarloTreeSearch, OpeningBook, SearchBudget
+from connect_four.ai.opening_book import InvalidOpeningBookException, write_opening_book
+from connect_four.ai.opening_book_generator import (
+    generate_opening_book,
+    get_opening_positions,
+)
+from connect_four.core import ConnectFour
+
+
+@pytest.fixture
+def book_path(tmp_path):
+    path = str(tmp_path / "book.bin")
+    key, _ = ConnectFour.from_moves([0]).get_canonical_key()
+    write_opening_book(path, {ConnectFour().get_key(): 3, key: 1})
+    return path
+
+
+def test_should_find_the_move_of_a_book_position(book_path: str):
+    with OpeningBook(book_path) as opening_book:
+        assert len(opening_book) == 2
+        assert opening_book.get_move(ConnectFour()) == 3
+        assert opening_book.get_move(ConnectFour.from_moves([3])) is None
+
+
+def test_should_mirror_the_move_of_a_mirrored_position(book_path: str):
+    with OpeningBook(book_path) as opening_book:
+        moves = {
+            opening_book.get_move(ConnectFour.from_moves([0])),
+            opening_book.get_move(ConnectFour.from_moves([6])),
+        }
+
+    assert moves == {1, 5}
+
+
+def test_should_reject_a_file_which_is_not_a_book(tmp_path):
+    path = tmp_path / "book.bin"
+    path.write_bytes(b"not a book")
+
+    with pytest.raises(InvalidOpeningBookException):
+        OpeningBook(str(path))
+
+
+def test_should_list_each_opening_position_once():
+    positions = get_opening_positions(2)
+
+    # 7 * 7 second moves form 24 mirrored pairs, plus 3-3 which is its own mirror
+    assert len(positions) == 1 + 4 + 25
+
+
+def test_should_play_book_moves_without_searching(book_path: str):
+    with OpeningBook(book_path) as opening_book:
+        mcts = MonteCarloTreeSearch(opening_book=opening_book)
+        minimax_ai = MinimaxAI(max_depth=8, opening_book=opening_book)
+
+        result = mcts.search(ConnectFour.from_moves([6]))
+
+        assert result.move == 5
+        assert result.stats.iterations == 0
+        assert minimax_ai.next_move(ConnectFour.from_moves([6])) == 5
+
+
+def test_should_generate_a_book_with_every_opening_position(tmp_path):
+    path = str(tmp_path / "book.bin")
+
+    count = generate_opening_book(path, max_plies=1, max_depth=2, workers=1)
+
+    with OpeningBook(path) as opening_book:
+        assert count == len(opening_book) == 5
+        assert opening_book.get_move(ConnectFour.from_moves([1])) is not None
+        mcts = MonteCarloTreeSearch(
+            budget=SearchBudget(time_limit=None, max_iterations=10),
+            opening_book=opening_book,
+        )
+        assert mcts.search(ConnectFour.from_moves([3, 3])).stats.iterations == 10
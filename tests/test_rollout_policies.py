@@ -0,0 +1,77 @@
+from random import Random
+
+import pytest
+
+from connect_four.ai import MonteCarloTreeSearch, SearchBudget
+from connect_four.ai.rollout_policies import (
+    HeavyRolloutPolicy,
+    get_center_weights,
+    get_rollout_policy,
+)
+from connect_four.core import ConnectFour
+
+
+@pytest.fixture
+def policy():
+    return HeavyRolloutPolicy()
+
+
+@pytest.mark.parametrize(
+    "moves, board, winning_moves",
+    [([1, 1, 2, 2, 3, 3], (), (0, 4)), ([1, 1, 2, 2, 3, 3, 4, 4], (9, 7, 5), (0, 5))],
+)
+def test_should_play_the_winning_move(
+    policy: HeavyRolloutPolicy, moves, board, winning_moves
+):
+    connect_four = ConnectFour.from_moves(moves, *board)
+
+    assert policy.choose_move(connect_four, Random(0)) in winning_moves
+
+
+def test_should_block_the_opponent_winning_move(policy: HeavyRolloutPolicy):
+    connect_four = ConnectFour.from_moves([3, 3, 4, 3, 0, 3])
+
+    assert all(policy.choose_move(connect_four, Random(seed)) == 3 for seed in range(20))
+
+
+def test_should_prefer_the_central_columns(policy: HeavyRolloutPolicy):
+    random = Random(0)
+    moves = [policy.choose_move(ConnectFour(), random) for _ in range(1000)]
+
+    assert get_center_weights(7) == [1, 2, 3, 4, 3, 2, 1]
+    assert moves.count(3) > 3 * moves.count(0)
+
+
+def test_should_weight_the_columns_of_even_boards_symmetrically(
+    policy: HeavyRolloutPolicy,
+):
+    random = Random(0)
+    moves = [policy.choose_move(ConnectFour(8, 6, 4), random) for _ in range(2000)]
+
+    assert get_center_weights(8) == [1, 2, 3, 4, 4, 3, 2, 1]
+    assert abs(moves.count(3) - moves.count(4)) < 100
+
+
+def test_should_find_the_winning_plan_in_fewer_iterations_than_random_rollouts():
+    # red plays 2 or 5 for an open three, then wins
+    connect_four = ConnectFour.from_moves([3, 3, 4, 4])
+    budget = SearchBudget(time_limit=None, max_iterations=100)
+
+    def count_found(name: str) -> int:
+        return sum(
+            MonteCarloTreeSearch(
+                budget=budget, seed=seed, rollout_policy=get_rollout_policy(name)
+            )
+            .search(connect_four)
+            .move
+            in (2, 5)
+            for seed in range(10)
+        )
+
+    assert count_found("heavy") == 10
+    assert count_found("random") < 10
+
+
+def test_should_reject_unknown_rollout_policies():
+    with pytest.raises(ValueError):
+        get_rollout_policy("light")
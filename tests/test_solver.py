@@ -0,0 +1,98 @@
+import pytest
+
+from connect_four.ai import OpeningBook, Solver, SolverAI
+from connect_four.ai.opening_book import write_opening_book
+from connect_four.core import ConnectFour
+
+
+@pytest.fixture
+def solver():
+    return Solver()
+
+
+def solve_without_pruning(connect_four: ConnectFour) -> int:
+    if connect_four.get_winner() is not None:
+        return -((44 - len(connect_four.get_moves())) // 2)
+    if connect_four.is_game_over():
+        return 0
+    best_score = -100
+    for col_index in connect_four.get_free_column_indexes():
+        connect_four.play(col_index)
+        best_score = max(best_score, -solve_without_pruning(connect_four))
+        connect_four.undo()
+    return best_score
+
+
+@pytest.mark.parametrize(
+    "moves",
+    [
+        # drawn, won and lost end games
+        [2, 0, 1, 3, 4, 2, 4, 4, 2, 1, 5, 6, 4, 4, 5, 5, 5, 0, 3, 6, 6, 6, 5, 6, 4, 3]
+        + [3, 3, 3, 0, 5, 6, 0],
+        [3, 4, 4, 6, 0, 3, 5, 2, 6, 5, 0, 6, 5, 0, 3, 6, 5, 6, 1, 3, 1, 3, 6, 5, 2, 0]
+        + [5, 3, 4, 4, 0, 1, 1],
+        [0, 3, 4, 4, 2, 1, 3, 0, 0, 2, 4, 0, 1, 0, 3, 3, 5, 3, 1, 1, 1, 3, 4, 5, 6, 1]
+        + [6, 0, 5, 5, 5, 5, 4],
+    ],
+)
+def test_should_find_the_exact_score(solver: Solver, moves):
+    connect_four = ConnectFour.from_moves(moves)
+
+    assert solver.solve(connect_four) == solve_without_pruning(connect_four)
+    assert connect_four.get_moves() == moves
+
+
+def test_should_score_an_immediate_win(solver: Solver):
+    connect_four = ConnectFour.from_moves([0, 1, 0, 1, 0, 1])
+
+    assert solver.solve(connect_four) == (43 - 6) // 2
+
+
+def test_should_score_a_lost_game(solver: Solver):
+    connect_four = ConnectFour.from_moves([0, 1, 0, 1, 0, 1, 0])
+
+    assert solver.solve(connect_four) == -((44 - 7) // 2)
+
+
+def test_should_only_give_the_sign_when_weak(solver: Solver):
+    connect_four = ConnectFour.from_moves(
+        [3, 2, 3, 3, 2, 3, 0, 3, 2, 0, 3, 1, 4, 4, 2, 2, 0, 4, 0, 4]
+    )
+
+    score = solver.solve(connect_four)
+    weak_score = Solver().solve(connect_four, weak=True)
+
+    assert -1 <= weak_score <= 1
+    assert (score > 0) - (score < 0) == weak_score
+
+
+def test_should_give_mirrored_positions_the_same_score(solver: Solver):
+    moves = [3, 2, 3, 3, 2, 6, 3, 2, 1, 3, 2, 6, 1, 1, 5, 1, 4, 4, 4, 1]
+    connect_four = ConnectFour.from_moves(moves)
+    mirrored = ConnectFour.from_moves([6 - move for move in moves])
+
+    assert solver.solve(connect_four) == Solver().solve(mirrored)
+    assert solver.analyze(connect_four) == Solver().analyze(mirrored)[::-1]
+
+
+def test_should_play_a_move_with_the_best_score(solver: Solver):
+    connect_four = ConnectFour.from_moves(
+        [3, 2, 3, 3, 2, 6, 3, 2, 1, 3, 2, 6, 1, 1, 5, 1, 4, 4, 4, 1]
+    )
+    scores = solver.analyze(connect_four)
+
+    move = SolverAI().next_move(connect_four)
+
+    assert scores[move] == max(score for score in scores if score is not None)
+
+
+def test_should_play_book_moves_without_solving(tmp_path):
+    path = str(tmp_path / "book.bin")
+    write_opening_book(path, {ConnectFour().get_key(): 3})
+    solver = Solver()
+
+    with OpeningBook(path) as opening_book:
+        move = SolverAI(solver=solver, opening_book=opening_book).next_move(ConnectFour())
+
+    assert move == 3
+    assert solver.node_count == 0
@@ -0,0 +1,112 @@
+import pytest
+
+from connect_four.ai import (
+    MinimaxAI,
+    MonteCarloTreeSearch,
+    SearchBudget,
+    SearchStats,
+    Solver,
+    Tablebase,
+)
+from connect_four.ai.tablebase import InvalidTablebaseException, write_tablebase
+from connect_four.ai.tablebase_generator import generate_tablebase, get_seed_positions
+from connect_four.core import ConnectFour
+from connect_four.core.connect_four import DISCS
+
+MAX_EMPTY_CELLS = 10
+
+
+@pytest.fixture(scope="module")
+def seed_positions():
+    return get_seed_positions(MAX_EMPTY_CELLS, game_count=100, seed=0)
+
+
+@pytest.fixture(scope="module")
+def tablebase(tmp_path_factory, seed_positions):
+    path = str(tmp_path_factory.mktemp("tablebase") / "tablebase.bin")
+    generate_tablebase(path, MAX_EMPTY_CELLS, seed_positions, workers=1)
+    with Tablebase(path) as tablebase:
+        yield tablebase
+
+
+def test_should_store_the_exact_score_of_the_solved_positions(
+    tablebase: Tablebase, seed_positions
+):
+    for moves in seed_positions[:5]:
+        connect_four = ConnectFour.from_moves(moves)
+        connect_four.play(connect_four.get_free_column_indexes()[-1])
+        if connect_four.is_game_over():
+            continue
+
+        assert tablebase.get_score(connect_four) == Solver().solve(connect_four)
+
+
+def test_should_not_find_positions_with_more_empty_cells(tablebase: Tablebase):
+    assert tablebase.get_score(ConnectFour.from_moves([3, 3])) is None
+    assert tablebase.get_move(ConnectFour.from_moves([3, 3])) is None
+
+
+def test_should_split_the_records_in_blocks(tmp_path):
+    path = str(tmp_path / "tablebase.bin")
+    write_tablebase(path, {key: key % 7 - 3 for key in range(10, 1000, 3)}, 4, 16)
+
+    with Tablebase(path) as tablebase:
+        assert [tablebase.lookup(key) for key in (10, 13, 994, 997)] == [0, 3, -3, 0]
+        assert tablebase.lookup(11) is None
+        assert tablebase.lookup(1) is None
+        assert tablebase.lookup(2000) is None
+
+
+def test_should_reject_a_file_which_is_not_a_tablebase(tmp_path):
+    path = tmp_path / "tablebase.bin"
+    path.write_bytes(b"not a tablebase")
+
+    with pytest.raises(InvalidTablebaseException):
+        Tablebase(str(path))
+
+
+def test_should_play_the_tablebase_move_without_searching(
+    tablebase: Tablebase, seed_positions
+):
+    connect_four = ConnectFour.from_moves(seed_positions[0])
+    scores = Solver().analyze(connect_four)
+    mcts = MonteCarloTreeSearch(tablebase=tablebase)
+
+    result = mcts.search(connect_four)
+
+    assert scores[result.move] == max(score for score in scores if score is not None)
+    assert result.stats.iterations == 0
+    assert MinimaxAI(tablebase=tablebase).next_move(connect_four) == result.move
+
+
+def test_should_stop_simulations_on_tablebase_positions(
+    tablebase: Tablebase, seed_positions
+):
+    connect_four = ConnectFour.from_moves(seed_positions[0])
+    score = Solver().solve(connect_four)
+    mcts = MonteCarloTreeSearch(tablebase=tablebase)
+
+    winners = {mcts._simulate(connect_four) for _ in range(20)}
+
+    if score > 0:
+        assert winners == {connect_four.get_next_disc()}
+    elif score < 0:
+        assert winners == set(DISCS) - {connect_four.get_next_disc()}
+    else:
+        assert winners == {None}
+    assert connect_four.get_moves() == seed_positions[0]
+
+
+def test_should_not_simulate_batches_of_tablebase_positions(
+    tablebase: Tablebase, seed_positions
+):
+    connect_four = ConnectFour.from_moves(seed_positions[0])
+    mcts = MonteCarloTreeSearch(
+        budget=SearchBudget(time_limit=None, max_iterations=64),
+        batch_size=16,
+        tablebase=tablebase,
+    )
+    mcts._simulate_batch = lambda positions: pytest.fail("simulated")
+
+    # unlike search, _search doesn't look the root up, its leaves are all solved
+    mcts._search(connect_four, SearchStats())
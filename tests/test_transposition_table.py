@@ -0,0 +1,77 @@
+import pytest
+
+from connect_four.ai import MinimaxAI, ReplacementPolicy, TranspositionTable
+from connect_four.ai.transposition_table import Bound
+from connect_four.core import ConnectFour
+
+
+@pytest.fixture
+def transposition_table():
+    return TranspositionTable(max_entries=8)
+
+
+def test_should_return_stored_entry(transposition_table: TranspositionTable):
+    transposition_table.store(42, depth=3, score=1.5, bound=Bound.EXACT, best_move=2)
+
+    entry = transposition_table.lookup(42)
+
+    assert entry is not None
+    assert (entry.depth, entry.score, entry.bound, entry.best_move) == (
+        3,
+        1.5,
+        Bound.EXACT,
+        2,
+    )
+
+
+def test_should_miss_when_another_position_shares_the_slot(
+    transposition_table: TranspositionTable,
+):
+    transposition_table.store(42, depth=3, score=1.5, bound=Bound.EXACT)
+
+    assert transposition_table.lookup(42 + 8) is None
+
+
+def test_should_keep_deepest_entry_with_depth_preferred_policy(
+    transposition_table: TranspositionTable,
+):
+    transposition_table.store(1, depth=5, score=1, bound=Bound.EXACT)
+    transposition_table.store(9, depth=2, score=2, bound=Bound.EXACT)
+
+    assert transposition_table.lookup(1) is not None
+    assert transposition_table.lookup(9) is None
+    assert transposition_table.get_stats().rejections == 1
+
+
+def test_should_keep_newest_entry_with_always_policy():
+    transposition_table = TranspositionTable(
+        max_entries=8, replacement_policy=ReplacementPolicy.ALWAYS
+    )
+    transposition_table.store(1, depth=5, score=1, bound=Bound.EXACT)
+    transposition_table.store(9, depth=2, score=2, bound=Bound.EXACT)
+
+    assert transposition_table.lookup(1) is None
+    assert transposition_table.lookup(9) is not None
+    assert transposition_table.get_stats().replacements == 1
+
+
+def test_should_count_hits_and_misses(transposition_table: TranspositionTable):
+    transposition_table.store(1, depth=1, score=0, bound=Bound.EXACT)
+    transposition_table.lookup(1)
+    transposition_table.lookup(2)
+
+    stats = transposition_table.get_stats()
+    assert (stats.used, stats.hits, stats.misses) == (1, 1, 1)
+    assert stats.hit_rate == 0.5
+
+
+def test_should_reuse_the_table_across_moves_of_a_game():
+    connect_four = ConnectFour()
+    minimax_ai = MinimaxAI()
+
+    connect_four.play(minimax_ai.next_move(connect_four))
+    connect_four.play(3)
+    hits_before_second_move = minimax_ai.transposition_table.get_stats().hits
+    minimax_ai.next_move(connect_four)
+
+    assert minimax_ai.transposition_table.get_stats().hits > hits_before_second_move